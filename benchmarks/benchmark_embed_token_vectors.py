@@ -0,0 +1,79 @@
+""" compares the batched WordEmbedder.embed_token_vectors with the former row by row implementation
+    on the same embedding matrix, after checking that both give the same results.
+
+    python -m benchmarks.benchmark_embed_token_vectors --batch-sizes 1 32 512
+
+    Note that a batch of 512 token vectors of length 3000 and dim 300 takes 1.8 GB per embedding tensor.
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from typing import Callable, List
+
+from benchmarks.synthetic_data import write_synthetic_embedding_file
+from justmltools.nlp.word_embedder import WordEmbedder
+
+
+def embed_token_vectors_row_by_row(embedding_matrix: np.ndarray, token_vectors: np.ndarray) -> List[np.ndarray]:
+    """ the row by row implementation of WordEmbedder.embed_token_vectors before it gathered whole batches at once """
+    zero_embedding_vector = np.zeros(shape=embedding_matrix.shape[1], dtype='float32')
+    num_words: int = token_vectors.shape[1]
+    embedding_tensor = np.empty(
+        shape=(token_vectors.shape[0], num_words + 2, embedding_matrix.shape[1]), dtype='float32')
+    for i, token_vector in enumerate(token_vectors):
+        embedding_tensor[i, 0] = zero_embedding_vector
+        embedding_tensor[i, 1:num_words + 1] = embedding_matrix.take(token_vector, axis=0)
+        embedding_tensor[i, num_words + 1] = zero_embedding_vector
+    return [embedding_tensor[:, 1:-1], embedding_tensor[:, 0:-2], embedding_tensor[:, 2:]]
+
+
+def measure_seconds(function: Callable, repeat: int) -> float:
+    durations: List[float] = []
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vocabulary-size", type=int, default=20000)
+    parser.add_argument("--embedding-dim", type=int, default=300)
+    parser.add_argument("--sequence-length", type=int, default=3000)
+    parser.add_argument("--batch-sizes", type=int, nargs='+', default=[1, 32, 512])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        embedding_file_path: str = os.path.join(temp_dir, "synthetic.vec")
+        write_synthetic_embedding_file(embedding_file_path, args.vocabulary_size, args.embedding_dim)
+        word_embedder = WordEmbedder(
+            embedding_file_path=embedding_file_path, embedding_sequence_length=args.sequence_length)
+
+    # the word embedder's own matrix, gathered through the public API: row i is the vector of token i
+    vocabulary_size: int = word_embedder.vocabulary_size()
+    embedding_matrix = word_embedder.embed_token_vectors(
+        np.arange(vocabulary_size + 1)[np.newaxis], context_offsets=[0])[0][0]
+    rng = np.random.default_rng(0)
+    print(f"{'batch size':>10} {'row by row [s]':>15} {'batched [s]':>12} {'batched, out [s]':>17} {'speedup':>8}")
+    for batch_size in args.batch_sizes:
+        token_vectors = rng.integers(1, vocabulary_size + 1, size=(batch_size, args.sequence_length), dtype='int32')
+        for expected, actual in zip(embed_token_vectors_row_by_row(embedding_matrix, token_vectors),
+                                    word_embedder.embed_token_vectors(token_vectors)):
+            np.testing.assert_array_equal(expected, actual)
+        row_by_row_seconds: float = measure_seconds(
+            lambda: embed_token_vectors_row_by_row(embedding_matrix, token_vectors), args.repeat)
+        batched_seconds: float = measure_seconds(
+            lambda: word_embedder.embed_token_vectors(token_vectors), args.repeat)
+        out = np.empty(shape=(batch_size, args.sequence_length + 2, args.embedding_dim), dtype='float32')
+        batched_out_seconds: float = measure_seconds(
+            lambda: word_embedder.embed_token_vectors(token_vectors, out=out), args.repeat)
+        print(f"{batch_size:>10} {row_by_row_seconds:>15.4f} {batched_seconds:>12.4f} {batched_out_seconds:>17.4f} "
+              f"{row_by_row_seconds / batched_out_seconds:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+""" measures the load time and memory, the tokenize throughput and the embedding throughput of WordEmbedder
+    with a synthetic embedding file and a synthetic corpus and prints the results as JSON,
+    e. g. for comparing releases:
+
+    python -m benchmarks.benchmark_word_embedder --vocabulary-size 200000 --output results.json
+
+    Each load is measured in a fresh process, so that its peak RSS (resident set size) is not distorted by
+    earlier measurements. Throughputs are the best of --repeat runs.
+    Only the JSON results are written to standard output, all logs of WordEmbedder go to standard error.
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import resource
+import sys
+import tempfile
+import time
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+from benchmarks.synthetic_data import synthetic_texts, synthetic_words, write_synthetic_embedding_file
+from justmltools.nlp.word_embedder import WordEmbedder
+
+
+def measure_best_seconds(function, repeat: int) -> float:
+    durations: List[float] = []
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def peak_rss_bytes() -> int:
+    max_rss: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024  # bytes on macOS, kilobytes on Linux
+
+
+def _load_in_process(word_embedder_arguments: Dict[str, Any], results) -> None:
+    rss_before: int = peak_rss_bytes()
+    start: float = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stderr):
+        WordEmbedder(**word_embedder_arguments)
+    results.put({
+        "seconds": time.perf_counter() - start,
+        "peak_rss_bytes": peak_rss_bytes(),
+        "peak_rss_bytes_before_load": rss_before
+    })
+
+
+def benchmark_load(word_embedder_arguments: Dict[str, Any], timeout_seconds: float) -> Dict[str, Any]:
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=_load_in_process, args=(word_embedder_arguments, results))
+    process.start()
+    try:
+        result: Dict[str, Any] = results.get(timeout=timeout_seconds)
+    except queue.Empty:
+        process.terminate()
+        raise TimeoutError(f"loading did not finish within {timeout_seconds} s, exit code {process.exitcode}")
+    finally:
+        process.join()
+    return result
+
+
+def benchmark_tokenize(word_embedder: WordEmbedder, texts: List[str], repeat: int) -> Dict[str, Any]:
+    tokens, _ = word_embedder.tokenize_texts_flat(texts)
+    seconds: float = measure_best_seconds(lambda: word_embedder.tokenize_texts_flat(texts), repeat)
+    return {
+        "texts": len(texts),
+        "tokens": int(tokens.shape[0]),
+        "seconds": seconds,
+        "texts_per_second": len(texts) / seconds,
+        "tokens_per_second": tokens.shape[0] / seconds
+    }
+
+
+def benchmark_embed_token_vectors(word_embedder: WordEmbedder, vocabulary_size: int, batch_size: int,
+                                  sequence_length: int, repeat: int) -> Dict[str, Any]:
+    rng = np.random.default_rng(0)
+    token_vectors = rng.integers(1, vocabulary_size, size=(batch_size, sequence_length), dtype='int32')
+    out = np.empty(shape=(batch_size, sequence_length + 2, word_embedder.embedding_dim()), dtype='float32')
+    seconds: float = measure_best_seconds(lambda: word_embedder.embed_token_vectors(token_vectors), repeat)
+    seconds_with_out: float = measure_best_seconds(
+        lambda: word_embedder.embed_token_vectors(token_vectors, out=out), repeat)
+    return {
+        "batch_size": batch_size,
+        "sequence_length": sequence_length,
+        "seconds": seconds,
+        "tokens_per_second": batch_size * sequence_length / seconds,
+        "seconds_with_out": seconds_with_out,
+        "tokens_per_second_with_out": batch_size * sequence_length / seconds_with_out,
+        "bytes_per_second_with_out": out.nbytes / seconds_with_out
+    }
+
+
+def benchmark_embed_texts_pooled(word_embedder: WordEmbedder, texts: List[str], pooling: str,
+                                 repeat: int) -> Dict[str, Any]:
+    idf_weights: Optional[np.ndarray] = word_embedder.compute_idf_weights(texts) if pooling == 'idf_mean' else None
+    seconds: float = measure_best_seconds(
+        lambda: word_embedder.embed_texts_pooled(texts, pooling=pooling, idf_weights=idf_weights), repeat)
+    return {
+        "pooling": pooling,
+        "texts": len(texts),
+        "seconds": seconds,
+        "texts_per_second": len(texts) / seconds
+    }
+
+
+def run(args) -> Dict[str, Any]:
+    results: Dict[str, Any] = {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "parameters": vars(args)
+    }
+    with tempfile.TemporaryDirectory() as temp_dir:
+        embedding_file_path: str = os.path.join(temp_dir, "synthetic.vec")
+        start: float = time.perf_counter()
+        write_synthetic_embedding_file(embedding_file_path, args.vocabulary_size, args.embedding_dim)
+        print(f"wrote synthetic embedding file in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+        word_embedder_arguments: Dict[str, Any] = {
+            "embedding_file_path": embedding_file_path,
+            "number_of_load_processes": args.number_of_load_processes,
+            "embedding_dtype": args.embedding_dtype,
+            "compact_vocabulary": args.compact_vocabulary
+        }
+        cache_dir: str = os.path.join(temp_dir, "cache")
+        results["load"] = {
+            "file": benchmark_load(word_embedder_arguments, args.load_timeout),
+            "file_to_cache": benchmark_load(dict(word_embedder_arguments, cache_dir=cache_dir), args.load_timeout),
+            "cache": benchmark_load(dict(word_embedder_arguments, cache_dir=cache_dir), args.load_timeout),
+            "file_bytes": os.path.getsize(embedding_file_path)
+        }
+        word_embedder = WordEmbedder(**word_embedder_arguments)
+
+    texts: List[str] = synthetic_texts(
+        synthetic_words(args.vocabulary_size), args.number_of_texts, args.mean_text_length)
+    results["tokenize"] = benchmark_tokenize(word_embedder, texts, args.repeat)
+    results["embed_token_vectors"] = []
+    for sequence_length in args.sequence_lengths:
+        for batch_size in args.batch_sizes:
+            tensor_bytes: int = batch_size * (sequence_length + 2) * args.embedding_dim * 4
+            if tensor_bytes > args.max_tensor_bytes:
+                print(f"skipped batch size {batch_size} with sequence length {sequence_length}, "
+                      f"it needs {tensor_bytes} bytes per tensor", file=sys.stderr)
+                continue
+            results["embed_token_vectors"].append(benchmark_embed_token_vectors(
+                word_embedder, args.vocabulary_size, batch_size, sequence_length, args.repeat))
+    results["embed_texts_pooled"] = [
+        benchmark_embed_texts_pooled(word_embedder, texts, pooling, args.repeat) for pooling in WordEmbedder.POOLINGS]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vocabulary-size", type=int, default=100000)
+    parser.add_argument("--embedding-dim", type=int, default=300)
+    parser.add_argument("--number-of-load-processes", type=int, default=1)
+    parser.add_argument("--embedding-dtype", default='float32')
+    parser.add_argument("--compact-vocabulary", action='store_true')
+    parser.add_argument("--number-of-texts", type=int, default=2000)
+    parser.add_argument("--mean-text-length", type=int, default=200, help="in words")
+    parser.add_argument("--batch-sizes", type=int, nargs='+', default=[1, 32, 128])
+    parser.add_argument("--sequence-lengths", type=int, nargs='+', default=[200, 3000])
+    parser.add_argument("--max-tensor-bytes", type=int, default=2 ** 30,
+                        help="skips embed_token_vectors measurements needing larger tensors")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--load-timeout", type=float, default=3600,
+                        help="the seconds to wait for each measured load, e. g. for a worker process that hangs")
+    parser.add_argument("--output", help="the JSON file to write, default: standard output")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(sys.stderr):
+        results: Dict[str, Any] = run(args)
+    if args.output is None:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
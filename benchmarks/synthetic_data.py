@@ -0,0 +1,66 @@
+""" synthetic embedding files and corpora for reproducible benchmarks """
+import numpy as np
+from typing import List
+
+_LETTERS = np.asarray(list("abcdefghijklmnopqrstuvwxyzäöüß"))
+
+
+def synthetic_words(vocabulary_size: int, seed: int = 42) -> List[str]:
+    """
+    :return: vocabulary_size random lower case words with a suffix encoding their index, i. e. hardly any duplicates
+    """
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(3, 12, size=vocabulary_size)
+    letters = _LETTERS[rng.integers(0, len(_LETTERS), size=int(lengths.sum()))]
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    return [''.join(letters[offsets[i]:offsets[i + 1]]) + f"{i:x}".translate(str.maketrans("0123456789", "ghijklmnop"))
+            for i in range(vocabulary_size)]
+
+
+def write_synthetic_embedding_file(file_path: str, vocabulary_size: int, embedding_dim: int, seed: int = 42):
+    """
+    writes an embedding file in the text format of https://fasttext.cc/docs/en/crawl-vectors.html ('.vec')
+    with random standard normal vectors
+
+    :param file_path: the path of the file to write
+    :param vocabulary_size: the number of words
+    :param embedding_dim: the number of dimensions of the vectors
+    :param seed: the seed of the random words and vectors
+    """
+    rng = np.random.default_rng(seed)
+    words: List[str] = synthetic_words(vocabulary_size, seed)
+    chunk_size: int = 10000
+    with open(file_path, 'w', encoding='utf-8', newline='\n') as embedding_file:
+        embedding_file.write(f"{vocabulary_size} {embedding_dim}\n")
+        for start in range(0, vocabulary_size, chunk_size):
+            vectors = rng.standard_normal((min(chunk_size, vocabulary_size - start), embedding_dim)).astype('float32')
+            embedding_file.write(''.join(
+                words[start + i] + ' ' + ' '.join(f"{value:.5f}" for value in vector.tolist()) + '\n'
+                for i, vector in enumerate(vectors)))
+
+
+def synthetic_texts(words: List[str], number_of_texts: int, mean_text_length: int, oov_rate: float = 0.05,
+                    seed: int = 0) -> List[str]:
+    """
+    :param words: the vocabulary to sample the words of the texts from with a Zipf-like distribution
+    :param number_of_texts: the number of texts to generate
+    :param mean_text_length: the mean number of words per text, the lengths are exponentially distributed
+    :param oov_rate: the fraction of words which are not in the vocabulary
+    :param seed: the seed of the random texts
+    :return: texts of words separated by spaces and some punctuation, partly capitalized
+    """
+    rng = np.random.default_rng(seed)
+    ranks = np.arange(1, len(words) + 1)
+    probabilities = 1 / ranks
+    probabilities /= probabilities.sum()
+    texts: List[str] = []
+    for length in np.maximum(rng.exponential(mean_text_length, size=number_of_texts).astype(int), 1):
+        text_words = [words[i] for i in rng.choice(len(words), size=length, p=probabilities)]
+        for i in np.nonzero(rng.random(length) < oov_rate)[0]:
+            text_words[i] = text_words[i][::-1] + "x"
+        for i in np.nonzero(rng.random(length) < 0.1)[0]:
+            text_words[i] = text_words[i].capitalize()
+        for i in np.nonzero(rng.random(length) < 0.08)[0]:
+            text_words[i] += rng.choice([",", ".", "!", "?", ":"])
+        texts.append(' '.join(text_words))
+    return texts
@@ -0,0 +1,211 @@
+import numpy as np
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+from justmltools.nlp.compact_word_vocabulary import CompactWordVocabulary
+
+DEFAULT_FILTERS: str = '!"#$%&()*+,-./:;<=>?@[\\]^_`{|}~\t\n\r'
+
+
+class BatchTokenizer:
+    """ splits texts into words and maps the words of a whole batch of texts to word indexes (tokens).
+
+        The translation table for the filter characters is built once per instance instead of once per text,
+        and the tokens of a batch are returned in a flat layout (CSR, compressed sparse row):
+        tokens is a flat int32 array of the tokens of all texts and offsets is an int64 array of len(texts) + 1,
+        the tokens of text i are tokens[offsets[i]:offsets[i + 1]].
+
+        With byte_level, texts are tokenized against a CompactWordVocabulary without splitting them into Python
+        strings: the whole batch is encoded to UTF-8 at once, the word boundaries are found with numpy operations on
+        the bytes, and the bytes of all words are looked up in the vocabulary at once. As ASCII filter characters never
+        occur within the UTF-8 encoding of other characters, the words are the same as the ones of text_to_word_list.
+    """
+
+    def __init__(self, filters: str = DEFAULT_FILTERS, lower: bool = False, split: str = ' ', byte_level: bool = False):
+        """
+        :param filters: the characters to filter out, such as punctuation, they are treated as word boundaries
+        :param lower: whether to convert the input to lower case
+        :param split: separator for word splitting
+        :param byte_level: whether to tokenize on the UTF-8 bytes of the texts when tokenizing with a
+                           CompactWordVocabulary, requires filters and split to be ASCII characters
+        """
+        self.__lower: bool = lower
+        self.__split: str = split
+        self.__translate_map = str.maketrans(dict((c, split) for c in filters))
+        self.__separator_bytes: Optional[np.ndarray] = None  # whether each byte value is a word boundary
+        if byte_level:
+            if len(split) != 1 or not (filters + split).isascii():
+                raise ValueError("byte_level requires ASCII filters and a single ASCII split character")
+            self.__separator_bytes = np.zeros(shape=256, dtype=bool)
+            self.__separator_bytes[np.frombuffer((filters + split).encode('ascii'), dtype=np.uint8)] = True
+
+    def text_to_word_list(self, text: str) -> List[str]:
+        """
+        splits a text into a list of words (also known as 'tokens').
+
+        :param text: input text
+        :return: a list of words, without empty words
+        """
+        if self.__lower:
+            text = text.lower()
+        word_sequence = text.translate(self.__translate_map).split(self.__split)
+        return [word for word in word_sequence if word]
+
+    def tokenize(self,
+                 texts: Iterable[str],
+                 word_2_index_dict: Mapping[str, int],
+                 statistics: Optional[Dict[str, int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        transforms each text in texts to word indexes.
+        Only words available in the word_2_index_dict will be taken into account.
+
+        :param texts: the texts to tokenize
+        :param word_2_index_dict: maps words to word indexes, e. g. a dict or a CompactWordVocabulary,
+                                  the words of a CompactWordVocabulary are looked up all at once
+        :param statistics: optional dict to add the number of words of the texts to, known or not, as "words",
+                           and the number of known words, i. e. of the returned tokens, as "tokens"
+        :return: the flat int32 tokens of all texts, the int64 offsets of the texts' first tokens plus the end offset
+        """
+        if isinstance(word_2_index_dict, CompactWordVocabulary):
+            if self.__separator_bytes is not None:
+                return self.__tokenize_bytes(texts, word_2_index_dict, statistics)
+            return self.__tokenize_with_batch_lookup(texts, word_2_index_dict, statistics)
+        get = word_2_index_dict.get
+        translate_map = self.__translate_map
+        split: str = self.__split
+        lower: bool = self.__lower
+        flat_tokens: List[int] = []
+        offsets: List[int] = [0]
+        number_of_words: int = 0
+        for text in texts:
+            if lower:
+                text = text.lower()
+            words: List[str] = text.translate(translate_map).split(split)
+            flat_tokens.extend([index for index in map(get, words) if index is not None])
+            offsets.append(len(flat_tokens))
+            if statistics is not None:
+                number_of_words += len(words) - words.count('')
+        if statistics is not None:
+            statistics["words"] = statistics.get("words", 0) + number_of_words
+            statistics["tokens"] = statistics.get("tokens", 0) + len(flat_tokens)
+        return np.asarray(flat_tokens, dtype=np.int32), np.asarray(offsets, dtype=np.int64)
+
+    def __tokenize_with_batch_lookup(self,
+                                     texts: Iterable[str],
+                                     vocabulary: CompactWordVocabulary,
+                                     statistics: Optional[Dict[str, int]]) -> Tuple[np.ndarray, np.ndarray]:
+        translate_map = self.__translate_map
+        split: str = self.__split
+        lower: bool = self.__lower
+        words: List[str] = []
+        word_offsets: List[int] = [0]
+        for text in texts:
+            if lower:
+                text = text.lower()
+            words.extend([word for word in text.translate(translate_map).split(split) if word])
+            word_offsets.append(len(words))
+        word_indexes = vocabulary.lookup(words)
+        known = word_indexes != 0
+        known_counts = np.zeros(shape=len(words) + 1, dtype=np.int64)
+        np.cumsum(known, out=known_counts[1:])
+        if statistics is not None:
+            statistics["words"] = statistics.get("words", 0) + len(words)
+            statistics["tokens"] = statistics.get("tokens", 0) + int(known_counts[-1])
+        return word_indexes[known], known_counts[np.asarray(word_offsets, dtype=np.int64)]
+
+    def __tokenize_bytes(self,
+                         texts: Iterable[str],
+                         vocabulary: CompactWordVocabulary,
+                         statistics: Optional[Dict[str, int]]) -> Tuple[np.ndarray, np.ndarray]:
+        texts = [text.lower() for text in texts] if self.__lower else list(texts)
+        # the split character between the texts makes sure that no word spans two texts
+        joined_text: str = self.__split.join(texts)
+        data = np.frombuffer(joined_text.encode('utf-8', 'surrogatepass'), dtype=np.uint8)
+        text_lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+        text_starts = np.cumsum(text_lengths + 1) - (text_lengths + 1)  # in characters
+        if data.shape[0] != len(joined_text):
+            # map character to byte positions by the bytes starting a character, i. e. no continuation bytes
+            character_starts = np.append(np.flatnonzero((data & 0xC0) != 0x80), data.shape[0])
+            text_starts = character_starts[text_starts]
+
+        # a word starts where a non-separator byte follows a separator byte or the start and ends vice versa
+        is_word_byte = np.zeros(shape=data.shape[0] + 2, dtype=np.int8)
+        is_word_byte[1:-1] = ~self.__separator_bytes[data]
+        changes = np.diff(is_word_byte)
+        word_starts = np.flatnonzero(changes == 1)
+        word_ends = np.flatnonzero(changes == -1)
+
+        # the words are looked up in the concatenation of all word bytes
+        word_lengths = word_ends - word_starts
+        word_offsets = np.zeros(shape=word_starts.shape[0] + 1, dtype=np.int64)
+        np.cumsum(word_lengths, out=word_offsets[1:])
+        word_indexes = vocabulary.lookup_encoded(data[is_word_byte[1:-1].astype(bool)], word_offsets)
+
+        known = word_indexes != 0
+        word_texts = np.searchsorted(text_starts, word_starts[known], side='right') - 1
+        offsets = np.zeros(shape=len(texts) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(word_texts, minlength=len(texts)), out=offsets[1:])
+        if statistics is not None:
+            statistics["words"] = statistics.get("words", 0) + int(word_starts.shape[0])
+            statistics["tokens"] = statistics.get("tokens", 0) + int(offsets[-1])
+        return word_indexes[known], offsets
+
+    @staticmethod
+    def pad(tokens: np.ndarray, offsets: np.ndarray, sequence_length: int) -> np.ndarray:
+        """
+        pads or truncates the flat token sequences returned by tokenize to the same length,
+        excess tokens are truncated at the end, missing tokens are padded with 0 at the end
+
+        :param tokens: the flat tokens of all texts
+        :param offsets: the offsets of the texts' first tokens plus the end offset
+        :param sequence_length: the length of the padded token sequences
+        :return: int32 numpy.ndarray of shape (len(offsets) - 1, sequence_length)
+        """
+        number_of_texts: int = len(offsets) - 1
+        padded = np.zeros(shape=(number_of_texts, sequence_length), dtype=np.int32)
+        lengths = np.minimum(np.diff(offsets), sequence_length)
+        total_length: int = int(lengths.sum())
+        if total_length == 0:
+            return padded
+
+        # scatter all kept tokens with one fancy index assignment
+        output_starts = np.cumsum(lengths) - lengths
+        positions = np.arange(total_length) - np.repeat(output_starts, lengths)
+        source_indexes = np.repeat(offsets[:-1], lengths) + positions
+        target_indexes = np.repeat(np.arange(number_of_texts) * sequence_length, lengths) + positions
+        padded.reshape(-1)[target_indexes] = tokens[source_indexes]
+        return padded
+
+    @staticmethod
+    def truncate(tokens: np.ndarray, offsets: np.ndarray, sequence_length: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        truncates the flat token sequences returned by tokenize at the end, keeping the flat layout
+
+        :param tokens: the flat tokens of all texts
+        :param offsets: the offsets of the texts' first tokens plus the end offset
+        :param sequence_length: the maximum length of the token sequences
+        :return: the flat tokens of all truncated texts, the offsets of their first tokens plus the end offset
+        """
+        lengths = np.diff(offsets)
+        if lengths.size == 0 or lengths.max() <= sequence_length:
+            return tokens, offsets
+        truncated_lengths = np.minimum(lengths, sequence_length)
+        truncated_offsets = np.zeros(shape=offsets.shape, dtype=np.int64)
+        np.cumsum(truncated_lengths, out=truncated_offsets[1:])
+        positions = np.arange(truncated_offsets[-1]) - np.repeat(truncated_offsets[:-1], truncated_lengths)
+        return tokens[np.repeat(offsets[:-1], truncated_lengths) + positions], truncated_offsets
+
+    @staticmethod
+    def select(tokens: np.ndarray, offsets: np.ndarray, text_indexes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        selects the flat token sequences of some texts, keeping the flat layout
+
+        :param tokens: the flat tokens of all texts
+        :param offsets: the offsets of the texts' first tokens plus the end offset
+        :param text_indexes: the indexes of the texts to select, in the order to select them in
+        :return: the flat tokens of the selected texts, the offsets of their first tokens plus the end offset
+        """
+        text_indexes = np.asarray(text_indexes, dtype=np.int64)
+        lengths = offsets[text_indexes + 1] - offsets[text_indexes]
+        selected_offsets = np.zeros(shape=text_indexes.shape[0] + 1, dtype=np.int64)
+        np.cumsum(lengths, out=selected_offsets[1:])
+        positions = np.arange(selected_offsets[-1]) - np.repeat(selected_offsets[:-1], lengths)
+        return tokens[np.repeat(offsets[text_indexes], lengths) + positions], selected_offsets
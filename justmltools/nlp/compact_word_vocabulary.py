@@ -0,0 +1,240 @@
+import numpy as np
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+class CompactWordVocabulary:
+    """ maps words to word indexes like a Dict[str, int], but stores all data in a few flat numpy arrays
+        instead of millions of Python objects, so that it takes a fraction of the memory of a dict,
+        and it can be saved to files to be memory mapped or be placed in shared memory.
+
+        The arrays are
+        - blob: the UTF-8 encoded words, concatenated, ordered by ascending word index
+        - offsets: the start offset of each word in blob plus the end offset of the last word
+        - indexes: the word index of each word, ascending
+        - hashes: the 64 bit FNV-1a hash of each word's UTF-8 encoding
+        - table: an open addressing hash table with linear probing, mapping hash slots to entries (-1 means empty),
+          with a power of two number of slots of at least twice the number of words
+
+        Words are looked up in O(1), lookup computes the hashes of a whole batch of words with numpy operations
+        and probes the table for all of them at once, comparing the UTF-8 bytes of candidates to rule out collisions.
+    """
+
+    ARRAY_NAMES = ('blob', 'offsets', 'indexes', 'hashes', 'table')
+
+    __FNV_OFFSET_BASIS: int = 0xcbf29ce484222325
+    __FNV_PRIME: int = 0x100000001b3
+    __HASH_MASK: int = 0xffffffffffffffff
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        """
+        use build or from_arrays instead of calling this constructor directly
+
+        :param arrays: the arrays named in ARRAY_NAMES
+        """
+        self.__blob: np.ndarray = arrays['blob']
+        self.__offsets: np.ndarray = arrays['offsets']
+        self.__indexes: np.ndarray = arrays['indexes']
+        self.__hashes: np.ndarray = arrays['hashes']
+        self.__table: np.ndarray = arrays['table']
+
+    @staticmethod
+    def build(words: Sequence[str]):
+        """
+        :param words: the words of the embedding matrix rows 1..n, i. e. words[i] gets word index i + 1,
+                      if a word occurs more than once, the last occurrence wins like for a dict, empty words are skipped
+        :return: the CompactWordVocabulary
+        """
+        word_2_index_dict: Dict[str, int] = {word: index + 1 for index, word in enumerate(words) if word}
+        entries: List[Tuple[int, str]] = sorted((index, word) for word, index in word_2_index_dict.items())
+        del word_2_index_dict
+        blob, offsets = CompactWordVocabulary.encode([word for _, word in entries])
+        hashes = CompactWordVocabulary.__hash_encoded(blob, offsets)
+
+        number_of_slots: int = 8
+        while number_of_slots < 2 * len(entries):
+            number_of_slots *= 2
+        table = np.full(shape=number_of_slots, fill_value=-1, dtype=np.int32)
+        slots = (hashes & np.uint64(number_of_slots - 1)).astype(np.int64)
+        pending = np.arange(len(entries), dtype=np.int64)
+        while pending.size > 0:
+            # the first pending entry of each free slot takes it, all other entries probe the next slot
+            pending_slots = slots[pending]
+            free = table[pending_slots] < 0
+            free_slots, first_claims = np.unique(pending_slots[free], return_index=True)
+            table[free_slots] = pending[free][first_claims]
+            placed = np.zeros(shape=pending.shape, dtype=bool)
+            placed[np.nonzero(free)[0][first_claims]] = True
+            pending = pending[~placed]
+            slots[pending] = (slots[pending] + 1) & (number_of_slots - 1)
+
+        return CompactWordVocabulary({
+            'blob': blob,
+            'offsets': offsets,
+            'indexes': np.asarray([index for index, _ in entries], dtype=np.int32),
+            'hashes': hashes,
+            'table': table
+        })
+
+    @staticmethod
+    def from_arrays(arrays: Dict[str, np.ndarray]):
+        """
+        :param arrays: the arrays named in ARRAY_NAMES as returned by to_arrays, e. g. memory mapped from files
+        :return: the CompactWordVocabulary using the arrays without copying them
+        """
+        missing_names = [name for name in CompactWordVocabulary.ARRAY_NAMES if name not in arrays]
+        if missing_names:
+            raise ValueError(f"missing arrays {missing_names}")
+        return CompactWordVocabulary(arrays)
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            'blob': self.__blob,
+            'offsets': self.__offsets,
+            'indexes': self.__indexes,
+            'hashes': self.__hashes,
+            'table': self.__table
+        }
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.to_arrays().values())
+
+    def __len__(self) -> int:
+        return self.__indexes.shape[0]
+
+    def __contains__(self, word: str) -> bool:
+        return self.get(word) is not None
+
+    def __getitem__(self, word: str) -> int:
+        index: Optional[int] = self.get(word)
+        if index is None:
+            raise KeyError(word)
+        return index
+
+    def __iter__(self) -> Iterator[str]:
+        for entry in range(len(self)):
+            yield self.__entry_word(entry)
+
+    def get(self, word: str, default: Optional[int] = None) -> Optional[int]:
+        """
+        looks up a single word, use lookup for looking up many words at once
+
+        :param word: the word to look up
+        :param default: the value to return for unknown words
+        :return: the word index of the word or default
+        """
+        encoded_word: bytes = word.encode('utf-8')
+        word_hash: int = self.__FNV_OFFSET_BASIS
+        for byte in encoded_word:
+            word_hash = ((word_hash ^ byte) * self.__FNV_PRIME) & self.__HASH_MASK
+        mask: int = self.__table.shape[0] - 1
+        slot: int = word_hash & mask
+        while True:
+            entry: int = int(self.__table[slot])
+            if entry < 0:
+                return default
+            if int(self.__hashes[entry]) == word_hash and \
+                    self.__blob[self.__offsets[entry]:self.__offsets[entry + 1]].tobytes() == encoded_word:
+                return int(self.__indexes[entry])
+            slot = (slot + 1) & mask
+
+    def lookup(self, words: Sequence[str]) -> np.ndarray:
+        """
+        looks up a batch of words at once
+
+        :param words: the words to look up
+        :return: int32 numpy.ndarray of the words' word indexes, 0 for unknown words
+        """
+        blob, offsets = self.encode(words)
+        return self.lookup_encoded(blob, offsets)
+
+    def lookup_encoded(self, blob: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+        """
+        looks up a batch of UTF-8 encoded words at once, e. g. as returned by encode
+
+        :param blob: uint8 numpy.ndarray of the concatenated UTF-8 encoded words
+        :param offsets: int64 numpy.ndarray of the start offset of each word in blob plus the end offset
+        :return: int32 numpy.ndarray of the words' word indexes, 0 for unknown words
+        """
+        number_of_words: int = offsets.shape[0] - 1
+        word_indexes = np.zeros(shape=number_of_words, dtype=np.int32)
+        if number_of_words == 0 or len(self) == 0:
+            return word_indexes
+        hashes = self.__hash_encoded(blob, offsets)
+        mask: int = self.__table.shape[0] - 1
+        slots = (hashes & np.uint64(mask)).astype(np.int64)
+        pending = np.arange(number_of_words, dtype=np.int64)
+        while pending.size > 0:
+            entries = self.__table[slots[pending]]
+            occupied = entries >= 0
+            pending, entries = pending[occupied], entries[occupied]  # words at an empty slot are unknown
+            candidates = self.__hashes[entries] == hashes[pending]
+            candidates[candidates] = self.__equal_words(
+                blob, offsets, pending[candidates], entries[candidates])
+            word_indexes[pending[candidates]] = self.__indexes[entries[candidates]]
+            pending = pending[~candidates]
+            slots[pending] = (slots[pending] + 1) & mask
+        return word_indexes
+
+    def word_at(self, index: int) -> Optional[str]:
+        """
+        :param index: a word index
+        :return: the word with the word index or None if there is none
+        """
+        entry: int = int(np.searchsorted(self.__indexes, index))
+        if entry < len(self) and self.__indexes[entry] == index:
+            return self.__entry_word(entry)
+        return None
+
+    def to_word_list(self, number_of_words: int) -> List[str]:
+        """
+        :param number_of_words: the number of embedding matrix rows minus 1
+        :return: the words of the embedding matrix rows 1..number_of_words, '' for rows without a word
+        """
+        words: List[str] = [''] * number_of_words
+        data: bytes = self.__blob.tobytes()
+        offsets: List[int] = self.__offsets.tolist()
+        for entry, index in enumerate(self.__indexes.tolist()):
+            words[index - 1] = data[offsets[entry]:offsets[entry + 1]].decode('utf-8')
+        return words
+
+    @staticmethod
+    def encode(words: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :param words: the words to encode
+        :return: uint8 numpy.ndarray of the concatenated UTF-8 encoded words,
+                 int64 numpy.ndarray of the start offset of each word plus the end offset
+        """
+        encoded_words: List[bytes] = [word.encode('utf-8') for word in words]
+        offsets = np.zeros(shape=len(encoded_words) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, encoded_words), dtype=np.int64, count=len(encoded_words)), out=offsets[1:])
+        return np.frombuffer(b''.join(encoded_words), dtype=np.uint8), offsets
+
+    def __entry_word(self, entry: int) -> str:
+        return self.__blob[self.__offsets[entry]:self.__offsets[entry + 1]].tobytes().decode('utf-8')
+
+    def __equal_words(self, blob: np.ndarray, offsets: np.ndarray, words: np.ndarray, entries: np.ndarray):
+        """
+        compares the UTF-8 bytes of the given words with the ones of the given entries pairwise
+        """
+        lengths = offsets[words + 1] - offsets[words]
+        equal = lengths == (self.__offsets[entries + 1] - self.__offsets[entries])
+        for position in range(int(lengths.max(initial=0))):
+            compared = np.nonzero(equal & (lengths > position))[0]
+            equal[compared] = blob[offsets[words[compared]] + position] == \
+                self.__blob[self.__offsets[entries[compared]] + position]
+        return equal
+
+    @staticmethod
+    def __hash_encoded(blob: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+        """
+        computes the 64 bit FNV-1a hashes of all words with one pass per byte position
+        """
+        lengths = np.diff(offsets)
+        hashes = np.full(shape=lengths.shape, fill_value=CompactWordVocabulary.__FNV_OFFSET_BASIS, dtype=np.uint64)
+        prime = np.uint64(CompactWordVocabulary.__FNV_PRIME)
+        active = np.arange(lengths.shape[0])
+        for position in range(int(lengths.max(initial=0))):
+            active = active[lengths[active] > position]
+            hashes[active] = (hashes[active] ^ blob[offsets[active] + position]) * prime
+        return hashes
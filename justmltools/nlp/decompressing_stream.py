@@ -0,0 +1,142 @@
+import io
+import lzma
+import queue
+import threading
+import zlib
+from typing import Optional
+
+
+class DecompressingStream(io.RawIOBase):
+    """ a read-only binary stream of the decompressed content of a gzip, xz or zstd compressed stream.
+
+        The compressed stream is read and decompressed in a background thread, which runs ahead of the reader
+        by a bounded number of chunks, so that reading and decompressing (both of which release the GIL)
+        overlap with parsing the decompressed content in the reading thread.
+        Concatenated compressed streams (e. g. multi-member gzip files) are decompressed one after the other.
+
+        zstd requires the optional package zstandard.
+    """
+
+    COMPRESSIONS = ('gzip', 'xz', 'zstd')
+    FILE_NAME_SUFFIXES = {'.gz': 'gzip', '.xz': 'xz', '.zst': 'zstd'}
+
+    def __init__(self, compressed_stream, compression: str, chunk_size: int = 1 << 20, max_queued_chunks: int = 16):
+        """
+        :param compressed_stream: a binary file-like object to read the compressed content from,
+                                  it is closed when this stream is closed
+        :param compression: one of COMPRESSIONS
+        :param chunk_size: the number of compressed bytes to read and decompress at once
+        :param max_queued_chunks: the maximum number of decompressed chunks the background thread runs ahead
+        """
+        super().__init__()
+        if compression not in self.COMPRESSIONS:
+            raise ValueError(f"compression must be one of {self.COMPRESSIONS}, got {compression}")
+        self.__create_decompressor(compression)  # fails early if zstandard is missing
+        self.__compressed_stream = compressed_stream
+        self.__compression: str = compression
+        self.__chunk_size: int = chunk_size
+        self.__chunks: queue.Queue = queue.Queue(maxsize=max_queued_chunks)
+        self.__chunk: memoryview = memoryview(b'')
+        self.__end_of_stream: bool = False
+        self.__stopping = threading.Event()
+        self.__thread = threading.Thread(target=self.__decompress, daemon=True)
+        self.__thread.start()
+
+    @staticmethod
+    def get_compression(file_path: str) -> Optional[str]:
+        """
+        :param file_path: a file path
+        :return: the compression indicated by the file name suffix ('.gz', '.xz' or '.zst'), None if there is none
+        """
+        for suffix, compression in DecompressingStream.FILE_NAME_SUFFIXES.items():
+            if file_path.endswith(suffix):
+                return compression
+        return None
+
+    @staticmethod
+    def open(file_path: str, compression: Optional[str] = None):
+        """
+        :param file_path: the path to the compressed file
+        :param compression: one of COMPRESSIONS, None means 'derive it from the file name suffix'
+        :return: the DecompressingStream of the file
+        """
+        compression = compression or DecompressingStream.get_compression(file_path)
+        if compression is None:
+            raise ValueError(f"unknown compression of {file_path}")
+        return DecompressingStream(open(file_path, 'rb'), compression)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while len(self.__chunk) == 0:
+            if self.__end_of_stream:
+                return 0
+            chunk = self.__chunks.get()
+            if chunk is None:
+                self.__end_of_stream = True
+            elif isinstance(chunk, BaseException):
+                self.__end_of_stream = True
+                raise chunk
+            else:
+                self.__chunk = memoryview(chunk)
+        size: int = min(len(buffer), len(self.__chunk))
+        buffer[:size] = self.__chunk[:size]
+        self.__chunk = self.__chunk[size:]
+        return size
+
+    def close(self):
+        if not self.closed:
+            self.__stopping.set()
+            while self.__thread.is_alive():  # unblock the background thread if it waits for a free queue slot
+                try:
+                    self.__chunks.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            self.__compressed_stream.close()
+        super().close()
+
+    def __put(self, chunk) -> bool:
+        while not self.__stopping.is_set():
+            try:
+                self.__chunks.put(chunk, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __decompress(self):
+        try:
+            decompressor = self.__create_decompressor(self.__compression)
+            decompressing: bool = False  # whether the decompressor got part of a compressed stream
+            while not self.__stopping.is_set():
+                compressed_chunk: bytes = self.__compressed_stream.read(self.__chunk_size)
+                if not compressed_chunk:
+                    break
+                while compressed_chunk:
+                    decompressed_chunk: bytes = decompressor.decompress(compressed_chunk)
+                    compressed_chunk = b''
+                    decompressing = True
+                    if decompressor.eof:  # continue with the next concatenated compressed stream, if any
+                        compressed_chunk = decompressor.unused_data
+                        decompressor = self.__create_decompressor(self.__compression)
+                        decompressing = False
+                    if decompressed_chunk and not self.__put(decompressed_chunk):
+                        return
+            if decompressing:
+                raise EOFError(f"{self.__compression} compressed stream ended before the end-of-stream marker")
+            self.__put(None)
+        except BaseException as e:
+            self.__put(e)
+
+    @staticmethod
+    def __create_decompressor(compression: str):
+        if compression == 'gzip':
+            return zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+        if compression == 'xz':
+            return lzma.LZMADecompressor()
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("decompressing zstd requires the optional package zstandard, pip install zstandard")
+        return zstandard.ZstdDecompressor().decompressobj()
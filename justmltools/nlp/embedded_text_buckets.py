@@ -0,0 +1,53 @@
+import numpy as np
+from typing import List, Tuple
+
+
+class EmbeddedTextBuckets:
+    """ the embeddings of a batch of texts, grouped into buckets of texts with similar numbers of tokens,
+        as returned by WordEmbedder.embed_texts_by_length.
+
+        Each bucket is embedded with a tight shape, i. e. padded to the number of tokens of its longest text only,
+        instead of to the fixed embedding sequence length. The buckets can be fed to a model one by one,
+        mapping the results back to the texts by the bucket's text indexes, or the embeddings of a single text
+        can be accessed by its index in the original batch.
+    """
+
+    def __init__(self, lengths: np.ndarray, buckets: List[Tuple[np.ndarray, List[np.ndarray]]]):
+        """
+        :param lengths: the number of tokens of each text in the original order
+        :param buckets: the indexes of the bucket's texts in the original batch and their embedded views
+                        in the format of WordEmbedder.embed_token_vectors, for each bucket
+        """
+        self.__lengths: np.ndarray = lengths
+        self.__buckets: List[Tuple[np.ndarray, List[np.ndarray]]] = buckets
+        self.__bucket_of_text = np.zeros(shape=lengths.shape[0], dtype=np.int64)
+        self.__row_of_text = np.zeros(shape=lengths.shape[0], dtype=np.int64)
+        for bucket_index, (text_indexes, _) in enumerate(buckets):
+            self.__bucket_of_text[text_indexes] = bucket_index
+            self.__row_of_text[text_indexes] = np.arange(text_indexes.shape[0])
+
+    def __len__(self) -> int:
+        return self.__lengths.shape[0]
+
+    def __getitem__(self, text_index: int) -> List[np.ndarray]:
+        """
+        :param text_index: the index of the text in the original batch
+        :return: the embedded views of the text, each of shape (number of tokens of the text, embedding_dim)
+        """
+        text_indexes, embedded_views = self.__buckets[self.__bucket_of_text[text_index]]
+        row: int = int(self.__row_of_text[text_index])
+        length: int = int(self.__lengths[text_index])
+        return [embedded_view[row, :length] for embedded_view in embedded_views]
+
+    def get_lengths(self) -> np.ndarray:
+        """
+        :return: the int64 numpy.ndarray of the number of tokens of each text in the original order
+        """
+        return self.__lengths
+
+    def get_buckets(self) -> List[Tuple[np.ndarray, List[np.ndarray]]]:
+        """
+        :return: for each bucket, the int64 numpy.ndarray of the indexes of its texts in the original batch,
+                 and the embedded views of its texts, each of shape (number of texts, bucket length, embedding_dim)
+        """
+        return self.__buckets
@@ -0,0 +1,170 @@
+import threading
+import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from justmltools.nlp.word_embedder import WordEmbedder
+from justmltools.s3.s3_url import S3Url
+
+
+class HotSwapWordEmbedder:
+    """ holds the current WordEmbedder of a running service and replaces it with another one without downtime,
+        e. g. after the embedding file has been updated:
+
+        hot_swap_word_embedder = HotSwapWordEmbedder(WordEmbedder("/models/cc.de.300.vec", cache_dir="/cache"))
+        ...
+        embedded_texts = hot_swap_word_embedder.embed_texts(texts)  # in any number of request threads
+        ...
+        hot_swap_word_embedder.swap_in_background("/models/cc.de.300.v2.vec", cache_dir="/cache")
+
+        swap_in_background loads the new word embedder in a background thread, from a binary cache entry or from S3
+        just like the WordEmbedder constructor, while all calls keep using the current word embedder. Once the new
+        word embedder is loaded, it atomically becomes the current word embedder for all calls starting afterwards,
+        whereas calls in flight finish with the previous one. The holder drops its reference to the previous word
+        embedder once the last of these calls has finished, so that its memory is released unless referenced elsewhere.
+
+        Calls go through the delegating methods (embed_texts, embed_texts_pooled, tokenize_texts_flat) or through
+        acquire for any other method, which keeps the word embedder in use for the duration of the with block.
+        Parsing an embedding file in a background thread competes for the GIL with the request threads, loading from
+        a cache entry or with number_of_load_processes > 1 keeps the background load light.
+    """
+
+    def __init__(self, word_embedder: WordEmbedder):
+        """
+        :param word_embedder: the initial word embedder
+        """
+        self.__lock = threading.Lock()
+        self.__current: Dict[str, Any] = self.__create_generation(word_embedder)
+        self.__retired: List[Dict[str, Any]] = []  # previous generations with calls in flight
+        self.__number_of_swaps: int = 0
+        self.__executor: Optional[ThreadPoolExecutor] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """
+        waits for a load in progress and stops the background thread
+        """
+        with self.__lock:
+            executor, self.__executor = self.__executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def get_word_embedder(self) -> WordEmbedder:
+        """
+        :return: the current word embedder, without keeping it in use, see acquire
+        """
+        return self.__current["word_embedder"]
+
+    @contextmanager
+    def acquire(self) -> Iterator[WordEmbedder]:
+        """
+        keeps the current word embedder in use until the with block exits:
+
+        with hot_swap_word_embedder.acquire() as word_embedder:
+            embedded_texts = word_embedder.embed_texts_by_length(texts)
+
+        :return: a context manager providing the current word embedder
+        """
+        with self.__lock:
+            generation: Dict[str, Any] = self.__current
+            generation["in_flight"] += 1
+        try:
+            yield generation["word_embedder"]
+        finally:
+            with self.__lock:
+                generation["in_flight"] -= 1
+                released: bool = generation is not self.__current and generation["in_flight"] == 0
+                if released:
+                    self.__retired.remove(generation)
+                    generation["word_embedder"] = None
+            if released:
+                generation["released"].set_result(None)
+
+    def embed_texts(self, texts: List[str], context_offsets: Sequence[int] = WordEmbedder.CONTEXT_OFFSETS):
+        """
+        see WordEmbedder.embed_texts
+        """
+        with self.acquire() as word_embedder:
+            return word_embedder.embed_texts(texts, context_offsets=context_offsets)
+
+    def embed_texts_pooled(self, texts: List[str], pooling: str = 'mean', idf_weights: Optional[np.ndarray] = None
+                           ) -> np.ndarray:
+        """
+        see WordEmbedder.embed_texts_pooled, idf_weights computed with a previous word embedder may not fit anymore
+        """
+        with self.acquire() as word_embedder:
+            return word_embedder.embed_texts_pooled(texts, pooling=pooling, idf_weights=idf_weights)
+
+    def tokenize_texts_flat(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        see WordEmbedder.tokenize_texts_flat, tokens of different word embedders are not interchangeable
+        """
+        with self.acquire() as word_embedder:
+            return word_embedder.tokenize_texts_flat(texts)
+
+    def swap(self, word_embedder: WordEmbedder) -> Future:
+        """
+        makes word_embedder the current word embedder for all calls starting from now on
+
+        :param word_embedder: the new word embedder
+        :return: a Future resolved once the calls in flight with the previous word embedder have finished
+                 and the previous word embedder has been released
+        """
+        with self.__lock:
+            previous: Dict[str, Any] = self.__current
+            self.__current = self.__create_generation(word_embedder)
+            self.__number_of_swaps += 1
+            if previous["in_flight"] > 0:
+                self.__retired.append(previous)
+            else:
+                previous["word_embedder"] = None
+        if previous["word_embedder"] is None:
+            previous["released"].set_result(None)
+        print(f"swapped word embedder, {previous['in_flight']} calls in flight with the previous one")
+        return previous["released"]
+
+    def swap_in_background(self, embedding_file_path: Union[str, S3Url], **word_embedder_arguments: Any) -> Future:
+        """
+        loads a new word embedder in a background thread and swaps it in once it is loaded, see swap,
+        loads requested while another load is in progress are carried out one after the other
+
+        :param embedding_file_path: see WordEmbedder, e. g. a new embedding file or the S3Url of one
+        :param word_embedder_arguments: any other arguments of WordEmbedder, e. g. cache_dir
+        :return: a Future resolved with the new word embedder once it is the current word embedder,
+                 or with the exception raised while loading it, in which case the current word embedder stays in use
+        """
+        with self.__lock:
+            if self.__executor is None:
+                self.__executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="word-embedder-load")
+            return self.__executor.submit(self.__load_and_swap, embedding_file_path, word_embedder_arguments)
+
+    def get_statistics(self) -> Dict[str, int]:
+        """
+        :return: a dict with the number of swaps so far, the number of calls in flight with the current word embedder
+                 and the number of previous word embedders and of their calls still in flight
+        """
+        with self.__lock:
+            return {
+                "swaps": self.__number_of_swaps,
+                "in_flight": self.__current["in_flight"],
+                "retired": len(self.__retired),
+                "retired_in_flight": sum(generation["in_flight"] for generation in self.__retired)
+            }
+
+    def __load_and_swap(self, embedding_file_path: Union[str, S3Url], word_embedder_arguments: Dict[str, Any]
+                        ) -> WordEmbedder:
+        word_embedder: WordEmbedder = WordEmbedder(embedding_file_path=embedding_file_path, **word_embedder_arguments)
+        self.swap(word_embedder)
+        return word_embedder
+
+    @staticmethod
+    def __create_generation(word_embedder: WordEmbedder) -> Dict[str, Any]:
+        """
+        :return: the word embedder, the number of its calls in flight and the Future resolved once it is released
+        """
+        return {"word_embedder": word_embedder, "in_flight": 0, "released": Future()}
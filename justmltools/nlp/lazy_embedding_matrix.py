@@ -0,0 +1,205 @@
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from justmltools.nlp.batch_tokenizer import BatchTokenizer
+
+
+class LazyEmbeddingMatrix:
+    """ an embedding matrix of a non-compressed local embedding file in text format (file name suffix '.vec')
+        which parses the vectors of its rows only when they are gathered for the first time.
+
+        scan reads the embedding file once and keeps only the words and the byte offset of each row's line,
+        which only needs to count the separators per line and to tokenize the first token of the line, so a cold
+        start is a fast scan of the file and the memory scales with the vocabulary instead of with the vocabulary
+        times the embedding dimension. take seeks to the lines of the rows not in the row cache, parses them and keeps
+        them in a least recently used cache of at most max_cached_rows rows, e. g. for services which only ever embed
+        a few thousand different words, but need the full vocabulary to recognize them.
+
+        The words and the rows are the same as the ones of loading the file sequentially line by line (see
+        WordEmbedder). It can be used in place of a float32 embedding matrix wherever only take and shape are needed,
+        the embedding file must not change while it is in use.
+    """
+
+    __ROW_OVERHEAD_BYTES: int = 200  # estimated memory of the array object and the dict entry of a cached row
+
+    def __init__(self, embedding_file_path: str, line_offsets: np.ndarray, embedding_dim: int, max_cached_rows: int):
+        """
+        use scan instead of calling this constructor directly
+
+        :param embedding_file_path: the path to the embedding file
+        :param line_offsets: the int64 byte offset of the line of each row, the offset of the zero vector row 0 is -1
+        :param embedding_dim: the number of dimensions of the vectors
+        :param max_cached_rows: the maximum number of parsed rows to keep
+        """
+        if max_cached_rows < 1:
+            raise ValueError(f"max_cached_rows must be positive, got {max_cached_rows}")
+        self.__embedding_file_path: str = embedding_file_path
+        self.__line_offsets: np.ndarray = line_offsets
+        self.__embedding_dim: int = embedding_dim
+        self.__max_cached_rows: int = max_cached_rows
+        self.__rows: 'OrderedDict[int, np.ndarray]' = OrderedDict()
+        self.__hits: int = 0
+        self.__misses: int = 0
+        self.__evictions: int = 0
+        self.__embedding_file = None  # opened on the first miss
+        self.__lock = threading.Lock()
+
+    def __reduce__(self):
+        # the open embedding file and the lock cannot be pickled, the row cache is not worth transferring
+        return LazyEmbeddingMatrix, (self.__embedding_file_path, self.__line_offsets, self.__embedding_dim,
+                                     self.__max_cached_rows)
+
+    @staticmethod
+    def scan(embedding_file_path: str, embedding_limit: Optional[int], filters: str, max_cached_rows: int
+             ) -> Tuple[List[str], 'LazyEmbeddingMatrix']:
+        """
+        :param embedding_file_path: the path to the non-compressed embedding file
+        :param embedding_limit: the maximum number of embeddings to read from the embedding file
+        :param filters: the characters the tokenizer treats as word boundaries
+        :param max_cached_rows: the maximum number of parsed rows to keep
+        :return: the words of the embedding matrix rows 1..n,
+                 the LazyEmbeddingMatrix, row 0 is the zero vector
+        """
+        batch_tokenizer = BatchTokenizer(filters=filters)
+        with open(embedding_file_path, 'rb') as embedding_file:
+            header: bytes = embedding_file.readline()
+            number_of_embeddings, embedding_dim = map(int, header.decode('utf-8').split())
+            if embedding_limit is not None:
+                number_of_embeddings = min(number_of_embeddings, embedding_limit)
+            print(f"scanning up to {number_of_embeddings} word embeddings...")
+            words: List[str] = []
+            line_offsets: List[int] = [-1]  # 0 -> zero vector
+            offset: int = len(header)
+            for line in embedding_file:
+                if len(line_offsets) >= number_of_embeddings:  # reached the limit or end of file
+                    break
+                line_offset: int = offset
+                offset += len(line)
+                # the same checks on the decoded line as WordEmbedder's sequential parsing, e. g. rstrip also strips
+                # non-ASCII whitespace such as non-breaking spaces, so that both accept exactly the same lines
+                text: str = line.decode('utf-8').rstrip()
+                if text.count(' ') != embedding_dim:
+                    print(f"WARN: skipped unexpected line in embedding file: {text}")
+                    continue  # line does not have the expected number of tokens
+                word: str = text[:text.find(' ')]
+                if len(word) > 0:
+                    word_sequence = batch_tokenizer.text_to_word_list(word)
+                    if len(word_sequence) == 1:
+                        words.append(word_sequence[0])
+                        line_offsets.append(line_offset)
+        print(f"scanned {len(words)} word embeddings")
+        return words, LazyEmbeddingMatrix(embedding_file_path, np.asarray(line_offsets, dtype=np.int64),
+                                          embedding_dim, max_cached_rows)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.__line_offsets.shape[0], self.__embedding_dim
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.dtype('float32')
+
+    @property
+    def nbytes(self) -> int:
+        """
+        :return: the bytes of the line offsets plus the budget of the row cache
+        """
+        return self.__line_offsets.nbytes + \
+            self.__max_cached_rows * (self.__embedding_dim * 4 + self.__ROW_OVERHEAD_BYTES)
+
+    def take(self, indices, axis: int = 0, out: Optional[np.ndarray] = None, mode: str = 'raise') -> np.ndarray:
+        """
+        gathers rows like numpy.ndarray.take(indices, axis=0), parsing the rows which are not cached
+
+        :param indices: the int indexes of the rows to gather, any shape
+        :param axis: must be 0
+        :param out: optional float32 array of shape indices.shape + (embedding_dim,) to write the rows to
+        :param mode: see numpy.take
+        :return: float32 numpy.ndarray of shape indices.shape + (embedding_dim,)
+        """
+        if axis != 0:
+            raise ValueError(f"only axis 0 is supported, got {axis}")
+        indices = np.asarray(indices, dtype=np.int64)
+        number_of_rows: int = self.__line_offsets.shape[0]
+        if mode == 'clip':
+            indices = np.clip(indices, 0, number_of_rows - 1)
+        elif mode == 'wrap':
+            indices = np.mod(indices, number_of_rows)
+        elif indices.size > 0 and (indices.min() < -number_of_rows or indices.max() >= number_of_rows):
+            raise IndexError(f"row index out of bounds for {number_of_rows} rows")
+        else:
+            indices = np.mod(indices, number_of_rows)
+        # parse or look up each row only once, however often it occurs
+        unique_indices, inverse = np.unique(indices, return_inverse=True)
+        rows: np.ndarray = self.__get_rows(unique_indices)
+        if out is None:
+            out = np.empty(shape=indices.shape + (self.__embedding_dim,), dtype='float32')
+        np.take(rows, inverse.reshape(indices.shape), axis=0, out=out)
+        return out
+
+    def get_statistics(self) -> Dict[str, int]:
+        """
+        :return: a dict with the number of hits, misses and evictions of the row cache since it was created,
+                 the current number of cached rows and the maximum number of cached rows
+        """
+        with self.__lock:
+            return {
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "evictions": self.__evictions,
+                "rows": len(self.__rows),
+                "max_rows": self.__max_cached_rows
+            }
+
+    def close(self):
+        """
+        closes the embedding file, it is reopened on the next miss
+        """
+        with self.__lock:
+            if self.__embedding_file is not None:
+                self.__embedding_file.close()
+                self.__embedding_file = None
+
+    def __get_rows(self, unique_indices: np.ndarray) -> np.ndarray:
+        """
+        :param unique_indices: the sorted unique indexes of the rows to gather
+        :return: float32 numpy.ndarray of the rows
+        """
+        rows = np.zeros(shape=(unique_indices.shape[0], self.__embedding_dim), dtype='float32')
+        with self.__lock:
+            missing_positions: List[int] = []
+            for position, index in enumerate(unique_indices.tolist()):
+                if index == 0:
+                    continue  # the zero vector
+                row: Optional[np.ndarray] = self.__rows.get(index)
+                if row is None:
+                    missing_positions.append(position)
+                else:
+                    self.__rows.move_to_end(index)
+                    rows[position] = row
+                    self.__hits += 1
+            self.__misses += len(missing_positions)
+            if missing_positions:
+                rows[missing_positions] = self.__parse_rows(unique_indices[missing_positions])
+                for position in missing_positions[-self.__max_cached_rows:]:
+                    self.__rows[int(unique_indices[position])] = rows[position].copy()
+                while len(self.__rows) > self.__max_cached_rows:
+                    self.__rows.popitem(last=False)
+                    self.__evictions += 1
+        return rows
+
+    def __parse_rows(self, indices: np.ndarray) -> np.ndarray:
+        """
+        reads and parses the lines of rows, the caller holds the lock
+
+        :param indices: the ascending indexes of the rows, i. e. in the order of their lines
+        :return: float32 numpy.ndarray of the rows
+        """
+        if self.__embedding_file is None:
+            self.__embedding_file = open(self.__embedding_file_path, 'rb')
+        values: List[str] = []
+        for line_offset in self.__line_offsets[indices].tolist():
+            self.__embedding_file.seek(line_offset)
+            values.extend(self.__embedding_file.readline().decode('utf-8').rstrip().split(' ')[1:])
+        return np.asarray(values, dtype='float32').reshape(indices.shape[0], self.__embedding_dim)
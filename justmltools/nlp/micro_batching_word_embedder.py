@@ -0,0 +1,193 @@
+import asyncio
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from justmltools.nlp.word_embedder import WordEmbedder
+
+
+class MicroBatchingWordEmbedder:
+    """ an asyncio front-end of a WordEmbedder for coroutines which each embed a single text, e. g. web handlers.
+
+        The requests of all coroutines are queued and coalesced into batches, which are tokenized and embedded
+        with the batched numpy code of the WordEmbedder in a worker thread, so the event loop is never blocked.
+        Each caller's future is resolved with its own slice of the batch result.
+
+        A batch is dispatched as soon as it has max_batch_size requests or max_wait_seconds after its first request,
+        whichever comes first. Requests arriving while a batch is processed are queued for the next batch.
+        A larger max_wait_seconds and max_batch_size trade latency at low load for throughput at high load,
+        max_wait_seconds=0 dispatches whatever is queued immediately for the lowest latency:
+
+        async with MicroBatchingWordEmbedder(word_embedder, max_batch_size=64, max_wait_seconds=0.005) as embedder:
+            embedded_text = await embedder.embed_text("some text")
+    """
+
+    def __init__(self, word_embedder: WordEmbedder, max_batch_size: int = 32, max_wait_seconds: float = 0.002):
+        """
+        :param word_embedder: the word embedder to call in the worker thread
+        :param max_batch_size: the maximum number of requests per batch
+        :param max_wait_seconds: the maximum time to wait for more requests after the first request of a batch
+        """
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be positive, got {max_batch_size}")
+        if max_wait_seconds < 0:
+            raise ValueError(f"max_wait_seconds must not be negative, got {max_wait_seconds}")
+        self.__word_embedder: WordEmbedder = word_embedder
+        self.__max_batch_size: int = max_batch_size
+        self.__max_wait_seconds: float = max_wait_seconds
+        self.__queue: Optional[asyncio.Queue] = None
+        self.__batching_task: Optional[asyncio.Task] = None
+        self.__executor: Optional[ThreadPoolExecutor] = None
+        self.__number_of_requests: int = 0
+        self.__number_of_batches: int = 0
+        self.__busy_seconds: float = 0.0
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+        return False
+
+    async def start(self):
+        """
+        starts batching requests, must be called from the event loop the requests are made in
+        """
+        if self.__batching_task is not None:
+            raise ValueError("already started")
+        self.__queue = asyncio.Queue()
+        self.__executor = ThreadPoolExecutor(max_workers=1)
+        self.__batching_task = asyncio.get_running_loop().create_task(self.__batch_requests())
+
+    async def close(self):
+        """
+        processes all requests queued so far and stops batching requests
+        """
+        if self.__batching_task is None:
+            return
+        await self.__queue.put(None)
+        await self.__batching_task
+        self.__executor.shutdown(wait=True)
+        self.__batching_task = None
+
+    async def tokenize_text(self, text: str) -> np.ndarray:
+        """
+        :param text: the text to tokenize
+        :return: the int32 tokens of the text without padding, see WordEmbedder.tokenize_texts_flat
+        """
+        return await self.__request(('tokenize',), text)
+
+    async def embed_text(self, text: str) -> List[np.ndarray]:
+        """
+        :param text: the text to embed
+        :return: the embedded views of the text, see WordEmbedder.embed_texts,
+                 each of shape (embedding_sequence_length, embedding_dim)
+        """
+        return await self.__request(('embed',), text)
+
+    async def embed_text_pooled(self, text: str, pooling: str = 'mean') -> np.ndarray:
+        """
+        :param text: the text to embed
+        :param pooling: one of WordEmbedder.POOLINGS except 'idf_mean'
+        :return: the pooled embedding of the text, see WordEmbedder.embed_texts_pooled
+        """
+        if pooling not in WordEmbedder.POOLINGS or pooling == 'idf_mean':
+            raise ValueError(f"pooling must be one of {WordEmbedder.POOLINGS} except 'idf_mean', got {pooling}")
+        return await self.__request(('pool', pooling), text)
+
+    def get_statistics(self) -> Dict[str, float]:
+        """
+        :return: a dict with the number of requests and batches processed so far, the mean batch size and the
+                 time the worker thread was busy, for tuning max_batch_size and max_wait_seconds
+        """
+        return {
+            "requests": self.__number_of_requests,
+            "batches": self.__number_of_batches,
+            "mean_batch_size": self.__number_of_requests / max(self.__number_of_batches, 1),
+            "busy_seconds": self.__busy_seconds
+        }
+
+    async def __request(self, operation: Tuple[str, ...], text: str) -> Any:
+        if self.__batching_task is None:
+            raise ValueError("not started, call start first or use async with")
+        future = asyncio.get_running_loop().create_future()
+        await self.__queue.put((operation, text, future))
+        return await future
+
+    async def __batch_requests(self):
+        loop = asyncio.get_running_loop()
+        stopping: bool = False
+        while not stopping:
+            request = await self.__queue.get()
+            if request is None:
+                break
+            batch, stopping = await self.__collect_batch(loop, request)
+            await self.__process_batch(loop, batch)
+        while not self.__queue.empty():  # requests queued after close was called
+            request = self.__queue.get_nowait()
+            if request is not None:
+                request[2].set_exception(ValueError("closed"))
+
+    async def __collect_batch(self, loop, request) -> Tuple[list, bool]:
+        """
+        :param loop: the running event loop
+        :param request: the first request of the batch
+        :return: the requests of the batch, whether close was called
+        """
+        batch = [request]
+        deadline: float = loop.time() + self.__max_wait_seconds
+        while len(batch) < self.__max_batch_size:
+            if self.__queue.empty():
+                remaining_seconds: float = deadline - loop.time()
+                if remaining_seconds <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self.__queue.get(), timeout=remaining_seconds)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                request = self.__queue.get_nowait()
+            if request is None:
+                return batch, True
+            batch.append(request)
+        return batch, False
+
+    async def __process_batch(self, loop, batch: List[Tuple[Tuple[str, ...], str, asyncio.Future]]):
+        requests_by_operation: Dict[Tuple[str, ...], List[Tuple[str, asyncio.Future]]] = {}
+        for operation, text, future in batch:
+            if not future.cancelled():
+                requests_by_operation.setdefault(operation, []).append((text, future))
+        for operation, requests in requests_by_operation.items():
+            texts: List[str] = [text for text, _ in requests]
+            try:
+                results = await loop.run_in_executor(self.__executor, self.__run_operation, operation, texts)
+            except Exception as e:
+                results = [e] * len(requests)
+            for (_, future), result in zip(requests, results):
+                if future.cancelled():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+            self.__number_of_requests += len(requests)
+            self.__number_of_batches += 1
+
+    def __run_operation(self, operation: Tuple[str, ...], texts: List[str]) -> list:
+        """
+        runs in the worker thread, splits the batch result into one result per text,
+        each a copy so that a caller keeping its result does not keep the whole batch result alive
+        """
+        start_time: float = time.perf_counter()
+        try:
+            if operation[0] == 'tokenize':
+                tokens, offsets = self.__word_embedder.tokenize_texts_flat(texts)
+                return [tokens[offsets[i]:offsets[i + 1]].copy() for i in range(len(texts))]
+            if operation[0] == 'embed':
+                embedded_views = self.__word_embedder.embed_texts(texts)
+                return [[embedded_view[i].copy() for embedded_view in embedded_views] for i in range(len(texts))]
+            pooled = self.__word_embedder.embed_texts_pooled(texts, pooling=operation[1])
+            return [pooled_text.copy() for pooled_text in pooled]
+        finally:
+            self.__busy_seconds += time.perf_counter() - start_time
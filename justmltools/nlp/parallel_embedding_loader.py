@@ -0,0 +1,151 @@
+import multiprocessing
+import os
+import weakref
+import numpy as np
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+from justmltools.nlp.batch_tokenizer import BatchTokenizer
+from justmltools.nlp.shared_word_embedding import SharedWordEmbedding
+
+
+class ParallelEmbeddingLoader:
+    """ loads an embedding file in text format (file name suffix '.vec') using a pool of processes.
+
+        The file is split into byte ranges aligned to line boundaries, which are parsed in two passes:
+        1. each process collects the words of the lines in its byte range that qualify for the vocabulary,
+           this only needs to count the separators per line and to tokenize the first token of the line
+        2. knowing how many words precede each byte range and where the embedding limit cuts off,
+           each process parses the vectors of its byte range directly into the shared memory of the returned matrix
+
+        The result is the same as loading the file sequentially line by line, i. e. the same words in the same
+        order, skipping lines with an unexpected number of tokens as well as compound words which the tokenizer
+        splits into more than one word, and stopping at the embedding limit.
+    """
+
+    def __init__(self, number_of_processes: Optional[int] = None, chunks_per_process: int = 4):
+        """
+        :param number_of_processes: the number of worker processes, None means 'one per CPU'
+        :param chunks_per_process: the number of byte ranges per process, more ranges balance the load better
+        """
+        self.__number_of_processes: int = number_of_processes or os.cpu_count() or 1
+        self.__chunks_per_process: int = chunks_per_process
+
+    def load(self, embedding_file_path: str, embedding_limit: Optional[int], filters: str
+             ) -> Tuple[List[str], np.ndarray]:
+        """
+        :param embedding_file_path: the path to the embedding file
+        :param embedding_limit: the maximum number of embeddings to read from the embedding file
+        :param filters: the characters the tokenizer treats as word boundaries
+        :return: the words of the embedding matrix rows 1..n,
+                 the embedding matrix numpy array backed by a shared memory block which is released
+                 together with the array, row 0 is the zero vector
+        """
+        with open(embedding_file_path, 'rb') as embedding_file:
+            number_of_embeddings, embedding_dim = map(int, embedding_file.readline().decode('utf-8').split())
+            chunks: List[Tuple[int, int]] = self.__split_into_chunks(embedding_file)
+        if embedding_limit is not None:
+            number_of_embeddings = min(number_of_embeddings, embedding_limit)
+        print(f"loading up to {number_of_embeddings} word embeddings with {self.__number_of_processes} processes...")
+
+        with multiprocessing.get_context().Pool(processes=self.__number_of_processes) as pool:
+            chunk_words: List[List[str]] = pool.starmap(
+                _scan_chunk, [(embedding_file_path, start, end, embedding_dim, filters) for start, end in chunks])
+
+            # cut off the words at the limit, row 0 is reserved for the zero vector
+            words: List[str] = []
+            chunk_tasks = []
+            for (start, end), scanned_words in zip(chunks, chunk_words):
+                number_of_words: int = min(len(scanned_words), max(number_of_embeddings - 1 - len(words), 0))
+                if number_of_words > 0:
+                    chunk_tasks.append((start, end, embedding_dim, filters, len(words) + 1, number_of_words))
+                    words.extend(scanned_words[:number_of_words])
+
+            shm = shared_memory.SharedMemory(create=True, size=max((len(words) + 1) * embedding_dim * 4, 1))
+            try:
+                embedding_matrix = np.ndarray(shape=(len(words) + 1, embedding_dim), dtype='float32', buffer=shm.buf)
+                embedding_matrix[0] = 0  # 0 -> zero vector
+                pool.starmap(_parse_chunk, [(embedding_file_path, shm.name) + task for task in chunk_tasks])
+            except BaseException:
+                embedding_matrix = None
+                shm.close()
+                raise
+            finally:
+                # removes only the name, the block stays mapped until it is closed
+                shm.unlink()
+        # the workers parsed the vectors directly into the returned matrix instead of a copy of it,
+        # views of the matrix keep it alive, so the block is closed when the last of them is garbage collected
+        weakref.finalize(embedding_matrix, shm.close)
+        print(f"loaded {len(words)} word embeddings")
+        return words, embedding_matrix
+
+    def __split_into_chunks(self, embedding_file) -> List[Tuple[int, int]]:
+        """
+        splits the rest of the opened embedding file into byte ranges starting at line boundaries
+        """
+        data_start: int = embedding_file.tell()
+        data_end: int = embedding_file.seek(0, os.SEEK_END)
+        number_of_chunks: int = self.__number_of_processes * self.__chunks_per_process
+        boundaries: List[int] = [data_start]
+        for i in range(1, number_of_chunks):
+            embedding_file.seek(data_start + (data_end - data_start) * i // number_of_chunks)
+            embedding_file.readline()  # skip to the start of the next line
+            boundaries.append(max(embedding_file.tell(), boundaries[-1]))
+        boundaries.append(data_end)
+        return [(start, end) for start, end in zip(boundaries[:-1], boundaries[1:]) if start < end]
+
+
+def _read_chunk_lines(embedding_file_path: str, start: int, end: int) -> List[str]:
+    with open(embedding_file_path, 'rb') as embedding_file:
+        embedding_file.seek(start)
+        lines: List[str] = embedding_file.read(end - start).decode('utf-8').split('\n')
+    if lines[-1] == '':
+        lines.pop()  # the chunk ends with a line break
+    return lines
+
+
+def _iterate_qualifying_lines(lines: List[str], embedding_dim: int, filters: str, warn: bool):
+    """
+    yields the word and the line of each line qualifying for the vocabulary in the same way
+    WordEmbedder's sequential loading does
+    """
+    batch_tokenizer = BatchTokenizer(filters=filters)
+    for line in lines:
+        line = line.rstrip()
+        if line.count(' ') != embedding_dim:
+            if warn:
+                print(f"WARN: skipped unexpected line in embedding file: {line}")
+            continue  # line does not have the expected number of tokens
+        word = line[:line.find(' ')]
+        if len(word) > 0:
+            word_sequence = batch_tokenizer.text_to_word_list(word)
+            if len(word_sequence) == 1:
+                yield word_sequence[0], line
+
+
+def _scan_chunk(embedding_file_path: str, start: int, end: int, embedding_dim: int, filters: str) -> List[str]:
+    """
+    first pass worker: returns the words of the byte range which qualify for the vocabulary
+    """
+    lines: List[str] = _read_chunk_lines(embedding_file_path, start, end)
+    return [word for word, _ in _iterate_qualifying_lines(lines, embedding_dim, filters, warn=True)]
+
+
+def _parse_chunk(embedding_file_path: str, shm_name: str, start: int, end: int, embedding_dim: int, filters: str,
+                 first_row: int, number_of_rows: int):
+    """
+    second pass worker: parses the vectors of the first number_of_rows qualifying lines of the byte range
+    into the shared embedding matrix, starting at first_row
+    """
+    lines: List[str] = _read_chunk_lines(embedding_file_path, start, end)
+    shm = SharedWordEmbedding.open_untracked(shm_name)
+    try:
+        shared_matrix = np.ndarray(shape=(first_row + number_of_rows, embedding_dim), dtype='float32', buffer=shm.buf)
+        row: int = first_row
+        for _, line in _iterate_qualifying_lines(lines, embedding_dim, filters, warn=False):
+            if row >= first_row + number_of_rows:
+                break
+            shared_matrix[row] = np.asarray(line.split(' ')[1:], dtype='float32')
+            row += 1
+        del shared_matrix
+    finally:
+        shm.close()
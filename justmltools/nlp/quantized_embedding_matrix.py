@@ -0,0 +1,136 @@
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+
+class QuantizedEmbeddingMatrix:
+    """ stores an embedding matrix with less memory than float32 and dequantizes only the rows gathered by take.
+
+        Supported storage types are
+        - 'float16': half precision floats, half the memory of float32
+        - 'int8': 8 bit ints with one float32 scale per row, a quarter of the memory of float32 (plus the scales),
+                  each row is scaled to use the full range -127..127 of its largest absolute value
+
+        The all zero row 0 of an embedding matrix stays exactly zero in both storage types.
+        It can be used in place of a float32 embedding matrix wherever only take and shape are needed.
+    """
+
+    DTYPES = ('float16', 'int8')
+
+    __CHUNK_ROWS: int = 65536  # bounds the temporary memory for quantizing and comparing large matrices
+
+    def __init__(self, values: np.ndarray, scales: Optional[np.ndarray] = None):
+        """
+        use quantize instead of calling this constructor directly
+
+        :param values: the quantized float16 or int8 matrix
+        :param scales: the float32 scale of each row, only for int8 values
+        """
+        self.__values: np.ndarray = values
+        self.__scales: Optional[np.ndarray] = scales
+
+    @staticmethod
+    def quantize(embedding_matrix: np.ndarray, dtype: str):
+        """
+        :param embedding_matrix: the float32 embedding matrix to quantize
+        :param dtype: the storage type, one of DTYPES
+        :return: the QuantizedEmbeddingMatrix
+        """
+        if dtype not in QuantizedEmbeddingMatrix.DTYPES:
+            raise ValueError(f"dtype must be one of {QuantizedEmbeddingMatrix.DTYPES}, got {dtype}")
+        if dtype == 'float16':
+            return QuantizedEmbeddingMatrix(values=np.asarray(embedding_matrix, dtype='float16'))
+        values = np.empty(shape=embedding_matrix.shape, dtype='int8')
+        scales = np.empty(shape=embedding_matrix.shape[0], dtype='float32')
+        for start in range(0, embedding_matrix.shape[0], QuantizedEmbeddingMatrix.__CHUNK_ROWS):
+            rows = np.asarray(embedding_matrix[start:start + QuantizedEmbeddingMatrix.__CHUNK_ROWS], dtype='float32')
+            row_scales = np.abs(rows).max(axis=1, initial=0) / 127
+            safe_row_scales = np.where(row_scales > 0, row_scales, 1)[:, np.newaxis]
+            values[start:start + rows.shape[0]] = np.rint(rows / safe_row_scales)
+            scales[start:start + rows.shape[0]] = row_scales
+        return QuantizedEmbeddingMatrix(values=values, scales=scales)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.__values.shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        """
+        :return: the storage type, not the type of the dequantized rows, which is always float32
+        """
+        return self.__values.dtype
+
+    @property
+    def nbytes(self) -> int:
+        return self.__values.nbytes + (0 if self.__scales is None else self.__scales.nbytes)
+
+    def take(self, indices, axis: int = 0, out: Optional[np.ndarray] = None, mode: str = 'raise') -> np.ndarray:
+        """
+        gathers and dequantizes rows like numpy.ndarray.take(indices, axis=0)
+
+        :param indices: the int indexes of the rows to gather, any shape
+        :param axis: must be 0
+        :param out: optional float32 array of shape indices.shape + (embedding_dim,) to write the rows to
+        :param mode: see numpy.take
+        :return: float32 numpy.ndarray of shape indices.shape + (embedding_dim,)
+        """
+        if axis != 0:
+            raise ValueError(f"only axis 0 is supported, got {axis}")
+        values = self.__values.take(indices, axis=0, mode=mode)
+        if out is None:
+            out = np.empty(shape=values.shape, dtype='float32')
+        if self.__scales is None:
+            np.copyto(out, values)
+        else:
+            np.multiply(values, self.__scales.take(indices, mode=mode)[..., np.newaxis], out=out)
+        return out
+
+    def dequantize(self) -> np.ndarray:
+        """
+        :return: the full float32 embedding matrix
+        """
+        return self.take(np.arange(self.shape[0]))
+
+    def reconstruction_error(self, embedding_matrix: np.ndarray) -> Dict[str, float]:
+        """
+        compares the dequantized rows with the original float32 embedding matrix
+
+        :param embedding_matrix: the float32 embedding matrix this matrix was quantized from
+        :return: a dict with
+                 max_abs_error: the maximum absolute difference of any element,
+                 mean_abs_error: the mean absolute difference of all elements,
+                 relative_rmse: the root mean squared difference relative to the root mean square of the elements,
+                 min_cosine_similarity and mean_cosine_similarity: between original and dequantized non-zero rows,
+                 compression_ratio: the memory of the float32 matrix divided by the memory of this matrix
+        """
+        max_abs_error: float = 0.0
+        abs_error_sum: float = 0.0
+        squared_error_sum: float = 0.0
+        squared_sum: float = 0.0
+        cosine_similarity_sum: float = 0.0
+        min_cosine_similarity: float = 1.0
+        number_of_non_zero_rows: int = 0
+        number_of_rows: int = embedding_matrix.shape[0]
+        for start in range(0, number_of_rows, self.__CHUNK_ROWS):
+            original = np.asarray(embedding_matrix[start:start + self.__CHUNK_ROWS], dtype='float64')
+            restored = self.take(np.arange(start, start + original.shape[0])).astype('float64')
+            errors = np.abs(original - restored)
+            max_abs_error = max(max_abs_error, float(errors.max(initial=0)))
+            abs_error_sum += float(errors.sum())
+            squared_error_sum += float(np.square(errors).sum())
+            squared_sum += float(np.square(original).sum())
+            norms = np.linalg.norm(original, axis=1) * np.linalg.norm(restored, axis=1)
+            non_zero = norms > 0
+            cosine_similarities = (original * restored).sum(axis=1)[non_zero] / norms[non_zero]
+            cosine_similarity_sum += float(cosine_similarities.sum())
+            min_cosine_similarity = min(min_cosine_similarity, float(cosine_similarities.min(initial=1)))
+            number_of_non_zero_rows += int(non_zero.sum())
+        number_of_elements: int = max(embedding_matrix.size, 1)
+        return {
+            "max_abs_error": max_abs_error,
+            "mean_abs_error": abs_error_sum / number_of_elements,
+            "relative_rmse": float(np.sqrt(squared_error_sum / squared_sum)) if squared_sum > 0 else 0.0,
+            "min_cosine_similarity": min_cosine_similarity,
+            "mean_cosine_similarity": cosine_similarity_sum / max(number_of_non_zero_rows, 1),
+            "compression_ratio": embedding_matrix.size * 4 / max(self.nbytes, 1)
+        }
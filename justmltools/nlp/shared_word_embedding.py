@@ -0,0 +1,217 @@
+import json
+import multiprocessing
+import os
+import struct
+import sys
+import weakref
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional, Set
+from justmltools.nlp.compact_word_vocabulary import CompactWordVocabulary
+
+
+class SharedWordEmbedding:
+    """ holds the words and the embedding matrix of a WordEmbedder in a named shared memory block,
+        so that any number of processes on the same host can use one copy of the embedding data.
+
+        One process publishes the embedding data, all other processes attach to it by name (read-only).
+        The publishing process owns the shared memory block and has to unlink it when it is no longer needed,
+        attaching processes only close their own mapping of it:
+
+        with word_embedder.publish_to_shared_memory(name="embeddings_de") as shared_word_embedding:
+            ...  # start worker processes calling WordEmbedder.attach_to_shared_memory(name="embeddings_de")
+
+        Memory layout of the shared memory block:
+        - a fixed size header of four unsigned 64 bit ints:
+          number of words, embedding dim, byte size of the metadata, byte size of the vocabulary
+        - metadata as UTF-8 encoded JSON
+        - the words of the embedding matrix rows 1..n as UTF-8 text, one word per line
+        - the float32 embedding matrix, row 0 is the zero vector, aligned to 64 bytes
+        - the arrays of the CompactWordVocabulary of the words, each aligned to 64 bytes,
+          their offsets relative to the end of the embedding matrix, dtypes and lengths are stored in the metadata
+    """
+
+    __HEADER_FORMAT: str = '<QQQQ'
+    __MATRIX_ALIGNMENT: int = 64
+    __published_names: Set[str] = set()  # the blocks published by this process, see open_untracked
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        """
+        use publish or attach instead of calling this constructor directly
+        """
+        self.__shm: shared_memory.SharedMemory = shm
+        self.__owner: bool = owner
+        number_of_words, embedding_dim, metadata_size, vocab_size = \
+            struct.unpack_from(self.__HEADER_FORMAT, shm.buf, 0)
+        metadata_offset: int = struct.calcsize(self.__HEADER_FORMAT)
+        vocab_offset: int = metadata_offset + metadata_size
+        matrix_offset: int = self.__align(vocab_offset + vocab_size)
+        self.__metadata = json.loads(bytes(shm.buf[metadata_offset:vocab_offset]).decode('utf-8'))
+        self.__number_of_words: int = number_of_words
+        self.__vocab_offset: int = vocab_offset
+        self.__vocab_size: int = vocab_size
+        # all arrays handed out are views of this one array, so the finalizer closes the mapping only
+        # after the last of them is garbage collected, closing it earlier would crash on accessing them
+        self.__block = np.ndarray(shape=(shm.size,), dtype=np.uint8, buffer=shm.buf)
+        weakref.finalize(self.__block, shm.close)
+        matrix_end: int = matrix_offset + (number_of_words + 1) * embedding_dim * 4
+        self.__embedding_matrix = self.__block[matrix_offset:matrix_end].view('float32').reshape(-1, embedding_dim)
+        self.__vocabulary_arrays_offset: int = matrix_offset + self.__embedding_matrix.nbytes
+        if not owner:
+            self.__embedding_matrix.setflags(write=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        if self.__owner:
+            self.unlink()
+        return False
+
+    @staticmethod
+    def publish(words: List[str],
+                embedding_matrix: np.ndarray,
+                almost_only_lower_case_words: bool,
+                filters: str,
+                name: Optional[str] = None,
+                vocabulary: Optional[CompactWordVocabulary] = None):
+        """
+        creates a new shared memory block and copies the embedding data into it
+
+        :param words: the words of the embedding matrix rows 1..n
+        :param embedding_matrix: the embedding matrix, row 0 is the zero vector
+        :param almost_only_lower_case_words: whether the words are (almost) only lower case words
+        :param filters: the characters the tokenizer treats as word boundaries
+        :param name: the name of the shared memory block, None means 'generate a unique name'
+        :param vocabulary: the CompactWordVocabulary of the words, None means 'build it from the words'
+        :return: the owning SharedWordEmbedding
+        """
+        if embedding_matrix.shape[0] != len(words) + 1:
+            raise ValueError(f"embedding matrix has {embedding_matrix.shape[0]} rows, expected {len(words) + 1}")
+        if vocabulary is None:
+            vocabulary = CompactWordVocabulary.build(words)
+        vocabulary_arrays: Dict[str, np.ndarray] = vocabulary.to_arrays()
+        vocabulary_layout: Dict[str, list] = {}
+        vocabulary_size: int = 0
+        for array_name, array in vocabulary_arrays.items():
+            vocabulary_layout[array_name] = [vocabulary_size, array.dtype.str, array.shape[0]]
+            vocabulary_size = SharedWordEmbedding.__align(vocabulary_size + array.nbytes)
+        metadata: bytes = json.dumps({
+            "almost_only_lower_case_words": almost_only_lower_case_words,
+            "filters": filters,
+            "vocabulary_layout": vocabulary_layout
+        }).encode('utf-8')
+        vocab: bytes = '\n'.join(words).encode('utf-8')
+        header_size: int = struct.calcsize(SharedWordEmbedding.__HEADER_FORMAT)
+        matrix_offset: int = SharedWordEmbedding.__align(header_size + len(metadata) + len(vocab))
+        vocabulary_offset: int = SharedWordEmbedding.__align(matrix_offset + embedding_matrix.size * 4)
+        shm = shared_memory.SharedMemory(
+            name=name, create=True, size=vocabulary_offset + vocabulary_size)
+        struct.pack_into(SharedWordEmbedding.__HEADER_FORMAT, shm.buf, 0,
+                         len(words), embedding_matrix.shape[1], len(metadata), len(vocab))
+        shm.buf[header_size:header_size + len(metadata)] = metadata
+        shm.buf[header_size + len(metadata):header_size + len(metadata) + len(vocab)] = vocab
+        SharedWordEmbedding.__published_names.add(shm.name)
+        shared_word_embedding = SharedWordEmbedding(shm, owner=True)
+        shared_word_embedding.__embedding_matrix[:] = embedding_matrix
+        for array_name, shared_array in shared_word_embedding.__get_vocabulary_arrays().items():
+            shared_array[:] = vocabulary_arrays[array_name]
+        print(f"published {len(words)} word embeddings to shared memory {shm.name}")
+        return shared_word_embedding
+
+    @staticmethod
+    def attach(name: str):
+        """
+        attaches to a shared memory block created by publish in this or another process
+
+        :param name: the name of the shared memory block
+        :return: a non-owning SharedWordEmbedding with a read-only embedding matrix
+        """
+        shm = SharedWordEmbedding.open_untracked(name)
+        return SharedWordEmbedding(shm, owner=False)
+
+    @staticmethod
+    def open_untracked(name: str) -> shared_memory.SharedMemory:
+        """
+        opens an existing shared memory block without leaving it registered with this process' resource tracker,
+        otherwise the resource tracker would destroy the block when the attaching process terminates
+
+        :param name: the name of the shared memory block
+        :return: the attached shared memory block, to be closed but not unlinked by the caller
+        """
+        if sys.version_info >= (3, 13):
+            return shared_memory.SharedMemory(name=name, track=False)
+        shm = shared_memory.SharedMemory(name=name)
+        # the resource tracker keeps a set of names per tracker process, and processes started by multiprocessing
+        # share the tracker of their parent, so unregistering the block there would also remove the registration
+        # of the publishing parent. These processes leave the block registered, i. e. a worker attaching to a block
+        # published by an unrelated process makes the tracker of its parent destroy the block when it terminates.
+        if os.name == 'posix' and shm.name not in SharedWordEmbedding.__published_names \
+                and multiprocessing.parent_process() is None:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+    def get_name(self) -> str:
+        return self.__shm.name
+
+    def get_words(self) -> List[str]:
+        """
+        :return: the words of the embedding matrix rows 1..n
+        """
+        if self.__number_of_words == 0:
+            return []
+        vocab: bytes = bytes(self.__shm.buf[self.__vocab_offset:self.__vocab_offset + self.__vocab_size])
+        return vocab.decode('utf-8').split('\n')
+
+    def get_vocabulary(self) -> CompactWordVocabulary:
+        """
+        :return: the CompactWordVocabulary of the words backed by the shared memory block,
+                 the same as CompactWordVocabulary.build(get_words()) but without building and copying it
+        """
+        arrays: Dict[str, np.ndarray] = self.__get_vocabulary_arrays()
+        if not self.__owner:
+            for array in arrays.values():
+                array.setflags(write=False)
+        return CompactWordVocabulary.from_arrays(arrays)
+
+    def get_embedding_matrix(self) -> np.ndarray:
+        """
+        :return: the embedding matrix backed by the shared memory block (read-only unless this is the owner)
+        """
+        return self.__embedding_matrix
+
+    def is_almost_only_lower_case_words(self) -> bool:
+        return self.__metadata["almost_only_lower_case_words"]
+
+    def get_filters(self) -> str:
+        return self.__metadata["filters"]
+
+    def close(self):
+        """
+        closes this process' mapping of the shared memory block as soon as the embedding matrix, the vocabulary
+        and all views of them, e. g. of a WordEmbedder attached to it, are garbage collected
+        """
+        self.__embedding_matrix = None
+        self.__block = None
+
+    def unlink(self):
+        """
+        destroys the shared memory block once all processes have closed it, only to be called by the owner
+        """
+        if not self.__owner:
+            raise ValueError(f"only the publishing process may unlink shared memory {self.__shm.name}")
+        self.__shm.unlink()
+
+    def __get_vocabulary_arrays(self) -> Dict[str, np.ndarray]:
+        vocabulary_offset: int = self.__align(self.__vocabulary_arrays_offset)
+        arrays: Dict[str, np.ndarray] = {}
+        for array_name, (array_offset, dtype, length) in self.__metadata["vocabulary_layout"].items():
+            start: int = vocabulary_offset + array_offset
+            arrays[array_name] = self.__block[start:start + length * np.dtype(dtype).itemsize].view(dtype)
+        return arrays
+
+    @staticmethod
+    def __align(offset: int) -> int:
+        alignment: int = SharedWordEmbedding.__MATRIX_ALIGNMENT
+        return (offset + alignment - 1) // alignment * alignment
@@ -0,0 +1,105 @@
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class TextLruCache:
+    """ a thread-safe least recently used cache of numpy arrays computed from texts, e. g. their tokens,
+        bounded by the number of bytes of the cached arrays instead of by the number of entries.
+
+        Entries are keyed by a 128 bit BLAKE2b hash of the text (and an optional namespace, e. g. the pooling),
+        so the cache does not keep the texts themselves alive. The counters of hits, misses and evictions
+        (see get_statistics) help to choose max_bytes for the actual distribution of texts.
+    """
+
+    __ENTRY_OVERHEAD_BYTES: int = 200  # estimated memory of the key, the array object and the dict entry
+
+    def __init__(self, max_bytes: int):
+        """
+        :param max_bytes: the maximum number of bytes of all cached arrays, including an estimated overhead per entry
+        """
+        if max_bytes < 1:
+            raise ValueError(f"max_bytes must be positive, got {max_bytes}")
+        self.__max_bytes: int = max_bytes
+        self.__entries: 'OrderedDict[bytes, np.ndarray]' = OrderedDict()
+        self.__bytes: int = 0
+        self.__hits: int = 0
+        self.__misses: int = 0
+        self.__evictions: int = 0
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def get(self, text: str, namespace: str = '') -> Optional[np.ndarray]:
+        """
+        :param text: the text to look up
+        :param namespace: distinguishes different kinds of arrays computed from the same text
+        :return: the read-only array cached for the text or None
+        """
+        key: bytes = self.__key(text, namespace)
+        with self.__lock:
+            value: Optional[np.ndarray] = self.__entries.get(key)
+            if value is None:
+                self.__misses += 1
+                return None
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+            return value
+
+    def put(self, text: str, value: np.ndarray, namespace: str = ''):
+        """
+        caches an array for a text, evicting least recently used entries if max_bytes would be exceeded,
+        arrays larger than max_bytes are not cached at all
+
+        :param text: the text the array was computed from
+        :param value: the array, it is made read-only and must not be changed by the caller afterwards
+        :param namespace: distinguishes different kinds of arrays computed from the same text
+        """
+        entry_bytes: int = value.nbytes + self.__ENTRY_OVERHEAD_BYTES
+        if entry_bytes > self.__max_bytes:
+            return
+        value.setflags(write=False)
+        key: bytes = self.__key(text, namespace)
+        with self.__lock:
+            previous_value: Optional[np.ndarray] = self.__entries.pop(key, None)
+            if previous_value is not None:
+                self.__bytes -= previous_value.nbytes + self.__ENTRY_OVERHEAD_BYTES
+            while self.__bytes + entry_bytes > self.__max_bytes:
+                _, evicted_value = self.__entries.popitem(last=False)
+                self.__bytes -= evicted_value.nbytes + self.__ENTRY_OVERHEAD_BYTES
+                self.__evictions += 1
+            self.__entries[key] = value
+            self.__bytes += entry_bytes
+
+    def clear(self):
+        """
+        removes all entries, the counters are kept
+        """
+        with self.__lock:
+            self.__entries.clear()
+            self.__bytes = 0
+
+    def get_statistics(self) -> Dict[str, int]:
+        """
+        :return: a dict with the number of hits, misses and evictions since the cache was created,
+                 the current number of entries and bytes and the maximum number of bytes
+        """
+        with self.__lock:
+            return {
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "evictions": self.__evictions,
+                "entries": len(self.__entries),
+                "bytes": self.__bytes,
+                "max_bytes": self.__max_bytes
+            }
+
+    @staticmethod
+    def __key(text: str, namespace: str) -> bytes:
+        text_hash = hashlib.blake2b(namespace.encode('utf-8'), digest_size=16)
+        text_hash.update(b'\0')
+        text_hash.update(text.encode('utf-8', errors='surrogatepass'))
+        return text_hash.digest()
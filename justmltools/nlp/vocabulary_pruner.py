@@ -0,0 +1,91 @@
+import itertools
+import numpy as np
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from justmltools.nlp.word_embedder import WordEmbedder
+
+
+class VocabularyPruner:
+    """ reduces the vocabulary of a word embedder to the words a corpus actually uses,
+        which shrinks the memory and the load time of word embedders for models trained on the corpus:
+
+        vocabulary_pruner = VocabularyPruner(word_embedder)
+        vocabulary_pruner.count(training_texts)
+        pruned_word_embedder, report = vocabulary_pruner.prune(number_of_fallback_words=10000)
+        pruned_word_embedder.export("/models/embedding_pruned.vec", cache_dir="/models/cache")
+
+        The words of the corpus are counted with the word embedder's own tokenizer, so words unknown to
+        the word embedder are not counted. Besides the observed words, the most frequent words of the embedding
+        file are kept as fallback for words which are rare in the corpus, but may occur in texts to embed later.
+        Embedding files like the ones from https://fasttext.cc are sorted by descending word frequency,
+        so the most frequent words are the ones with the lowest word indexes.
+    """
+
+    def __init__(self, word_embedder: WordEmbedder):
+        """
+        :param word_embedder: the word embedder to prune
+        """
+        self.__word_embedder: WordEmbedder = word_embedder
+        self.__token_counts = np.zeros(shape=word_embedder.vocabulary_size() + 1, dtype=np.int64)
+
+    def count(self, texts: Iterable[str], batch_size: int = 1000):
+        """
+        counts the words of the texts, can be called multiple times to count a corpus piece by piece
+
+        :param texts: any iterable of texts, it is consumed lazily batch by batch
+        :param batch_size: the number of texts to tokenize at once
+        """
+        text_iterator: Iterator[str] = iter(texts)
+        while True:
+            batch: List[str] = list(itertools.islice(text_iterator, batch_size))
+            if not batch:
+                break
+            tokens, _ = self.__word_embedder.tokenize_texts_flat(batch)
+            self.__token_counts += np.bincount(tokens, minlength=self.__token_counts.shape[0])
+
+    def get_token_counts(self) -> np.ndarray:
+        """
+        :return: the int64 numpy.ndarray of the number of occurrences of each token (word index) counted so far
+        """
+        return self.__token_counts
+
+    def prune(self,
+              number_of_fallback_words: int = 0,
+              min_count: int = 1,
+              max_observed_words: Optional[int] = None) -> Tuple[WordEmbedder, Dict[str, float]]:
+        """
+        creates a word embedder with only the observed words and the fallback words, see WordEmbedder.select_words
+
+        :param number_of_fallback_words: the number of most frequent words of the embedding file to keep in any case
+        :param min_count: the minimum number of occurrences of an observed word to keep it
+        :param max_observed_words: the maximum number of observed words to keep, the most frequent ones in the corpus,
+                                   None means 'no limit'
+        :return: the pruned word embedder,
+                 a report with the number of words of the original and the pruned word embedder ("words",
+                 "kept_words"), the number of different observed words and how many of them are kept ("observed_words",
+                 "kept_observed_words"), the number of counted tokens and how many of them are kept ("tokens",
+                 "kept_tokens") and the fraction of the counted tokens which the pruned word embedder does not know
+                 anymore ("token_coverage_lost")
+        """
+        token_counts = self.__token_counts.copy()
+        token_counts[0] = 0
+        observed_word_indexes = np.nonzero(token_counts >= max(min_count, 1))[0]
+        if max_observed_words is not None and observed_word_indexes.shape[0] > max_observed_words:
+            # the most frequent ones, preferring the more frequent words of the embedding file for equal counts
+            order = np.lexsort((observed_word_indexes, -token_counts[observed_word_indexes]))
+            observed_word_indexes = observed_word_indexes[order[:max_observed_words]]
+        fallback_word_indexes = np.arange(1, min(number_of_fallback_words, self.__word_embedder.vocabulary_size()) + 1)
+        kept_word_indexes = np.union1d(observed_word_indexes, fallback_word_indexes)
+
+        number_of_tokens: int = int(token_counts.sum())
+        number_of_kept_tokens: int = int(token_counts[kept_word_indexes].sum())
+        report: Dict[str, float] = {
+            "words": self.__word_embedder.vocabulary_size(),
+            "kept_words": int(kept_word_indexes.shape[0]),
+            "observed_words": int(np.count_nonzero(token_counts)),
+            "kept_observed_words": int(np.count_nonzero(token_counts[kept_word_indexes])),
+            "tokens": number_of_tokens,
+            "kept_tokens": number_of_kept_tokens,
+            "token_coverage_lost": 1 - number_of_kept_tokens / number_of_tokens if number_of_tokens > 0 else 0.0
+        }
+        print(f"pruned vocabulary: {report}")
+        return self.__word_embedder.select_words(kept_word_indexes), report
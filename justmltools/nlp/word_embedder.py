@@ -1,7 +1,26 @@
 import io
+import itertools
+import sys
+import time
 import numpy as np
-import six
-from typing import Dict, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from justmltools.nlp.batch_tokenizer import BatchTokenizer, DEFAULT_FILTERS
+from justmltools.nlp.compact_word_vocabulary import CompactWordVocabulary
+from justmltools.nlp.decompressing_stream import DecompressingStream
+from justmltools.nlp.embedded_text_buckets import EmbeddedTextBuckets
+from justmltools.nlp.lazy_embedding_matrix import LazyEmbeddingMatrix
+from justmltools.nlp.parallel_embedding_loader import ParallelEmbeddingLoader
+from justmltools.nlp.quantized_embedding_matrix import QuantizedEmbeddingMatrix
+from justmltools.nlp.shared_word_embedding import SharedWordEmbedding
+from justmltools.nlp.text_lru_cache import TextLruCache
+from justmltools.nlp.word_embedder_metrics import WordEmbedderMetrics
+from justmltools.nlp.word_embedding_cache import WordEmbeddingCache
+from justmltools.nlp.word_similarity_index import WordSimilarityIndex
+from justmltools.s3.aws_credentials import AwsCredentials
+from justmltools.s3.s3_bucket_object_downloader import S3BucketObjectDownloader
+from justmltools.s3.s3_object_stream import S3ObjectStream
+from justmltools.s3.s3_url import S3Url
 
 
 class WordEmbedder:
@@ -15,31 +34,251 @@ class WordEmbedder:
         around a larger number of models at the same time.
     """
 
+    POOLINGS = ('mean', 'max', 'sum', 'idf_mean')
+    CONTEXT_OFFSETS = (0, -1, 1)  # the text, its left context and its right context
+
     def __init__(self,
-                 embedding_file_path: str,
+                 embedding_file_path: Union[str, S3Url],
                  embedding_limit: Optional[int] = None,
-                 embedding_sequence_length: int = 3000
+                 embedding_sequence_length: int = 3000,
+                 cache_dir: Optional[str] = None,
+                 filters: str = DEFAULT_FILTERS,
+                 number_of_load_processes: int = 1,
+                 embedding_dtype: str = 'float32',
+                 compact_vocabulary: bool = False,
+                 token_cache_bytes: int = 0,
+                 pooled_cache_bytes: int = 0,
+                 aws_credentials: Optional[AwsCredentials] = None,
+                 metrics: Optional[WordEmbedderMetrics] = None,
+                 byte_level_tokenization: bool = False,
+                 lazy_cached_rows: int = 0
                  ):
         """
         :param embedding_file_path:
-            absolute file system path to a non-compressed embedding data file from
+            absolute file system path to an embedding data file from
             https://fasttext.cc/docs/en/crawl-vectors.html
-            in text format (file name suffix '.vec')
+            in text format (file name suffix '.vec'), either non-compressed or compressed with
+            gzip (suffix '.vec.gz'), xz (suffix '.vec.xz') or zstd (suffix '.vec.zst', requires zstandard),
+            compressed files are decompressed in a background thread while parsing, see DecompressingStream,
+            or the S3Url of such a file, which is streamed from S3 with parallel ranged GETs while decompressing
+            and parsing it (see S3ObjectStream) without being stored locally
         :param embedding_limit:
             the maximum number of word embeddings to read and use from embedding_path, None means 'no limit'
         :param embedding_sequence_length:
             the fixed number of word vectors to return for a given input text,
             if the input text has more words, excess words will be truncated at the end,
             if the input text has fewer words, zero vectors will be padded at the end
+        :param cache_dir:
+            optional directory for a compiled binary copy of the loaded embeddings (see WordEmbeddingCache),
+            if given, the embedding file is only parsed if there is no up-to-date cache entry yet,
+            and the embedding matrix is memory mapped from the cache entry instead of being held in private memory
+        :param filters:
+            the characters to treat as word boundaries in addition to whitespace when splitting texts into words
+        :param number_of_load_processes:
+            the number of processes parsing the embedding file in parallel (see ParallelEmbeddingLoader),
+            1 means 'parse sequentially in this process', compressed embedding files and embedding files in S3
+            are always parsed sequentially because they cannot be split into byte ranges
+        :param embedding_dtype:
+            the type to store the embedding matrix with, 'float32' or one of QuantizedEmbeddingMatrix.DTYPES,
+            i. e. 'float16' for half the memory or 'int8' for a quarter of the memory of 'float32',
+            embeddings are always returned as float32, see quantization_error for the precision lost
+        :param compact_vocabulary:
+            whether to map words to word indexes with a CompactWordVocabulary instead of a dict,
+            which takes a fraction of the memory and looks up the words of a batch of texts all at once,
+            with cache_dir, the compact vocabulary is memory mapped from the cache entry
+        :param token_cache_bytes:
+            the memory budget of a least recently used cache of the tokens of texts (see TextLruCache),
+            which saves tokenizing the same texts again and again, 0 means 'no cache'
+        :param pooled_cache_bytes:
+            the memory budget of a least recently used cache of the results of embed_texts_pooled for pooling
+            'mean', 'max' and 'sum', 0 means 'no cache'
+        :param aws_credentials:
+            the credentials for getting an embedding file from S3, None means 'the default credentials'
+        :param metrics:
+            optional registry to report the load timings and the timings and counters of all later calls to,
+            see set_metrics
+        :param byte_level_tokenization:
+            whether to tokenize the UTF-8 bytes of whole batches of texts with numpy operations instead of splitting
+            each text into Python strings (see BatchTokenizer), which gives the same tokens faster,
+            requires compact_vocabulary and ASCII filters
+        :param lazy_cached_rows:
+            the maximum number of word vectors to keep parsed for lazy loading (see LazyEmbeddingMatrix), i. e. only the
+            words and the byte offsets of their lines are read at startup and the vectors are parsed on first use,
+            e. g. for services which only ever embed a few thousand different words,
+            0 means 'parse all vectors at startup', requires a non-compressed local embedding file,
+            no cache_dir and embedding_dtype 'float32'
         """
-        self.__embedding_sequence_length: int = embedding_sequence_length
-        self.__word_2_index_dict, self.__embedding_matrix, almost_only_lower_case_words = \
-            self.__create_word_index_dict_and_embedding_matrix(embedding_file_path, embedding_limit)
-        self.__convert_texts_to_lower_case = almost_only_lower_case_words
-        if self.__convert_texts_to_lower_case:
-            print("will convert all input texts to lower case before looking up their word embeddings")
-        self.__embedding_dim: int = self.__embedding_matrix.shape[1]
-        self.__zero_embedding_vector = np.zeros(shape=self.__embedding_dim, dtype='float32')
+        if lazy_cached_rows and (cache_dir is not None or embedding_dtype != 'float32'
+                                 or isinstance(embedding_file_path, S3Url)
+                                 or DecompressingStream.get_compression(embedding_file_path) is not None):
+            raise ValueError("lazy_cached_rows requires a non-compressed local embedding file, "
+                             "no cache_dir and embedding_dtype 'float32'")
+        load_start: float = time.perf_counter()
+        self.__load_phase_seconds: Optional[Dict[str, float]] = {} if metrics is not None else None
+        words, embedding_matrix, almost_only_lower_case_words, cache_entry_path = \
+            self.__load_words_and_embedding_matrix(embedding_file_path, embedding_limit, cache_dir, filters,
+                                                   number_of_load_processes, compact_vocabulary, aws_credentials,
+                                                   lazy_cached_rows)
+        self.__setup(words, embedding_matrix, almost_only_lower_case_words, embedding_sequence_length, filters,
+                     compact_vocabulary, token_cache_bytes, pooled_cache_bytes, byte_level_tokenization)
+        if embedding_dtype != 'float32':
+            quantize_start: float = time.perf_counter()
+            self.__quantize_embedding_matrix(embedding_dtype)
+            if metrics is not None:
+                self.__load_phase_seconds["quantize_seconds"] = time.perf_counter() - quantize_start
+        if metrics is not None:
+            self.__metrics = metrics
+            metrics.record("load", dict(seconds=time.perf_counter() - load_start,
+                                        words=self.vocabulary_size(), **self.__load_phase_seconds))
+        if cache_entry_path is not None:
+            self.__reference = (WordEmbedder.open_cache_entry, (
+                cache_entry_path, embedding_sequence_length, embedding_dtype, compact_vocabulary,
+                token_cache_bytes, pooled_cache_bytes, byte_level_tokenization))
+
+    @staticmethod
+    def attach_to_shared_memory(name: str,
+                                embedding_sequence_length: int = 3000,
+                                compact_vocabulary: bool = False,
+                                token_cache_bytes: int = 0,
+                                pooled_cache_bytes: int = 0,
+                                byte_level_tokenization: bool = False):
+        """
+        creates a word embedder using the embedding data another process has published to shared memory
+        by calling publish_to_shared_memory, without loading the embedding file and without a private copy
+        of the embedding matrix. The shared memory stays mapped as long as the returned word embedder exists.
+
+        :param name: the name of the shared memory block
+        :param embedding_sequence_length: see constructor
+        :param compact_vocabulary: see constructor, the compact vocabulary is used from the shared memory block
+        :param token_cache_bytes: see constructor
+        :param pooled_cache_bytes: see constructor
+        :param byte_level_tokenization: see constructor
+        :return: the word embedder
+        """
+        shared_word_embedding: SharedWordEmbedding = SharedWordEmbedding.attach(name=name)
+        word_embedder: WordEmbedder = WordEmbedder.__new__(WordEmbedder)
+        word_embedder.__setup(
+            words=shared_word_embedding.get_vocabulary() if compact_vocabulary else shared_word_embedding.get_words(),
+            embedding_matrix=shared_word_embedding.get_embedding_matrix(),
+            almost_only_lower_case_words=shared_word_embedding.is_almost_only_lower_case_words(),
+            embedding_sequence_length=embedding_sequence_length,
+            filters=shared_word_embedding.get_filters(),
+            token_cache_bytes=token_cache_bytes,
+            pooled_cache_bytes=pooled_cache_bytes,
+            byte_level_tokenization=byte_level_tokenization
+        )
+        word_embedder.__shared_word_embedding = shared_word_embedding
+        word_embedder.__reference = (WordEmbedder.attach_to_shared_memory, (
+            name, embedding_sequence_length, compact_vocabulary, token_cache_bytes, pooled_cache_bytes,
+            byte_level_tokenization))
+        return word_embedder
+
+    @staticmethod
+    def open_cache_entry(cache_entry_path: str,
+                         embedding_sequence_length: int = 3000,
+                         embedding_dtype: str = 'float32',
+                         compact_vocabulary: bool = False,
+                         token_cache_bytes: int = 0,
+                         pooled_cache_bytes: int = 0,
+                         byte_level_tokenization: bool = False):
+        """
+        creates a word embedder from an existing cache entry (see WordEmbeddingCache.get_entry_path), memory mapping
+        its embedding matrix without checking whether the entry is still up-to-date with its embedding file,
+        which is how word embedders loaded with a cache_dir are unpickled (see __reduce_ex__)
+
+        :param cache_entry_path: the path of the cache entry without file name suffix
+        :param embedding_sequence_length: see constructor
+        :param embedding_dtype: see constructor
+        :param compact_vocabulary: see constructor
+        :param token_cache_bytes: see constructor
+        :param pooled_cache_bytes: see constructor
+        :param byte_level_tokenization: see constructor
+        :return: the word embedder
+        """
+        opened = WordEmbeddingCache.open_entry(cache_entry_path, compact_vocabulary)
+        if opened is None:
+            raise FileNotFoundError(f"no word embedding cache entry {cache_entry_path}")
+        words, embedding_matrix, almost_only_lower_case_words, filters = opened
+        word_embedder: WordEmbedder = WordEmbedder.__new__(WordEmbedder)
+        word_embedder.__setup(words, embedding_matrix, almost_only_lower_case_words, embedding_sequence_length, filters,
+                              compact_vocabulary, token_cache_bytes, pooled_cache_bytes, byte_level_tokenization)
+        if embedding_dtype != 'float32':
+            word_embedder.__quantize_embedding_matrix(embedding_dtype)
+        word_embedder.__reference = (WordEmbedder.open_cache_entry, (
+            cache_entry_path, embedding_sequence_length, embedding_dtype, compact_vocabulary,
+            token_cache_bytes, pooled_cache_bytes, byte_level_tokenization))
+        return word_embedder
+
+    def __reduce_ex__(self, protocol):
+        """
+        pickles a word embedder attached to shared memory (see attach_to_shared_memory) or loaded with a cache_dir
+        (see constructor) as a reference to the shared memory block or to the cache entry, so that passing it to
+        worker processes, e. g. of a multiprocessing.Pool or a ProcessPoolExecutor, does not copy the words and the
+        embedding matrix into each worker, the workers reattach to the same shared data instead.
+        The text caches and the similarity index are not transferred, the workers start with empty ones.
+        Any other word embedder is pickled with all of its data.
+
+        To pass a word embedder without cache_dir to workers cheaply, publish it to shared memory and pass the word
+        embedder returned by attach_to_shared_memory, while the publishing SharedWordEmbedding is kept open.
+        The metrics are never transferred, see set_metrics to report the timings and counters of the copy.
+        """
+        if self.__reference is not None:
+            return self.__reference
+        return super().__reduce_ex__(protocol)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """
+        the state of a word embedder pickled with all of its data, without the text caches and the metrics,
+        which hold locks, the text caches are recreated empty with the same budgets when unpickling
+        """
+        state: Dict[str, Any] = self.__dict__.copy()
+        state["_WordEmbedder__token_cache"] = self.__get_cache_bytes(self.__token_cache)
+        state["_WordEmbedder__pooled_cache"] = self.__get_cache_bytes(self.__pooled_cache)
+        state["_WordEmbedder__metrics"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        token_cache_bytes: int = state["_WordEmbedder__token_cache"]
+        pooled_cache_bytes: int = state["_WordEmbedder__pooled_cache"]
+        self.__token_cache = TextLruCache(token_cache_bytes) if token_cache_bytes else None
+        self.__pooled_cache = TextLruCache(pooled_cache_bytes) if pooled_cache_bytes else None
+
+    @staticmethod
+    def __get_cache_bytes(text_cache: Optional[TextLruCache]) -> int:
+        return 0 if text_cache is None else text_cache.get_statistics()["max_bytes"]
+
+    def publish_to_shared_memory(self, name: Optional[str] = None) -> SharedWordEmbedding:
+        """
+        copies the embedding data into a new shared memory block other processes can attach to
+        by calling WordEmbedder.attach_to_shared_memory. The caller owns the shared memory block
+        and has to close and unlink it once it is no longer needed (see SharedWordEmbedding).
+
+        A quantized embedding matrix is published dequantized to float32, a lazily loaded one is parsed completely.
+
+        :param name: the name of the shared memory block, None means 'generate a unique name'
+        :return: the owning SharedWordEmbedding, its get_name() returns the name to pass to other processes
+        """
+        embedding_matrix = self.__embedding_matrix
+        if isinstance(embedding_matrix, QuantizedEmbeddingMatrix):
+            embedding_matrix = embedding_matrix.dequantize()
+        elif isinstance(embedding_matrix, LazyEmbeddingMatrix):
+            embedding_matrix = embedding_matrix.take(np.arange(embedding_matrix.shape[0]), axis=0)
+        return SharedWordEmbedding.publish(
+            words=self.__get_words(),
+            embedding_matrix=embedding_matrix,
+            almost_only_lower_case_words=self.__convert_texts_to_lower_case,
+            filters=self.__filters,
+            name=name,
+            vocabulary=self.__vocabulary if isinstance(self.__vocabulary, CompactWordVocabulary) else None
+        )
+
+    def set_metrics(self, metrics: Optional[WordEmbedderMetrics]):
+        """
+        :param metrics: the registry to report the timings and counters of all later calls to (see
+                        WordEmbedderMetrics), e. g. a registry shared by several word embedders, None disables reporting
+        """
+        self.__metrics = metrics
 
     def embedding_dim(self) -> int:
         """
@@ -47,36 +286,415 @@ class WordEmbedder:
         """
         return self.__embedding_dim
 
-    def embed_texts(self, texts: List[str]):
+    def vocabulary_size(self) -> int:
+        """
+        :return: the number of rows of the embedding matrix except the zero vector row 0,
+                 i. e. the largest token (word index) plus 1 is the number of different tokens including padding
+        """
+        return self.__embedding_matrix.shape[0] - 1
+
+    def select_words(self, word_indexes) -> 'WordEmbedder':
+        """
+        creates a word embedder with only some of the words of this word embedder, e. g. see VocabularyPruner.
+        The selected words keep their order, but get the consecutive word indexes 1..len(word_indexes).
+        All other settings are the same, except that the embedding matrix is always stored as float32
+        and that the text caches are not enabled.
+
+        :param word_indexes: the word indexes (tokens) of the words to keep, in any order, 0 is ignored
+        :return: the new word embedder
+        """
+        word_indexes = np.unique(np.asarray(word_indexes, dtype=np.int64))
+        word_indexes = word_indexes[word_indexes > 0]
+        if word_indexes.size > 0 and word_indexes[-1] > self.vocabulary_size():
+            raise ValueError(f"word indexes must not exceed the vocabulary size {self.vocabulary_size()}")
+        words: List[str] = self.__get_words()
+        word_embedder: WordEmbedder = WordEmbedder.__new__(WordEmbedder)
+        word_embedder.__setup(
+            words=[words[word_index - 1] for word_index in word_indexes.tolist()],
+            embedding_matrix=self.__embedding_matrix.take(np.concatenate([[0], word_indexes]), axis=0),
+            almost_only_lower_case_words=self.__convert_texts_to_lower_case,
+            embedding_sequence_length=self.__embedding_sequence_length,
+            filters=self.__filters,
+            compact_vocabulary=isinstance(self.__vocabulary, CompactWordVocabulary),
+            byte_level_tokenization=self.__byte_level_tokenization
+        )
+        return word_embedder
+
+    def export(self, embedding_file_path: str, cache_dir: Optional[str] = None):
+        """
+        writes the words and the embedding matrix to an embedding file in text format (file name suffix '.vec'),
+        which a new WordEmbedder loads with the same words and vectors, e. g. after select_words.
+        Rows without a word (only possible with a compact vocabulary of an embedding file with duplicate words)
+        are left out.
+
+        :param embedding_file_path: the path of the embedding file to write
+        :param cache_dir: optional cache directory (see constructor) to create the cache entry of the new
+                          embedding file in right away, the cache entry keeps the conversion of texts to lower case
+                          of this word embedder, whereas parsing the embedding file decides it anew by its words
+        """
+        words: List[str] = self.__get_words()
+        row_indexes: List[int] = [index + 1 for index, word in enumerate(words) if word]
+        words = [words[row_index - 1] for row_index in row_indexes]
+        embedding_matrix = self.__embedding_matrix.take(np.asarray([0] + row_indexes, dtype=np.int64), axis=0)
+        with open(embedding_file_path, 'w', encoding='utf-8', newline='\n') as embedding_file:
+            # the number of embeddings counts the zero vector row 0, too, see __parse_embedding_file
+            embedding_file.write(f"{len(words) + 1} {self.__embedding_dim}\n")
+            for word, vector in zip(words, embedding_matrix[1:]):
+                # 9 significant digits restore float32 values exactly
+                embedding_file.write(word + ' ' + ' '.join(['%.9g' % value for value in vector.tolist()]) + '\n')
+        print(f"exported {len(words)} word embeddings to {embedding_file_path}")
+        if cache_dir is not None:
+            WordEmbeddingCache(cache_dir=cache_dir).save(
+                embedding_file_path, None, self.__filters, words, embedding_matrix, self.__convert_texts_to_lower_case)
+
+    def build_similarity_index(self, approximate: bool = False, number_of_clusters: Optional[int] = None
+                               ) -> WordSimilarityIndex:
+        """
+        builds the WordSimilarityIndex most_similar_words searches, replacing a previously built one
+
+        :param approximate: whether to also build the clusters for the approximate search (see
+                            WordSimilarityIndex.build_clusters), which most_similar_words uses if number_of_probes
+                            is given
+        :param number_of_clusters: see WordSimilarityIndex.build_clusters
+        :return: the similarity index, e. g. for searching the words most similar to any vectors
+        """
+        similarity_index = WordSimilarityIndex(self.__embedding_matrix)
+        if approximate:
+            similarity_index.build_clusters(number_of_clusters=number_of_clusters)
+        self.__similarity_index = similarity_index
+        return similarity_index
+
+    def most_similar_words(self,
+                           words: List[str],
+                           k: int = 10,
+                           number_of_probes: Optional[int] = None) -> List[List[Tuple[str, float]]]:
+        """
+        finds the words with the most similar word embeddings (by cosine similarity) for each of a batch of words,
+        an exact similarity index is built on first use unless build_similarity_index has been called before
+
+        :param words: the words to find similar words for, converted to lower case like texts if applicable
+        :param k: the number of similar words to find per word
+        :param number_of_probes: the number of clusters to search for the approximate search, None means 'exact search',
+                                 see WordSimilarityIndex.search and build_similarity_index
+        :return: for each word, a list of up to k pairs of a similar word and its cosine similarity,
+                 ordered by descending similarity, not including the word itself, empty for unknown words
+        """
+        if self.__similarity_index is None:
+            self.build_similarity_index()
+        if self.__convert_texts_to_lower_case:
+            words = [word.lower() for word in words]
+        word_indexes = np.asarray([self.__vocabulary.get(word, 0) for word in words], dtype=np.int64)
+        known = np.nonzero(word_indexes)[0]
+        similar_words: List[List[Tuple[str, float]]] = [[] for _ in words]
+        if known.size == 0:
+            return similar_words
+        similar_word_indexes, similarities = self.__similarity_index.search(
+            self.__embedding_matrix.take(word_indexes[known], axis=0), k=k + 1, number_of_probes=number_of_probes)
+        for query_index, word_index in enumerate(word_indexes[known].tolist()):
+            similar_words[known[query_index]] = [
+                (self.__get_word(similar_word_index), similarity)
+                for similar_word_index, similarity
+                in zip(similar_word_indexes[query_index].tolist(), similarities[query_index].tolist())
+                if similar_word_index != word_index and similar_word_index != 0
+            ][:k]
+        return similar_words
+
+    def memory_bytes(self) -> int:
+        """
+        :return: the estimated number of bytes of the embedding matrix, the vocabulary and the budgets of the text
+                 caches, including memory mapped or shared data, which is not private to this word embedder
+        """
+        if self.__vocabulary_bytes is None:
+            if isinstance(self.__vocabulary, CompactWordVocabulary):
+                self.__vocabulary_bytes = self.__vocabulary.nbytes
+            else:
+                # the dict, the list of words, the words themselves and the int objects of the word indexes
+                self.__vocabulary_bytes = sys.getsizeof(self.__vocabulary) + sys.getsizeof(self.__words) + \
+                    sum(map(sys.getsizeof, self.__words)) + len(self.__words) * sys.getsizeof(1 << 30)
+        cache_bytes: int = sum(statistics["max_bytes"] for statistics in self.text_cache_statistics().values()
+                               if statistics is not None)
+        return int(self.__embedding_matrix.nbytes) + self.__vocabulary_bytes + cache_bytes
+
+    def quantization_error(self) -> Optional[Dict[str, float]]:
+        """
+        :return: None if the embedding matrix is stored as float32, otherwise the reconstruction error of the
+                 quantized embedding matrix compared to float32 (see QuantizedEmbeddingMatrix.reconstruction_error)
+        """
+        return self.__quantization_error
+
+    def row_cache_statistics(self) -> Optional[Dict[str, int]]:
+        """
+        :return: None unless loaded lazily (see constructor), otherwise the statistics of the cache of parsed
+                 word vectors (see LazyEmbeddingMatrix.get_statistics)
+        """
+        if isinstance(self.__embedding_matrix, LazyEmbeddingMatrix):
+            return self.__embedding_matrix.get_statistics()
+        return None
+
+    def text_cache_statistics(self) -> Dict[str, Optional[Dict[str, int]]]:
+        """
+        :return: a dict with the statistics of the 'token' cache and of the 'pooled' cache
+                 (see TextLruCache.get_statistics), None for a disabled cache
+        """
+        return {
+            "token": None if self.__token_cache is None else self.__token_cache.get_statistics(),
+            "pooled": None if self.__pooled_cache is None else self.__pooled_cache.get_statistics()
+        }
+
+    def embed_texts(self, texts: List[str], context_offsets: Sequence[int] = CONTEXT_OFFSETS):
         """
         returns embeddings of one or more texts.
 
         :param texts: a list of texts to tokenize and embed
+        :param context_offsets: the offsets of the embedded views to return, see embed_token_vectors
         :return: result is a (3, len(texts), embedding_sequence_length, embedding_dim) float32 numpy.ndarray (tensor).
                  result[0] contains all embedded texts.
                  result[1] contains all embedded left contexts, i. e. embedded texts shifted by one word to the right.
                  result[2] contains all embedded right contexts, i. e. embedded words shifted by one word to the left.
+                 With other context_offsets, there is one embedded view per offset instead.
         """
         padded_token_vectors = self.tokenize_texts(texts)
-        embedded_texts = self.embed_token_vectors(padded_token_vectors)
+        embedded_texts = self.embed_token_vectors(padded_token_vectors, context_offsets=context_offsets)
         return embedded_texts
 
+    def embed_texts_in_batches(self,
+                               texts: Iterable[str],
+                               batch_size: int = 32,
+                               reuse_buffer: bool = False,
+                               context_offsets: Sequence[int] = CONTEXT_OFFSETS):
+        """
+        returns a generator of the embeddings of bounded size batches of texts,
+        e. g. for embedding a corpus of any size in constant memory.
+        While the caller consumes the embeddings of one batch, the next batch is tokenized in a background thread.
+
+        :param texts: any iterable of texts to tokenize and embed, it is consumed lazily
+        :param batch_size: the maximum number of texts per batch
+        :param reuse_buffer: whether to write the embeddings of all batches to the same buffer in order to avoid
+                             allocating a new tensor for each batch; the embeddings of a batch are then only valid
+                             until the generator continues with the next batch
+        :param context_offsets: the offsets of the embedded views to return, see embed_token_vectors
+        :return: yields the embeddings of each batch of texts in the same format as embed_texts
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be positive, got {batch_size}")
+        text_iterator: Iterator[str] = iter(texts)
+        left_padding, right_padding = self.__get_context_padding(context_offsets)
+        buffer: Optional[np.ndarray] = None
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            next_token_vectors = executor.submit(self.__tokenize_next_batch, text_iterator, batch_size)
+            while True:
+                token_vectors = next_token_vectors.result()
+                if token_vectors.shape[0] == 0:
+                    break
+                next_token_vectors = executor.submit(self.__tokenize_next_batch, text_iterator, batch_size)
+                out: Optional[np.ndarray] = None
+                if reuse_buffer:
+                    if buffer is None:
+                        padded_length: int = left_padding + token_vectors.shape[1] + right_padding
+                        buffer = np.empty(shape=(batch_size, padded_length, self.__embedding_dim), dtype='float32')
+                    out = buffer[:token_vectors.shape[0]]
+                yield self.embed_token_vectors(token_vectors, out=out, context_offsets=context_offsets)
+
+    def embed_texts_by_length(self,
+                              texts: List[str],
+                              bucket_width: Optional[int] = None,
+                              context_offsets: Sequence[int] = CONTEXT_OFFSETS) -> EmbeddedTextBuckets:
+        """
+        returns embeddings of one or more texts with variable lengths instead of the fixed embedding sequence length,
+        which saves gathering and copying the padding of short texts.
+        The texts are sorted by their number of tokens (truncated to the embedding sequence length) and grouped into
+        buckets of similar lengths, each bucket is embedded padded to the number of tokens of its longest text only.
+
+        :param texts: a list of texts to tokenize and embed
+        :param bucket_width: the range of numbers of tokens of the texts of a bucket,
+                             e. g. 32 puts texts with 0..31 tokens into one bucket, 32..63 into the next one etc.,
+                             None means 'one bucket for all texts', i. e. padding to the longest text of the batch
+        :param context_offsets: the offsets of the embedded views to return, see embed_token_vectors
+        :return: the embeddings of the buckets, which also provide the embeddings of each text in the original order
+        """
+        if bucket_width is not None and bucket_width < 1:
+            raise ValueError(f"bucket_width must be positive, got {bucket_width}")
+        tokens, offsets = BatchTokenizer.truncate(
+            *self.tokenize_texts_flat(texts), sequence_length=self.__embedding_sequence_length)
+        lengths = np.diff(offsets)
+        order = np.argsort(lengths, kind='stable')
+        if bucket_width is None:
+            bucket_starts = np.zeros(shape=min(order.shape[0], 1), dtype=np.int64)
+        else:
+            _, bucket_starts = np.unique(lengths[order] // bucket_width, return_index=True)
+        buckets = []
+        for start, end in zip(bucket_starts, list(bucket_starts[1:]) + [order.shape[0]]):
+            text_indexes = order[start:end]
+            bucket_tokens, bucket_offsets = BatchTokenizer.select(tokens, offsets, text_indexes)
+            token_vectors = BatchTokenizer.pad(
+                bucket_tokens, bucket_offsets, sequence_length=int(lengths[text_indexes].max()))
+            buckets.append((text_indexes, self.embed_token_vectors(token_vectors, context_offsets=context_offsets)))
+        return EmbeddedTextBuckets(lengths, buckets)
+
+    def embed_texts_pooled(self,
+                           texts: List[str],
+                           pooling: str = 'mean',
+                           idf_weights: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        returns one pooled embedding vector per text, i. e. the same as pooling result[0] of embed_texts over the
+        positions of each text's words (without its padding), but computed directly from the text's tokens
+        by reducing the gathered word vectors segment by segment, without building the padded sequence tensor.
+
+        :param texts: a list of texts to tokenize and embed
+        :param pooling: one of POOLINGS,
+                        'mean', 'max' or 'sum' of the text's word vectors,
+                        'idf_mean' for the mean of the text's word vectors weighted by idf_weights
+        :param idf_weights: a float numpy.ndarray with one weight per token, e. g. from compute_idf_weights,
+                            only used and required for pooling 'idf_mean'
+        :return: a (len(texts), embedding_dim) float32 numpy.ndarray, texts without known words get the zero vector
+        """
+        if pooling not in self.POOLINGS:
+            raise ValueError(f"pooling must be one of {self.POOLINGS}, got {pooling}")
+        if pooling == 'idf_mean' and idf_weights is None:
+            raise ValueError("pooling 'idf_mean' requires idf_weights")
+        if self.__pooled_cache is None or pooling == 'idf_mean':  # idf weights may differ from call to call
+            return self.__embed_texts_pooled(texts, pooling, idf_weights)
+
+        texts = list(texts)
+        pooled = np.empty(shape=(len(texts), self.__embedding_dim), dtype='float32')
+        missing_text_indexes: List[int] = []
+        for text_index, text in enumerate(texts):
+            cached_pooled: Optional[np.ndarray] = self.__pooled_cache.get(text, namespace=pooling)
+            if cached_pooled is None:
+                missing_text_indexes.append(text_index)
+            else:
+                pooled[text_index] = cached_pooled
+        if missing_text_indexes:
+            missing_texts: List[str] = [texts[text_index] for text_index in missing_text_indexes]
+            missing_pooled = self.__embed_texts_pooled(missing_texts, pooling, idf_weights)
+            pooled[missing_text_indexes] = missing_pooled
+            for text, pooled_vector in zip(missing_texts, missing_pooled):
+                self.__pooled_cache.put(text, pooled_vector.copy(), namespace=pooling)
+        return pooled
+
+    def __embed_texts_pooled(self, texts: List[str], pooling: str, idf_weights: Optional[np.ndarray]) -> np.ndarray:
+        metrics: Optional[WordEmbedderMetrics] = self.__metrics
+        if metrics is None:
+            return self.__pool_texts(texts, pooling, idf_weights)
+        start: float = time.perf_counter()
+        pooled = self.__pool_texts(texts, pooling, idf_weights)
+        metrics.record("embed_pooled", {"seconds": time.perf_counter() - start, "texts": pooled.shape[0]})
+        return pooled
+
+    def __pool_texts(self, texts: List[str], pooling: str, idf_weights: Optional[np.ndarray]) -> np.ndarray:
+        tokens, offsets = BatchTokenizer.truncate(
+            *self.tokenize_texts_flat(texts), sequence_length=self.__embedding_sequence_length)
+        pooled = np.zeros(shape=(len(offsets) - 1, self.__embedding_dim), dtype='float32')
+        lengths = np.diff(offsets)
+        non_empty = lengths > 0
+        if not non_empty.any():
+            return pooled
+        segment_starts = offsets[:-1][non_empty]  # the non-empty segments cover all tokens
+        word_vectors = self.__embedding_matrix.take(tokens, axis=0)
+        if pooling == 'max':
+            pooled[non_empty] = np.maximum.reduceat(word_vectors, segment_starts, axis=0)
+        elif pooling == 'idf_mean':
+            weights = np.asarray(idf_weights, dtype='float32')[tokens]
+            word_vectors *= weights[:, np.newaxis]
+            weighted_sums = np.add.reduceat(word_vectors, segment_starts, axis=0)
+            weight_sums = np.add.reduceat(weights, segment_starts)[:, np.newaxis]
+            pooled[non_empty] = np.divide(
+                weighted_sums, weight_sums, out=np.zeros_like(weighted_sums), where=weight_sums != 0)
+        else:
+            sums = np.add.reduceat(word_vectors, segment_starts, axis=0)
+            pooled[non_empty] = sums if pooling == 'sum' else sums / lengths[non_empty, np.newaxis]
+        return pooled
+
+    def compute_idf_weights(self, texts: Iterable[str]) -> np.ndarray:
+        """
+        returns the smoothed inverse document frequency idf(t) = ln((1 + n) / (1 + df(t))) + 1 of each token t
+        with respect to a corpus of n texts, with df(t) being the number of texts containing t,
+        for use as idf_weights of embed_texts_pooled
+
+        :param texts: the corpus of texts
+        :return: a float32 numpy.ndarray with one weight per token (word index)
+        """
+        tokens, offsets = self.tokenize_texts_flat(texts)
+        number_of_texts: int = len(offsets) - 1
+        vocabulary_size: int = self.__embedding_matrix.shape[0]
+        text_indexes = np.repeat(np.arange(number_of_texts, dtype=np.int64), np.diff(offsets))
+        unique_text_tokens = np.unique(text_indexes * vocabulary_size + tokens)
+        document_frequencies = np.bincount(unique_text_tokens % vocabulary_size, minlength=vocabulary_size)
+        return (np.log((1 + number_of_texts) / (1 + document_frequencies)) + 1).astype('float32')
+
     def tokenize_texts(self, texts: List[str]):
         """
         returns fixed sized token/word index sequences of one or more texts
         :param texts: the texts to tokenize
         :return: numpy.ndarray of numpy.ndarrays of ints, plug these into embed_token_vectors to get embeddings
         """
-        token_vectors = self.__texts_to_word_index_lists(texts, lower=self.__convert_texts_to_lower_case)
-        padded_token_vectors = self.__pad_sequences(
-            token_vectors, maxlen=self.__embedding_sequence_length, padding='post', truncating='post', value=0)
+        tokens, offsets = self.tokenize_texts_flat(texts)
+        padded_token_vectors = BatchTokenizer.pad(tokens, offsets, sequence_length=self.__embedding_sequence_length)
         return padded_token_vectors
 
-    def embed_token_vector(self, token_vector):
+    def tokenize_texts_flat(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        returns variable sized token/word index sequences of one or more texts in a flat layout (CSR)
+        without padding or truncation, the tokens of texts[i] are tokens[offsets[i]:offsets[i + 1]]
+        :param texts: the texts to tokenize
+        :return: the flat int32 numpy.ndarray of the tokens of all texts,
+                 the int64 numpy.ndarray of the offsets of the texts' first tokens plus the end offset
+        """
+        metrics: Optional[WordEmbedderMetrics] = self.__metrics
+        if metrics is None:
+            return self.__tokenize_texts_flat(texts, statistics=None)
+        start: float = time.perf_counter()
+        statistics: Dict[str, int] = {"words": 0, "tokens": 0}
+        tokens, offsets = self.__tokenize_texts_flat(texts, statistics)
+        seconds: float = time.perf_counter() - start
+        number_of_texts: int = offsets.shape[0] - 1
+        number_of_truncated_texts: int = int(np.count_nonzero(np.diff(offsets) > self.__embedding_sequence_length))
+        number_of_oov_words: int = statistics["words"] - statistics["tokens"]
+        metrics.record("tokenize", {
+            "seconds": seconds,
+            "texts": number_of_texts,
+            "tokens": int(offsets[-1]),
+            "truncated_texts": number_of_truncated_texts,
+            "truncation_rate": number_of_truncated_texts / number_of_texts if number_of_texts else 0.0,
+            "words": statistics["words"],
+            "oov_words": number_of_oov_words,
+            "oov_rate": number_of_oov_words / statistics["words"] if statistics["words"] else 0.0
+        })
+        return tokens, offsets
+
+    def __tokenize_texts_flat(self, texts: List[str], statistics: Optional[Dict[str, int]]
+                              ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        see tokenize_texts_flat, statistics see BatchTokenizer.tokenize
+        """
+        if self.__token_cache is None:
+            return self.__batch_tokenizer.tokenize(texts, self.__vocabulary, statistics)
+
+        texts = list(texts)
+        token_sequences: List[Optional[np.ndarray]] = [self.__token_cache.get(text) for text in texts]
+        missing_texts: Dict[str, List[int]] = {}  # tokenizes repeated texts of the batch only once
+        for text_index, token_sequence in enumerate(token_sequences):
+            if token_sequence is None:
+                missing_texts.setdefault(texts[text_index], []).append(text_index)
+        if missing_texts:
+            tokens, offsets = self.__batch_tokenizer.tokenize(missing_texts.keys(), self.__vocabulary, statistics)
+            for i, (text, text_indexes) in enumerate(missing_texts.items()):
+                token_sequence = tokens[offsets[i]:offsets[i + 1]].copy()  # does not keep all tokens alive
+                self.__token_cache.put(text, token_sequence)
+                for text_index in text_indexes:
+                    token_sequences[text_index] = token_sequence
+        offsets = np.zeros(shape=len(texts) + 1, dtype=np.int64)
+        np.cumsum([token_sequence.shape[0] for token_sequence in token_sequences], out=offsets[1:])
+        if not token_sequences:
+            return np.zeros(shape=0, dtype=np.int32), offsets
+        return np.concatenate(token_sequences), offsets
+
+    def embed_token_vector(self, token_vector, context_offsets: Sequence[int] = CONTEXT_OFFSETS):
         """
         returns embedding of a single token vector. A token is an int index into the embedding matrix.
 
         :param token_vector: numpy.ndarray of tokens
+        :param context_offsets: the offsets of the embedded views to return, see embed_token_vectors
         :return: result is a (3, 1, token_vector.shape[0], embedding_dim) float32 tensor.
                  result[0] contains the embedded text.
                  result[1] contains the embedded left context, i. e. embedded tokens shifted by one token to the right.
@@ -84,239 +702,328 @@ class WordEmbedder:
         """
 
         token_vectors = np.asarray([token_vector])
-        embedded_token_vectors = self.embed_token_vectors(token_vectors)
+        embedded_token_vectors = self.embed_token_vectors(token_vectors, context_offsets=context_offsets)
         return embedded_token_vectors
 
-    def embed_token_vectors(self, token_vectors):
+    def embed_token_vectors(self,
+                            token_vectors,
+                            out: Optional[np.ndarray] = None,
+                            context_offsets: Sequence[int] = CONTEXT_OFFSETS):
         """
         returns embeddings of token vectors. A token is an int index into the embedding matrix.
 
-        :param token_vectors: numpy.ndarray of numpy.ndarrays of tokens
+        All token vectors are embedded with a single gather from the embedding matrix: the token vectors are framed
+        by padding tokens 0 (which map to the zero vector), as many on each side as the largest context offset
+        to that side, so that the gather directly produces the padded embedding tensor all result views are sliced
+        from without copying.
+
+        :param token_vectors: numpy.ndarray of numpy.ndarrays of tokens, IndexError is raised for tokens outside of
+                              0..vocabulary_size()
+        :param out: optional C-contiguous float32 numpy.ndarray of shape (token_vectors.shape[0],
+                    max(0, -min(context_offsets)) + token_vectors.shape[1] + max(0, max(context_offsets)),
+                    embedding_dim), i. e. token_vectors.shape[1] + 2 for the default context_offsets,
+                    to write the embeddings to, e. g. a buffer reused across calls in order to avoid allocating
+                    a new tensor for each call;
+                    the returned views share their memory with out, so they are overwritten by the next call
+        :param context_offsets: the offsets of the embedded views to return, the view for offset k contains at
+                                position i the embedding of the token at position i + k (zero vectors beyond the ends),
+                                e. g. -1 for the left context or range(-3, 4) for a window of 3 tokens on each side
         :return: result is a (3, token_vectors.shape[0], token_vectors.shape[1], embedding_dim) float32 tensor.
                  result[0] contains all embedded texts.
                  result[1] contains all embedded left contexts, i. e. embedded tokens shifted by one token to the right.
                  result[2] contains all embedded right contexts, i. e. embedded tokens shifted by one token to the left.
+                 With other context_offsets, result[j] contains the embedded view for context_offsets[j].
         """
-
+        start: float = time.perf_counter() if self.__metrics is not None else 0.0
+        token_vectors = np.asarray(token_vectors)
         num_words: int = token_vectors.shape[1]  # e.g. 3000
-        embedding_tensor = np.empty(
-            shape=(token_vectors.shape[0], num_words + 2, self.__embedding_dim), dtype='float32')
-        for i, token_vector in enumerate(token_vectors):
-            embedding_tensor[i, 0] = self.__zero_embedding_vector
-            embedding_tensor[i, 1:num_words + 1] = self.__embedding_matrix.take(token_vector, axis=0)
-            embedding_tensor[i, num_words + 1] = self.__zero_embedding_vector
-
-        # slice 3 views from the batch_embedding_tensor
+        left_padding, right_padding = self.__get_context_padding(context_offsets)
+        shape = (token_vectors.shape[0], left_padding + num_words + right_padding, self.__embedding_dim)
+        if out is None:
+            embedding_tensor = np.empty(shape=shape, dtype='float32')
+        elif out.shape != shape or out.dtype != np.float32 or not out.flags.c_contiguous:
+            raise ValueError(f"out must be a C-contiguous float32 array of shape {shape}, "
+                             f"got {out.dtype} array of shape {out.shape}")
+        else:
+            embedding_tensor = out
+
+        if token_vectors.size > 0 and (token_vectors.min() < 0 or token_vectors.max() >= self.__embedding_matrix.shape[0]):
+            raise IndexError(f"tokens must be in the range 0..{self.__embedding_matrix.shape[0] - 1}")
+        padded_token_vectors = np.zeros(shape=shape[:2], dtype=np.intp)
+        padded_token_vectors[:, left_padding:left_padding + num_words] = token_vectors
+        # 'clip' lets numpy gather straight into embedding_tensor, 'raise' would gather into a temporary buffer first,
+        # clipping never applies as the tokens have been checked above
+        self.__embedding_matrix.take(padded_token_vectors, axis=0, out=embedding_tensor, mode='clip')
+
+        # slice one view per context offset from the batch_embedding_tensor,
+        # with the default offsets: all embedded texts, all embedded left contexts, all embedded right contexts
         embedded_tensor_with_contexts = [
-            embedding_tensor[:, 1:-1],  # all embedded texts
-            embedding_tensor[:, 0:-2],  # all embedded left contexts
-            embedding_tensor[:, 2:]     # all embedded right contexts
+            embedding_tensor[:, left_padding + offset:left_padding + offset + num_words] for offset in context_offsets
         ]
+        if self.__metrics is not None:
+            self.__metrics.record("embed", {"seconds": time.perf_counter() - start,
+                                            "texts": token_vectors.shape[0],
+                                            "positions": token_vectors.size})
 
         return embedded_tensor_with_contexts
 
-    def __create_word_index_dict_and_embedding_matrix(
-            self, embedding_file_path: str, embedding_limit: Optional[int] = None):
+    @staticmethod
+    def __get_context_padding(context_offsets: Sequence[int]) -> Tuple[int, int]:
         """
-        loads the embedding data into a dictionary mapping words to array indices (word indexes)
-        and a numpy array holding a word vector numpy array per index (so-called embedding matrix)
+        :return: the number of padding tokens needed on the left and on the right side for the context offsets
+        """
+        if len(context_offsets) == 0:
+            raise ValueError("context_offsets must not be empty")
+        return max(0, -min(context_offsets)), max(0, max(context_offsets))
 
-        :param embedding_file_path: the path to the embedding file
-        :param embedding_limit: the maximum number of embeddings to read from the embedding file
-        :return: the word to array index dictionary,
-                 the embedding matrix numpy array,
-                 whether the dictionary contains (almost) only lower case words
-        """
-        number_of_non_lower_case_words: int = 0
-        embedding_file = io.open(embedding_file_path, 'r', encoding='utf-8', newline='\n', errors='strict')
-        number_of_embeddings, embedding_dim = map(int, embedding_file.readline().split())
-        if embedding_limit is not None:
-            number_of_embeddings: int = min(number_of_embeddings, embedding_limit)
-        print(f"loading up to {number_of_embeddings} word embeddings...")
-        word_2_index_dict: Dict[str, int] = {}
-        embedding_matrix = np.empty((number_of_embeddings, embedding_dim), dtype='float32')
-        embedding_matrix[0] = np.zeros(shape=embedding_dim, dtype='float32')  # 0 -> zero vector
-        next_word_index: int = 1
-        for line in embedding_file:
-            if next_word_index >= number_of_embeddings:  # reached the limit or end of file
-                break
-            tokens = line.rstrip().split(' ')
-            if len(tokens) != embedding_dim + 1:
-                print(f"WARN: skipped unexpected line in embedding file: {line}")
-                continue  # line does not have the expected number of tokens
-            word = tokens[0]
-            if word is not None and len(word) > 0:
-                word_sequence = self.__text_to_word_list(word)
-                if len(word_sequence) == 1:
-                    # word from embedding is a single word with respect to our own word splitting method
-                    if word_sequence[0].lower() != word_sequence[0]:
-                        number_of_non_lower_case_words += 1
-                    word_2_index_dict[word_sequence[0]] = next_word_index
-                    embedding_matrix[next_word_index] = np.asarray(tokens[1:], dtype='float32')
-                    next_word_index += 1
-                else:
-                    #print(f"skipping line with compound word {word} because it splits into {word_sequence}")
-                    pass
-        embedding_file.close()
-        print(f"loaded {next_word_index - 1} word embeddings")
-        non_lower_case_percentage: float = 100 * number_of_non_lower_case_words / max(next_word_index, 1)
-        if non_lower_case_percentage < 5:
-            almost_only_lower_case_words = True
-            print("loaded less than 5% non-lower-case words from embedding file")
+    def __tokenize_next_batch(self, text_iterator: Iterator[str], batch_size: int) -> np.ndarray:
+        return self.tokenize_texts(list(itertools.islice(text_iterator, batch_size)))
+
+    def __get_words(self) -> List[str]:
+        """
+        :return: the words of the embedding matrix rows 1..n
+        """
+        if self.__words is not None:
+            return self.__words
+        return self.__vocabulary.to_word_list(self.__embedding_matrix.shape[0] - 1)
+
+    def __get_word(self, word_index: int) -> str:
+        """
+        :return: the word of the embedding matrix row word_index, '' if there is none
+        """
+        if self.__words is not None:
+            return self.__words[word_index - 1]
+        return self.__vocabulary.word_at(word_index) or ''
+
+    def __setup(self,
+                words: Union[List[str], CompactWordVocabulary],
+                embedding_matrix: np.ndarray,
+                almost_only_lower_case_words: bool,
+                embedding_sequence_length: int,
+                filters: str,
+                compact_vocabulary: bool = False,
+                token_cache_bytes: int = 0,
+                pooled_cache_bytes: int = 0,
+                byte_level_tokenization: bool = False):
+        """
+        initializes this word embedder with loaded embedding data
+
+        :param words: the words of the embedding matrix rows 1..n or their CompactWordVocabulary
+        :param embedding_matrix: the embedding matrix numpy array
+        :param almost_only_lower_case_words: whether the words are (almost) only lower case words
+        :param embedding_sequence_length: see constructor
+        :param filters: see constructor
+        :param compact_vocabulary: see constructor, implied if words is a CompactWordVocabulary
+        :param token_cache_bytes: see constructor
+        :param pooled_cache_bytes: see constructor
+        :param byte_level_tokenization: see constructor
+        """
+        if byte_level_tokenization and not (compact_vocabulary or isinstance(words, CompactWordVocabulary)):
+            raise ValueError("byte_level_tokenization requires compact_vocabulary")
+        self.__embedding_sequence_length: int = embedding_sequence_length
+        self.__filters: str = filters
+        self.__words: Optional[List[str]] = None  # only kept for the dict vocabulary, which holds them anyway
+        self.__vocabulary: Union[Dict[str, int], CompactWordVocabulary]
+        if isinstance(words, CompactWordVocabulary):
+            self.__vocabulary = words
+        elif compact_vocabulary:
+            self.__vocabulary = CompactWordVocabulary.build(words)
         else:
-            almost_only_lower_case_words = False
-            print(f"loaded {non_lower_case_percentage:.2f}% non-lower case words from embedding file")
-        return word_2_index_dict, embedding_matrix, almost_only_lower_case_words
+            self.__words = words
+            self.__vocabulary = {word: index + 1 for index, word in enumerate(words)}
+        self.__embedding_matrix = embedding_matrix
+        self.__quantization_error: Optional[Dict[str, float]] = None
+        self.__shared_word_embedding: Optional[SharedWordEmbedding] = None
+        self.__convert_texts_to_lower_case = almost_only_lower_case_words
+        if self.__convert_texts_to_lower_case:
+            print("will convert all input texts to lower case before looking up their word embeddings")
+        self.__byte_level_tokenization: bool = byte_level_tokenization
+        self.__batch_tokenizer = BatchTokenizer(
+            filters=filters, lower=self.__convert_texts_to_lower_case, byte_level=byte_level_tokenization)
+        self.__embedding_dim: int = self.__embedding_matrix.shape[1]
+        self.__token_cache: Optional[TextLruCache] = TextLruCache(token_cache_bytes) if token_cache_bytes else None
+        self.__pooled_cache: Optional[TextLruCache] = TextLruCache(pooled_cache_bytes) if pooled_cache_bytes else None
+        self.__similarity_index: Optional[WordSimilarityIndex] = None
+        self.__metrics: Optional[WordEmbedderMetrics] = None
+        self.__vocabulary_bytes: Optional[int] = None  # estimated once on demand, see memory_bytes
+        self.__reference: Optional[Tuple[Any, tuple]] = None  # how to pickle this word embedder, see __reduce_ex__
 
-    def __texts_to_word_index_lists(self, texts: List[str], lower: bool = False) -> List[List[int]]:
+    def __quantize_embedding_matrix(self, embedding_dtype: str):
+        quantized_embedding_matrix = QuantizedEmbeddingMatrix.quantize(self.__embedding_matrix, dtype=embedding_dtype)
+        self.__quantization_error = quantized_embedding_matrix.reconstruction_error(self.__embedding_matrix)
+        self.__embedding_matrix = quantized_embedding_matrix
+        print(f"stored embedding matrix as {embedding_dtype}, reconstruction error: {self.__quantization_error}")
+
+    def __load_words_and_embedding_matrix(self,
+                                          embedding_file_path: Union[str, S3Url],
+                                          embedding_limit: Optional[int],
+                                          cache_dir: Optional[str],
+                                          filters: str,
+                                          number_of_load_processes: int,
+                                          compact_vocabulary: bool,
+                                          aws_credentials: Optional[AwsCredentials],
+                                          lazy_cached_rows: int = 0):
         """
-        transforms each text in texts to a list of word indexes (integers).
-        Only words available in the word_2_index dictionary will be taken into account.
+        opens the embedding data from the cache entry matching the embedding file if there is one,
+        otherwise parses the embedding file and creates the cache entry
 
-        :param a list of texts (strings)
-        :return a list of lists of word indexes (ints)
+        :param embedding_file_path: the path or the S3Url of the embedding file
+        :param embedding_limit: the maximum number of embeddings to read from the embedding file
+        :param cache_dir: the cache directory, None means 'do not cache'
+        :param filters: the characters to treat as word boundaries
+        :param number_of_load_processes: the number of processes parsing the embedding file
+        :param compact_vocabulary: whether to open the CompactWordVocabulary of a cache entry instead of its words
+        :param aws_credentials: the credentials for getting an embedding file from S3
+        :param lazy_cached_rows: see constructor, only without cache_dir
+        :return: the words of the embedding matrix rows 1..n or their CompactWordVocabulary (only from the cache),
+                 the embedding matrix numpy array,
+                 whether the words are (almost) only lower case words,
+                 the path of the cache entry or None without cache_dir
         """
-        return list(self.__texts_to_word_index_lists_generator(texts, lower=lower))
+        s3_downloader: Optional[S3BucketObjectDownloader] = None
+        source: Optional[Dict[str, Any]] = None  # None means 'a local file'
+        cache_path: str = embedding_file_path
+        if isinstance(embedding_file_path, S3Url):
+            s3_downloader = S3BucketObjectDownloader(credentials=aws_credentials)
+            cache_path = f"s3://{embedding_file_path.bucket}/{embedding_file_path.key}"
+            source = dict(path=cache_path, **s3_downloader.get_metadata(
+                embedding_file_path.bucket, embedding_file_path.key))
+        if cache_dir is None:
+            return self.__create_words_and_embedding_matrix(
+                embedding_file_path, embedding_limit, filters, number_of_load_processes, s3_downloader, source,
+                lazy_cached_rows) + (None,)
+        cache = WordEmbeddingCache(cache_dir=cache_dir)
+        cached = cache.load(cache_path, embedding_limit, filters, compact_vocabulary, source)
+        if cached is None:
+            words, embedding_matrix, almost_only_lower_case_words = self.__create_words_and_embedding_matrix(
+                embedding_file_path, embedding_limit, filters, number_of_load_processes, s3_downloader, source)
+            cache.save(cache_path, embedding_limit, filters,
+                       words, embedding_matrix, almost_only_lower_case_words, source)
+            del embedding_matrix  # continue with the shared memory mapped copy instead of the private one
+            cached = cache.load(cache_path, embedding_limit, filters, compact_vocabulary, source)
+        return cached + (cache.get_entry_path(cache_path, embedding_limit, filters, source),)
 
-    def __texts_to_word_index_lists_generator(self, texts: List[str], lower: bool = False) -> List[List[int]]:
+    def __create_words_and_embedding_matrix(self,
+                                            embedding_file_path: Union[str, S3Url],
+                                            embedding_limit: Optional[int],
+                                            filters: str,
+                                            number_of_load_processes: int,
+                                            s3_downloader: Optional[S3BucketObjectDownloader] = None,
+                                            source: Optional[Dict[str, Any]] = None,
+                                            lazy_cached_rows: int = 0):
         """
-        transforms each text in texts to a list of word indexes (integers).
-        Only words available in the word_2_index dictionary will be taken into account.
+        loads the embedding data into a list of words with their array indices (word indexes) being the list index + 1
+        and a numpy array holding a word vector numpy array per index (so-called embedding matrix)
 
-        :param texts a list of texts (strings)
-        :return yields individual lists of word indexes (ints)
+        :param embedding_file_path: the path or the S3Url of the embedding file
+        :param embedding_limit: the maximum number of embeddings to read from the embedding file
+        :param filters: the characters to treat as word boundaries
+        :param number_of_load_processes: the number of processes parsing the embedding file
+        :param s3_downloader: the downloader for an embedding file in S3
+        :param source: the metadata of an embedding file in S3
+        :param lazy_cached_rows: see constructor
+        :return: the words of the embedding matrix rows 1..n,
+                 the embedding matrix numpy array or LazyEmbeddingMatrix,
+                 whether the words are (almost) only lower case words
         """
-        for text in texts:
-            word_sequence = self.__text_to_word_list(text, lower=lower)
-            word_index_sequence = []
-            for word in word_sequence:
-                word_index = self.__word_2_index_dict.get(word)
-                if word_index is not None:
-                    word_index_sequence.append(word_index)
-            yield word_index_sequence
+        if lazy_cached_rows:
+            words, embedding_matrix = LazyEmbeddingMatrix.scan(
+                embedding_file_path, embedding_limit, filters, max_cached_rows=lazy_cached_rows)
+        elif isinstance(embedding_file_path, S3Url):
+            s3_object_stream = S3ObjectStream(embedding_file_path, downloader=s3_downloader, size=source["size"],
+                                              etag=source["etag"])
+            words, embedding_matrix = self.__parse_embedding_file(
+                self.__open_embedding_file(s3_object_stream, embedding_file_path.key), embedding_limit, filters,
+                self.__load_phase_seconds)
+        elif number_of_load_processes > 1 and DecompressingStream.get_compression(embedding_file_path) is None:
+            words, embedding_matrix = ParallelEmbeddingLoader(number_of_processes=number_of_load_processes).load(
+                embedding_file_path, embedding_limit, filters)
+        else:
+            words, embedding_matrix = self.__parse_embedding_file(
+                self.__open_embedding_file(open(embedding_file_path, 'rb'), embedding_file_path),
+                embedding_limit, filters, self.__load_phase_seconds)
+        almost_only_lower_case_words: bool = self.__are_almost_only_lower_case_words(words)
+        return words, embedding_matrix, almost_only_lower_case_words
 
     @staticmethod
-    def __text_to_word_list(text: str,
-                            filters: Union[List[str], str] = '!"#$%&()*+,-./:;<=>?@[\\]^_`{|}~\t\n\r',
-                            lower: bool = False,
-                            split: str = ' ') -> List[str]:
+    def __open_embedding_file(binary_stream, file_name: str) -> io.TextIOWrapper:
         """
-        splits a text into a list of words (also known as 'tokens').
-
-        # Arguments
-        :param text Input text (string).
-        :param filters list (or concatenation) of characters to filter out, such as punctuation
-        :param lower Whether to convert the input to lowercase.
-        :param split Separator for word splitting.
-        :return a list of words.
+        :param binary_stream: the binary stream of the embedding file, e. g. an opened local file or an S3ObjectStream
+        :param file_name: the name of the embedding file, its suffix tells whether the file is compressed
+        :return: the text stream of the (decompressed) embedding file
         """
-        if lower:
-            text = text.lower()
+        compression: Optional[str] = DecompressingStream.get_compression(file_name)
+        if compression is not None:
+            binary_stream = io.BufferedReader(DecompressingStream(binary_stream, compression), buffer_size=1 << 20)
+        elif not isinstance(binary_stream, io.BufferedIOBase):
+            binary_stream = io.BufferedReader(binary_stream, buffer_size=1 << 20)
+        return io.TextIOWrapper(binary_stream, encoding='utf-8', newline='\n', errors='strict')
 
-        translate_dict = dict((c, split) for c in filters)
-        translate_map = str.maketrans(translate_dict)
-        text = text.translate(translate_map)
+    @staticmethod
+    def __parse_embedding_file(embedding_file: io.TextIOWrapper,
+                               embedding_limit: Optional[int],
+                               filters: str,
+                               phase_seconds: Optional[Dict[str, float]] = None):
+        """
+        parses the embedding file sequentially line by line
 
-        word_sequence = text.split(split)
-        return [word for word in word_sequence if word]  # without empty words
+        :param embedding_file: the opened embedding file, it is closed after parsing
+        :param embedding_limit: the maximum number of embeddings to read from the embedding file
+        :param filters: the characters to treat as word boundaries
+        :param phase_seconds: optional dict to store the "header_seconds", "parse_seconds" and "fill_seconds" in,
+                              see WordEmbedderMetrics
+        :return: the words of the embedding matrix rows 1..n,
+                 the embedding matrix numpy array
+        """
+        batch_tokenizer = BatchTokenizer(filters=filters)
+        measure: bool = phase_seconds is not None
+        header_start: float = time.perf_counter()
+        fill_seconds: float = 0.0
+        with embedding_file:
+            number_of_embeddings, embedding_dim = map(int, embedding_file.readline().split())
+            lines_start: float = time.perf_counter()
+            if embedding_limit is not None:
+                number_of_embeddings: int = min(number_of_embeddings, embedding_limit)
+            print(f"loading up to {number_of_embeddings} word embeddings...")
+            words: List[str] = []
+            embedding_matrix = np.empty((number_of_embeddings, embedding_dim), dtype='float32')
+            embedding_matrix[0] = np.zeros(shape=embedding_dim, dtype='float32')  # 0 -> zero vector
+            next_word_index: int = 1
+            for line in embedding_file:
+                if next_word_index >= number_of_embeddings:  # reached the limit or end of file
+                    break
+                tokens = line.rstrip().split(' ')
+                if len(tokens) != embedding_dim + 1:
+                    print(f"WARN: skipped unexpected line in embedding file: {line}")
+                    continue  # line does not have the expected number of tokens
+                word = tokens[0]
+                if word is not None and len(word) > 0:
+                    word_sequence = batch_tokenizer.text_to_word_list(word)
+                    if len(word_sequence) == 1:
+                        # word from embedding is a single word with respect to our own word splitting method
+                        words.append(word_sequence[0])
+                        fill_start: float = time.perf_counter() if measure else 0.0
+                        embedding_matrix[next_word_index] = np.asarray(tokens[1:], dtype='float32')
+                        if measure:
+                            fill_seconds += time.perf_counter() - fill_start
+                        next_word_index += 1
+                    else:
+                        #print(f"skipping line with compound word {word} because it splits into {word_sequence}")
+                        pass
+        if measure:
+            phase_seconds["header_seconds"] = lines_start - header_start
+            phase_seconds["parse_seconds"] = time.perf_counter() - lines_start - fill_seconds
+            phase_seconds["fill_seconds"] = fill_seconds
+        print(f"loaded {next_word_index - 1} word embeddings")
+        return words, embedding_matrix[:next_word_index]
 
     @staticmethod
-    def __pad_sequences(sequences, maxlen=None, dtype='int32',
-                        padding='pre', truncating='pre', value=0.):
-        """Pads sequences to the same length.
-
-        This function is a copy from Keras 2.3/keras_preprocessing/sequence.py
-        in order to get rid of the full Keras dependency.
-
-        This function transforms a list of
-        `num_samples` sequences (lists of integers)
-        into a 2D Numpy array of shape `(num_samples, num_timesteps)`.
-        `num_timesteps` is either the `maxlen` argument if provided,
-        or the length of the longest sequence otherwise.
-
-        Sequences that are shorter than `num_timesteps`
-        are padded with `value` at the beginning or the end
-        if padding='post.
-
-        Sequences longer than `num_timesteps` are truncated
-        so that they fit the desired length.
-        The position where padding or truncation happens is determined by
-        the arguments `padding` and `truncating`, respectively.
-
-        Pre-padding is the default.
-
-        # Arguments
-            sequences: List of lists, where each element is a sequence.
-            maxlen: Int, maximum length of all sequences.
-            dtype: Type of the output sequences.
-                To pad sequences with variable length strings, you can use `object`.
-            padding: String, 'pre' or 'post':
-                pad either before or after each sequence.
-            truncating: String, 'pre' or 'post':
-                remove values from sequences larger than
-                `maxlen`, either at the beginning or at the end of the sequences.
-            value: Float or String, padding value.
-
-        # Returns
-            x: Numpy array with shape `(len(sequences), maxlen)`
-
-        # Raises
-            ValueError: In case of invalid values for `truncating` or `padding`,
-                or in case of invalid shape for a `sequences` entry.
-        """
-        if not hasattr(sequences, '__len__'):
-            raise ValueError('`sequences` must be iterable.')
-        num_samples = len(sequences)
-
-        lengths = []
-        sample_shape = ()
-        flag = True
-
-        # take the sample shape from the first non empty sequence
-        # checking for consistency in the main loop below.
-
-        for x in sequences:
-            try:
-                lengths.append(len(x))
-                if flag and len(x):
-                    sample_shape = np.asarray(x).shape[1:]
-                    flag = False
-            except TypeError:
-                raise ValueError('`sequences` must be a list of iterables. '
-                                 'Found non-iterable: ' + str(x))
-
-        if maxlen is None:
-            maxlen = np.max(lengths)
-
-        is_dtype_str = np.issubdtype(dtype, np.str_) or np.issubdtype(dtype, np.unicode_)
-        if isinstance(value, six.string_types) and dtype != object and not is_dtype_str:
-            raise ValueError("`dtype` {} is not compatible with `value`'s type: {}\n"
-                             "You should set `dtype=object` for variable length strings."
-                             .format(dtype, type(value)))
-
-        x = np.full((num_samples, maxlen) + sample_shape, value, dtype=dtype)
-        for idx, s in enumerate(sequences):
-            if not len(s):
-                continue  # empty list/array was found
-            if truncating == 'pre':
-                trunc = s[-maxlen:]
-            elif truncating == 'post':
-                trunc = s[:maxlen]
-            else:
-                raise ValueError('Truncating type "%s" '
-                                 'not understood' % truncating)
-
-            # check `trunc` has expected shape
-            trunc = np.asarray(trunc, dtype=dtype)
-            if trunc.shape[1:] != sample_shape:
-                raise ValueError('Shape of sample %s of sequence at position %s '
-                                 'is different from expected shape %s' %
-                                 (trunc.shape[1:], idx, sample_shape))
-
-            if padding == 'post':
-                x[idx, :len(trunc)] = trunc
-            elif padding == 'pre':
-                x[idx, -len(trunc):] = trunc
-            else:
-                raise ValueError('Padding type "%s" not understood' % padding)
-        return x
+    def __are_almost_only_lower_case_words(words: List[str]) -> bool:
+        number_of_non_lower_case_words: int = sum(1 for word in words if word.lower() != word)
+        non_lower_case_percentage: float = 100 * number_of_non_lower_case_words / (len(words) + 1)
+        if non_lower_case_percentage < 5:
+            print("loaded less than 5% non-lower-case words from embedding file")
+            return True
+        else:
+            print(f"loaded {non_lower_case_percentage:.2f}% non-lower case words from embedding file")
+            return False
@@ -0,0 +1,70 @@
+import threading
+from typing import Callable, Dict, Optional
+
+
+class WordEmbedderMetrics:
+    """ a thread-safe registry of the timings and counters a WordEmbedder reports, see WordEmbedder.set_metrics.
+
+        A WordEmbedder reports events, each with a name and a dict of values:
+        - "load": once per loading of the embedding data, with the total "seconds", the number of "words" and,
+          if the embedding file is parsed sequentially, the "header_seconds" for opening the file and reading its
+          header, the "parse_seconds" for splitting the lines and the "fill_seconds" for converting the vectors
+          into the embedding matrix, with embedding_dtype other than 'float32' also the "quantize_seconds"
+        - "tokenize": per tokenization of a batch of texts (all embed_texts* methods tokenize, too), with its "seconds",
+          the number of "texts" and of their "tokens", the number of "truncated_texts" with more tokens than the
+          embedding sequence length and their "truncation_rate", the number of "words" split from the texts and the
+          number of "oov_words" not in the vocabulary and their "oov_rate",
+          words are only counted for texts which are not served from the token cache
+        - "embed": per embedding of a batch of token vectors, with its "seconds", the number of "texts" and
+          the number of embedded "positions" (texts times sequence length)
+        - "embed_pooled": per pooled embedding of a batch of texts not served from the pooled cache,
+          with its "seconds" including the tokenization and the number of "texts"
+
+        The registry counts the events and sums up their values per event name (except for rates, which are computed
+        from the sums instead, see get_statistics), and it passes each event on to an optional callback, e. g. to
+        forward the events to a monitoring system or to trace slow calls. A word embedder without metrics only checks
+        whether it has metrics once per call.
+    """
+
+    def __init__(self, callback: Optional[Callable[[str, Dict[str, float]], None]] = None):
+        """
+        :param callback: called with the event name and the values of each event, in the thread reporting the event
+        """
+        self.__callback: Optional[Callable[[str, Dict[str, float]], None]] = callback
+        self.__totals: Dict[str, Dict[str, float]] = {}
+        self.__lock = threading.Lock()
+
+    def record(self, event: str, values: Dict[str, float]):
+        """
+        :param event: the name of the event, e. g. "tokenize"
+        :param values: the values of the event, e. g. {"seconds": 0.002, "texts": 32}
+        """
+        with self.__lock:
+            totals: Dict[str, float] = self.__totals.setdefault(event, {"count": 0})
+            totals["count"] += 1
+            for name, value in values.items():
+                if not name.endswith("_rate"):
+                    totals[name] = totals.get(name, 0) + value
+        if self.__callback is not None:
+            self.__callback(event, values)
+
+    def get_statistics(self) -> Dict[str, Dict[str, float]]:
+        """
+        :return: a dict with a dict per event name of the number of events ("count") and the sums of their values,
+                 "tokenize" additionally has the "oov_rate" and the "truncation_rate" of all its events
+        """
+        with self.__lock:
+            statistics: Dict[str, Dict[str, float]] = {event: dict(totals) for event, totals in self.__totals.items()}
+        tokenize: Optional[Dict[str, float]] = statistics.get("tokenize")
+        if tokenize is not None:
+            tokenize["oov_rate"] = tokenize.get("oov_words", 0) / tokenize["words"] if tokenize.get("words") else 0.0
+            tokenize["truncation_rate"] = \
+                tokenize.get("truncated_texts", 0) / tokenize["texts"] if tokenize.get("texts") else 0.0
+        return statistics
+
+    def reset(self):
+        """
+        discards all sums and counts, e. g. after exporting them
+        """
+        with self.__lock:
+            self.__totals.clear()
@@ -0,0 +1,141 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, Hashable, Optional, Tuple, Union
+from justmltools.nlp.word_embedder import WordEmbedder
+from justmltools.s3.s3_url import S3Url
+
+
+class WordEmbedderRegistry:
+    """ a thread-safe registry of the word embedders of one process, e. g. of a service embedding texts of several
+        languages with several embedding variants, bounding the estimated memory of all registered word embedders:
+
+        registry = WordEmbedderRegistry(max_bytes=8 << 30, cache_dir="/var/cache/embeddings")
+        word_embedder = registry.get("/models/cc.de.300.vec", embedding_limit=500000, embedding_sequence_length=200)
+
+        Word embedders are loaded lazily on the first get of their key, which consists of the embedding file,
+        the embedding limit, the embedding sequence length and all other constructor arguments, all further gets of
+        the same key return the same word embedder, concurrent first gets load it only once.
+        If the memory of all word embedders (see WordEmbedder.memory_bytes) exceeds max_bytes after loading one,
+        the least recently used other word embedders are removed from the registry until it fits again.
+        The memory of a removed word embedder is only released once the callers drop their references to it, too.
+        With a cache_dir, word embedders are memory mapped from the binary cache (see WordEmbeddingCache), so loading
+        a removed word embedder again takes a fraction of a second instead of parsing its embedding file again.
+    """
+
+    def __init__(self, max_bytes: int, cache_dir: Optional[str] = None):
+        """
+        :param max_bytes: the maximum estimated number of bytes of all registered word embedders, a single word
+                          embedder exceeding it on its own is registered nevertheless, but only until the next one
+        :param cache_dir: the default cache_dir of all word embedders (see WordEmbedder), None means 'no cache'
+        """
+        if max_bytes < 1:
+            raise ValueError(f"max_bytes must be positive, got {max_bytes}")
+        self.__max_bytes: int = max_bytes
+        self.__cache_dir: Optional[str] = cache_dir
+        self.__entries: 'OrderedDict[Hashable, Tuple[WordEmbedder, int]]' = OrderedDict()
+        self.__loading: Dict[Hashable, Future] = {}
+        self.__bytes: int = 0
+        self.__hits: int = 0
+        self.__loads: int = 0
+        self.__evictions: int = 0
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def get(self,
+            embedding_file_path: Union[str, S3Url],
+            embedding_limit: Optional[int] = None,
+            embedding_sequence_length: int = 3000,
+            **word_embedder_arguments: Any) -> WordEmbedder:
+        """
+        returns the registered word embedder for the arguments, loading it first if it is not registered
+
+        :param embedding_file_path: see WordEmbedder
+        :param embedding_limit: see WordEmbedder
+        :param embedding_sequence_length: see WordEmbedder
+        :param word_embedder_arguments: any other arguments of WordEmbedder, which must be hashable,
+                                        cache_dir defaults to the cache_dir of this registry
+        :return: the word embedder
+        """
+        word_embedder_arguments.setdefault("cache_dir", self.__cache_dir)
+        key: Hashable = self.__create_key(
+            embedding_file_path, embedding_limit, embedding_sequence_length, word_embedder_arguments)
+        with self.__lock:
+            entry: Optional[Tuple[WordEmbedder, int]] = self.__entries.get(key)
+            if entry is not None:
+                self.__entries.move_to_end(key)
+                self.__hits += 1
+                return entry[0]
+            loading: Optional[Future] = self.__loading.get(key)
+            if loading is None:
+                self.__loading[key] = Future()
+        if loading is not None:
+            return loading.result()  # another thread is loading the word embedder already
+
+        try:
+            word_embedder: WordEmbedder = WordEmbedder(
+                embedding_file_path=embedding_file_path,
+                embedding_limit=embedding_limit,
+                embedding_sequence_length=embedding_sequence_length,
+                **word_embedder_arguments)
+            number_of_bytes: int = word_embedder.memory_bytes()
+        except BaseException as e:
+            with self.__lock:
+                loading = self.__loading.pop(key)
+            loading.set_exception(e)
+            raise
+        with self.__lock:
+            self.__entries[key] = (word_embedder, number_of_bytes)
+            self.__bytes += number_of_bytes
+            self.__loads += 1
+            self.__evict_least_recently_used()
+            loading = self.__loading.pop(key)
+        loading.set_result(word_embedder)
+        return word_embedder
+
+    def clear(self):
+        """
+        removes all word embedders from the registry
+        """
+        with self.__lock:
+            self.__entries.clear()
+            self.__bytes = 0
+
+    def get_statistics(self) -> Dict[str, int]:
+        """
+        :return: a dict with the number of gets served from the registry ("hits"), of loaded word embedders ("loads")
+                 and of removed word embedders ("evictions") since the registry was created,
+                 the current number of registered word embedders ("entries") and of their bytes and the maximum number
+                 of bytes
+        """
+        with self.__lock:
+            return {
+                "hits": self.__hits,
+                "loads": self.__loads,
+                "evictions": self.__evictions,
+                "entries": len(self.__entries),
+                "bytes": self.__bytes,
+                "max_bytes": self.__max_bytes
+            }
+
+    def __evict_least_recently_used(self):
+        """
+        removes the least recently used word embedders, but never the most recently used one, until the rest fits
+        """
+        while self.__bytes > self.__max_bytes and len(self.__entries) > 1:
+            key, (_, number_of_bytes) = self.__entries.popitem(last=False)
+            self.__bytes -= number_of_bytes
+            self.__evictions += 1
+            print(f"removed word embedder {key[0]} from registry to free {number_of_bytes} bytes")
+
+    @staticmethod
+    def __create_key(embedding_file_path: Union[str, S3Url],
+                     embedding_limit: Optional[int],
+                     embedding_sequence_length: int,
+                     word_embedder_arguments: Dict[str, Any]) -> Hashable:
+        if isinstance(embedding_file_path, S3Url):
+            embedding_file_path = f"s3://{embedding_file_path.bucket}/{embedding_file_path.key}"
+        return (embedding_file_path, embedding_limit, embedding_sequence_length,
+                tuple(sorted(word_embedder_arguments.items())))
@@ -0,0 +1,238 @@
+import glob
+import hashlib
+import json
+import os
+import uuid
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from justmltools.nlp.compact_word_vocabulary import CompactWordVocabulary
+
+
+class WordEmbeddingCache:
+    """ stores the words and the embedding matrix loaded from an embedding file in a compiled binary format,
+        so that they can be reopened later without parsing the embedding file again.
+
+        Each cache entry consists of three files in the cache directory:
+        - <name>.<key>.npy: the float32 embedding matrix in numpy's .npy format, opened read-only with np.memmap,
+          so that the operating system's page cache is shared between all processes using the same entry
+        - <name>.<key>.vocab: the words of the embedding matrix rows 1..n as UTF-8 text, one word per line
+        - <name>.<key>.json: metadata, written last, so that an entry is only visible once it is complete
+        - <name>.<key>.vocab-<array name>.npy: the arrays of the CompactWordVocabulary of the words,
+          only created when an entry is loaded with a compact vocabulary for the first time
+
+        Each file is written to a temporary file unique to the writer first and then renamed, so that several processes
+        may create the same entry concurrently, e. g. worker processes starting with the same cache directory.
+
+        The key is derived from the embedding file's path, size and modification time (or an S3 object's URL, size and
+        entity tag) as well as from all parameters affecting the loaded result (e. g. the embedding limit and the tokenizer
+        filters), so any change of these invalidates the entry automatically.
+    """
+
+    __FORMAT_VERSION: int = 1
+
+    def __init__(self, cache_dir: str):
+        """
+        :param cache_dir: the directory to store the cache entries in, will be created if it does not exist
+        """
+        self.__cache_dir: str = cache_dir
+
+    def get_cache_dir(self) -> str:
+        return self.__cache_dir
+
+    def load(self,
+             embedding_file_path: str,
+             embedding_limit: Optional[int],
+             filters: str,
+             compact_vocabulary: bool = False,
+             source: Optional[Dict[str, Any]] = None
+             ) -> Optional[Tuple[Union[List[str], CompactWordVocabulary], np.ndarray, bool]]:
+        """
+        opens the cache entry matching the given embedding file and parameters
+
+        :param embedding_file_path: the path to the embedding file the entry was created from
+        :param embedding_limit: the maximum number of embeddings read from the embedding file
+        :param filters: the characters the tokenizer treats as word boundaries
+        :param compact_vocabulary: whether to return a CompactWordVocabulary memory mapped from the entry
+                                   instead of the list of words
+        :param source: the identity of the embedding file, i. e. a dict with its "path" and any attributes changing
+                       with its content, e. g. the size and the entity tag of an S3 object,
+                       None means 'the absolute path, the size and the modification time of the local file'
+        :return: None if there is no valid entry, otherwise
+                 the words of the embedding matrix rows 1..n or their CompactWordVocabulary,
+                 the read-only memory mapped embedding matrix,
+                 whether the words are (almost) only lower case words
+        """
+        metadata: Dict[str, Any] = self.__create_metadata(embedding_file_path, embedding_limit, filters, source)
+        entry_path: str = self.__get_entry_path(embedding_file_path, metadata)
+        opened = self.open_entry(entry_path, compact_vocabulary, expected_source=metadata["source"])
+        return None if opened is None else opened[:3]
+
+    def get_entry_path(self,
+                       embedding_file_path: str,
+                       embedding_limit: Optional[int],
+                       filters: str,
+                       source: Optional[Dict[str, Any]] = None) -> str:
+        """
+        :param embedding_file_path: see load
+        :param embedding_limit: see load
+        :param filters: see load
+        :param source: see load
+        :return: the path of the cache entry for the given embedding file and parameters without the file name suffix,
+                 whether the entry exists or not, see open_entry
+        """
+        return self.__get_entry_path(
+            embedding_file_path, self.__create_metadata(embedding_file_path, embedding_limit, filters, source))
+
+    @staticmethod
+    def open_entry(entry_path: str,
+                   compact_vocabulary: bool = False,
+                   expected_source: Optional[Dict[str, Any]] = None
+                   ) -> Optional[Tuple[Union[List[str], CompactWordVocabulary], np.ndarray, bool, str]]:
+        """
+        opens a cache entry by its path, without checking whether it is still up-to-date with its embedding file
+        unless expected_source is given, e. g. to reopen an entry in another process quickly
+
+        :param entry_path: the path of the entry as returned by get_entry_path
+        :param compact_vocabulary: see load
+        :param expected_source: the source (see load) the entry must have been created from, None means 'any'
+        :return: None if there is no valid entry, otherwise the same as load plus the filters of the entry
+        """
+        matrix_path, vocab_path, metadata_path = f"{entry_path}.npy", f"{entry_path}.vocab", f"{entry_path}.json"
+        if not os.path.isfile(metadata_path):
+            return None
+        with open(metadata_path, 'r', encoding='utf-8') as metadata_file:
+            stored_metadata: Dict[str, Any] = json.load(metadata_file)
+        if expected_source is not None and stored_metadata.get("source") != expected_source:
+            return None
+        embedding_matrix = np.load(matrix_path, mmap_mode='r')
+        if embedding_matrix.shape[0] != stored_metadata["number_of_words"] + 1:
+            print(f"WARN: ignoring inconsistent word embedding cache entry {metadata_path}")
+            return None
+        if compact_vocabulary:
+            words = WordEmbeddingCache.__load_compact_vocabulary(vocab_path)
+        else:
+            words = WordEmbeddingCache.__load_words(vocab_path)
+        print(f"opened {embedding_matrix.shape[0] - 1} word embeddings from cache {matrix_path}")
+        return words, embedding_matrix, stored_metadata["almost_only_lower_case_words"], stored_metadata["filters"]
+
+    def save(self,
+             embedding_file_path: str,
+             embedding_limit: Optional[int],
+             filters: str,
+             words: List[str],
+             embedding_matrix: np.ndarray,
+             almost_only_lower_case_words: bool,
+             source: Optional[Dict[str, Any]] = None):
+        """
+        creates or replaces the cache entry for the given embedding file and parameters,
+        entries created from older versions of the same embedding file are removed
+
+        :param embedding_file_path: the path to the embedding file the entry is created from
+        :param embedding_limit: the maximum number of embeddings read from the embedding file
+        :param filters: the characters the tokenizer treats as word boundaries
+        :param words: the words of the embedding matrix rows 1..n
+        :param embedding_matrix: the embedding matrix, row 0 is the zero vector
+        :param almost_only_lower_case_words: whether the words are (almost) only lower case words
+        :param source: see load
+        """
+        if embedding_matrix.shape[0] != len(words) + 1:
+            raise ValueError(f"embedding matrix has {embedding_matrix.shape[0]} rows, expected {len(words) + 1}")
+        os.makedirs(self.__cache_dir, exist_ok=True)
+        metadata: Dict[str, Any] = self.__create_metadata(embedding_file_path, embedding_limit, filters, source)
+        metadata["number_of_words"] = len(words)
+        metadata["embedding_dim"] = int(embedding_matrix.shape[1])
+        metadata["almost_only_lower_case_words"] = almost_only_lower_case_words
+        entry_path: str = self.__get_entry_path(embedding_file_path, metadata)
+        matrix_path, vocab_path, metadata_path = f"{entry_path}.npy", f"{entry_path}.vocab", f"{entry_path}.json"
+        self.__remove_outdated_entries(embedding_file_path, metadata)
+
+        self.__write_atomically(matrix_path, lambda matrix_file: np.save(
+            matrix_file, np.asarray(embedding_matrix, dtype='float32')))
+        self.__write_atomically(vocab_path, lambda vocab_file: vocab_file.write('\n'.join(words).encode('utf-8')))
+        self.__write_atomically(metadata_path, lambda metadata_file: metadata_file.write(
+            json.dumps(metadata, indent=2).encode('utf-8')))
+        print(f"saved {len(words)} word embeddings to cache {matrix_path}")
+
+    @staticmethod
+    def __load_words(vocab_path: str) -> List[str]:
+        with open(vocab_path, 'r', encoding='utf-8', newline='\n') as vocab_file:
+            vocab_text: str = vocab_file.read()
+        return vocab_text.split('\n') if vocab_text else []
+
+    @staticmethod
+    def __load_compact_vocabulary(vocab_path: str) -> CompactWordVocabulary:
+        """
+        memory maps the arrays of the compact vocabulary, they are built from the words first if they do not exist yet
+        """
+        array_paths: Dict[str, str] = {
+            name: f"{vocab_path}-{name}.npy" for name in CompactWordVocabulary.ARRAY_NAMES}
+        if not all(os.path.isfile(array_path) for array_path in array_paths.values()):
+            arrays = CompactWordVocabulary.build(WordEmbeddingCache.__load_words(vocab_path)).to_arrays()
+            for name, array_path in array_paths.items():
+                WordEmbeddingCache.__write_atomically(
+                    array_path, lambda array_file, array=arrays[name]: np.save(array_file, array))
+        return CompactWordVocabulary.from_arrays(
+            {name: np.load(array_path, mmap_mode='r') for name, array_path in array_paths.items()})
+
+    @staticmethod
+    def __write_atomically(path: str, write: Callable[[Any], Any]):
+        """
+        writes a file to a temporary file unique to this writer and renames it to path once it is complete
+
+        :param path: the path of the file to write
+        :param write: writes the content to the binary file it is called with
+        """
+        temp_path: str = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temp_path, 'xb') as temp_file:
+                write(temp_file)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def __create_metadata(self,
+                          embedding_file_path: str,
+                          embedding_limit: Optional[int],
+                          filters: str,
+                          source: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if source is None:
+            file_stat = os.stat(embedding_file_path)
+            source = {
+                "path": os.path.abspath(embedding_file_path),
+                "size": file_stat.st_size,
+                "mtime_ns": file_stat.st_mtime_ns
+            }
+        return {
+            "format_version": self.__FORMAT_VERSION,
+            "source": source,
+            "embedding_limit": embedding_limit,
+            "filters": filters
+        }
+
+    def __get_entry_path(self, embedding_file_path: str, metadata: Dict[str, Any]) -> str:
+        key_fields: Dict[str, Any] = {
+            name: metadata[name] for name in ["format_version", "source", "embedding_limit", "filters"]}
+        key: str = hashlib.sha1(json.dumps(key_fields, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.__cache_dir, f"{os.path.basename(embedding_file_path)}.{key}")
+
+    def __remove_outdated_entries(self, embedding_file_path: str, metadata: Dict[str, Any]):
+        entry_pattern: str = os.path.join(
+            glob.escape(self.__cache_dir), f"{glob.escape(os.path.basename(embedding_file_path))}.*.json")
+        for metadata_path in glob.glob(entry_pattern):
+            try:
+                with open(metadata_path, 'r', encoding='utf-8') as metadata_file:
+                    stored_source: Dict[str, Any] = json.load(metadata_file).get("source", {})
+            except (OSError, ValueError):
+                continue  # unreadable entry, leave it alone
+            if stored_source.get("path") == metadata["source"]["path"] and stored_source != metadata["source"]:
+                entry_path_prefix: str = metadata_path[:-len(".json")]
+                # the metadata first, so that the entry becomes invisible at once,
+                # another process may be removing the same entry concurrently
+                for entry_file_path in [metadata_path] + glob.glob(f"{glob.escape(entry_path_prefix)}.*"):
+                    try:
+                        os.remove(entry_file_path)
+                    except FileNotFoundError:
+                        pass
+                print(f"removed outdated word embedding cache entry {entry_path_prefix}")
@@ -0,0 +1,87 @@
+import socket
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from justmltools.nlp.word_embedder import WordEmbedder
+from justmltools.nlp.word_embedding_protocol import WordEmbeddingProtocol
+
+
+class WordEmbeddingClient:
+    """ tokenizes and embeds texts by sending requests to a WordEmbeddingServer on the same host,
+        with the same results as calling the server's WordEmbedder directly, but without loading any embeddings.
+
+        A client holds one connection, requests on it are answered one after the other,
+        so a client must not be used by multiple threads at the same time.
+    """
+
+    def __init__(self, socket_path: str):
+        """
+        :param socket_path: the file system path of the server's Unix domain socket
+        """
+        self.__socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.__socket.connect(socket_path)
+        self.__embedding_dim: Optional[int] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def close(self):
+        self.__socket.close()
+
+    def embedding_dim(self) -> int:
+        """
+        :return: the number of dimensions of the embedding vectors, see WordEmbedder.embedding_dim
+        """
+        if self.__embedding_dim is None:
+            header, _ = self.__request({"operation": 'info'}, [])
+            self.__embedding_dim = header["embedding_dim"]
+        return self.__embedding_dim
+
+    def tokenize_texts_flat(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        see WordEmbedder.tokenize_texts_flat
+        """
+        _, arrays = self.__request({"operation": 'tokenize'}, WordEmbeddingProtocol.encode_texts(texts))
+        return arrays[0], arrays[1]
+
+    def embed_texts(self, texts: List[str], context_offsets: Sequence[int] = WordEmbedder.CONTEXT_OFFSETS):
+        """
+        see WordEmbedder.embed_texts
+        """
+        if len(context_offsets) == 0:
+            raise ValueError("context_offsets must not be empty")
+        header, arrays = self.__request(
+            {"operation": 'embed', "context_offsets": [int(offset) for offset in context_offsets]},
+            WordEmbeddingProtocol.encode_texts(texts))
+        embedding_tensor: np.ndarray = arrays[0]
+        left_padding: int = header["left_padding"]
+        sequence_length: int = header["sequence_length"]
+        return [
+            embedding_tensor[:, left_padding + offset:left_padding + offset + sequence_length]
+            for offset in context_offsets
+        ]
+
+    def embed_texts_pooled(self,
+                           texts: List[str],
+                           pooling: str = 'mean',
+                           idf_weights: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        see WordEmbedder.embed_texts_pooled
+        """
+        arrays: List[np.ndarray] = WordEmbeddingProtocol.encode_texts(texts)
+        if idf_weights is not None:
+            arrays.append(np.asarray(idf_weights, dtype='float32'))
+        _, arrays = self.__request({"operation": 'pool', "pooling": pooling}, arrays)
+        return arrays[0]
+
+    def __request(self, header: Dict[str, Any], arrays: List[np.ndarray]) -> Tuple[Dict[str, Any], List[np.ndarray]]:
+        WordEmbeddingProtocol.send_message(self.__socket, header, arrays)
+        response = WordEmbeddingProtocol.receive_message(self.__socket)
+        if response is None:
+            raise ConnectionError("the word embedding server closed the connection")
+        if "error" in response[0]:
+            raise ValueError(f"the word embedding server failed: {response[0]['error']}")
+        return response
@@ -0,0 +1,147 @@
+import json
+import socket
+import struct
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+class WordEmbeddingProtocolError(ValueError):
+    """ a message which does not follow WordEmbeddingProtocol or exceeds the maximum message size.
+
+        connection_usable tells whether the whole message was received, so that the next message can be received
+        on the same connection, otherwise the position of the next message in the stream is unknown.
+    """
+
+    def __init__(self, message: str, connection_usable: bool):
+        super().__init__(message)
+        self.connection_usable: bool = connection_usable
+
+
+class WordEmbeddingProtocol:
+    """ the binary framing of the messages WordEmbeddingServer and WordEmbeddingClient exchange over a stream socket.
+
+        A message consists of
+        - the byte size of the header as an unsigned 32 bit int
+        - the header as UTF-8 encoded JSON, e. g. the operation and its parameters,
+          plus the dtype and shape of each array of the message
+        - the raw bytes of each array in C order
+
+        Arrays are received directly into newly allocated numpy arrays, without pickling and without copying.
+        The receiver validates the dtypes and the size of the arrays before allocating them, only the dtypes of
+        the arrays the server and the client exchange are accepted.
+    """
+
+    __LENGTH_FORMAT: str = '<I'
+    __DTYPES = frozenset(['|u1', '<i4', '<i8', '<f2', '<f4'])
+    __DISCARD_CHUNK_BYTES: int = 1 << 20
+
+    @staticmethod
+    def send_message(sock: socket.socket, header: Dict[str, Any], arrays: Sequence[np.ndarray] = ()):
+        """
+        :param sock: the connected socket
+        :param header: the JSON serializable header fields
+        :param arrays: the numpy arrays to send
+        """
+        arrays = [np.ascontiguousarray(array) for array in arrays]
+        header = dict(header, arrays=[[array.dtype.str, list(array.shape)] for array in arrays])
+        header_bytes: bytes = json.dumps(header).encode('utf-8')
+        sock.sendall(struct.pack(WordEmbeddingProtocol.__LENGTH_FORMAT, len(header_bytes)) + header_bytes)
+        for array in arrays:
+            if array.nbytes > 0:
+                sock.sendall(array.reshape(-1).view(np.uint8))
+
+    @staticmethod
+    def receive_message(sock: socket.socket, max_message_bytes: Optional[int] = None
+                        ) -> Optional[Tuple[Dict[str, Any], List[np.ndarray]]]:
+        """
+        :param sock: the connected socket
+        :param max_message_bytes: the maximum byte size of the header and of the arrays of the message,
+                                  None means 'unlimited', e. g. for receiving the responses of a trusted server
+        :return: None if the peer closed the connection before a new message, otherwise the header and the arrays
+        :raises WordEmbeddingProtocolError: if the message is malformed or larger than max_message_bytes
+        """
+        length_size: int = struct.calcsize(WordEmbeddingProtocol.__LENGTH_FORMAT)
+        length_bytes = bytearray(length_size)
+        if not WordEmbeddingProtocol.__receive_into(sock, memoryview(length_bytes), allow_eof=True):
+            return None
+        header_size: int = struct.unpack(WordEmbeddingProtocol.__LENGTH_FORMAT, length_bytes)[0]
+        if max_message_bytes is not None and header_size > max_message_bytes:
+            raise WordEmbeddingProtocolError(
+                f"header of {header_size} bytes exceeds {max_message_bytes} bytes", connection_usable=False)
+        header_bytes = bytearray(header_size)
+        WordEmbeddingProtocol.__receive_into(sock, memoryview(header_bytes))
+        try:
+            header: Dict[str, Any] = json.loads(header_bytes.decode('utf-8'))
+            array_specs: List[Tuple[np.dtype, Tuple[int, ...]]] = [
+                WordEmbeddingProtocol.__parse_array_spec(array_spec) for array_spec in header.pop("arrays")]
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            raise WordEmbeddingProtocolError(f"malformed header: {e}", connection_usable=False)
+        arrays_bytes: int = 0
+        for dtype, shape in array_specs:
+            array_bytes: int = dtype.itemsize
+            for size in shape:
+                array_bytes *= size  # Python ints, so that no shape overflows the check
+            arrays_bytes += array_bytes
+        if max_message_bytes is not None and arrays_bytes > max_message_bytes - header_size:
+            WordEmbeddingProtocol.__discard(sock, arrays_bytes)  # keeps the connection usable for the next message
+            raise WordEmbeddingProtocolError(
+                f"message of {header_size + arrays_bytes} bytes exceeds {max_message_bytes} bytes",
+                connection_usable=True)
+        arrays: List[np.ndarray] = []
+        for dtype, shape in array_specs:
+            array = np.empty(shape=shape, dtype=dtype)
+            if array.nbytes > 0:
+                WordEmbeddingProtocol.__receive_into(sock, memoryview(array.reshape(-1).view(np.uint8)))
+            arrays.append(array)
+        return header, arrays
+
+    @staticmethod
+    def encode_texts(texts: Sequence[str]) -> List[np.ndarray]:
+        """
+        :param texts: the texts to send
+        :return: the uint8 array of the concatenated UTF-8 encoded texts, the int64 array of their offsets
+        """
+        encoded_texts: List[bytes] = [text.encode('utf-8') for text in texts]
+        offsets = np.zeros(shape=len(encoded_texts) + 1, dtype=np.int64)
+        np.cumsum([len(encoded_text) for encoded_text in encoded_texts], out=offsets[1:])
+        return [np.frombuffer(b''.join(encoded_texts), dtype=np.uint8), offsets]
+
+    @staticmethod
+    def decode_texts(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+        """
+        :param blob: the uint8 array of the concatenated UTF-8 encoded texts
+        :param offsets: the int64 array of their offsets
+        :return: the texts
+        """
+        data: bytes = blob.tobytes()
+        offsets: List[int] = offsets.tolist()
+        return [data[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+
+    @staticmethod
+    def __parse_array_spec(array_spec) -> Tuple[np.dtype, Tuple[int, ...]]:
+        dtype_str, shape = array_spec
+        if dtype_str not in WordEmbeddingProtocol.__DTYPES:
+            raise ValueError(f"unsupported dtype {dtype_str}")
+        if not isinstance(shape, list) or len(shape) > 32 or not all(type(size) is int and size >= 0 for size in shape):
+            raise ValueError(f"invalid shape {shape}")
+        return np.dtype(dtype_str), tuple(shape)
+
+    @staticmethod
+    def __discard(sock: socket.socket, size: int):
+        buffer = memoryview(bytearray(min(size, WordEmbeddingProtocol.__DISCARD_CHUNK_BYTES)))
+        while size > 0:
+            chunk_size: int = min(size, len(buffer))
+            WordEmbeddingProtocol.__receive_into(sock, buffer[:chunk_size])
+            size -= chunk_size
+
+    @staticmethod
+    def __receive_into(sock: socket.socket, buffer: memoryview, allow_eof: bool = False) -> bool:
+        received: int = 0
+        while received < len(buffer):
+            size: int = sock.recv_into(buffer[received:])
+            if size == 0:
+                if allow_eof and received == 0:
+                    return False
+                raise ConnectionError("connection closed in the middle of a message")
+            received += size
+        return True
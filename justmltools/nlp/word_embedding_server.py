@@ -0,0 +1,146 @@
+import errno
+import os
+import socket
+import socketserver
+import stat
+import threading
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+from justmltools.nlp.word_embedder import WordEmbedder
+from justmltools.nlp.word_embedding_protocol import WordEmbeddingProtocol, WordEmbeddingProtocolError
+
+
+class WordEmbeddingServer:
+    """ answers tokenize, embed and pool requests of WordEmbeddingClients in other processes on the same host
+        over a Unix domain socket, so that one long-lived process holds the only copy of the vocabulary and the
+        embedding matrix, and model processes start without loading any embeddings.
+
+        Each client connection is served by its own thread, the messages are framed by WordEmbeddingProtocol:
+
+        with WordEmbeddingServer(word_embedder, socket_path="/tmp/embeddings.sock") as server:
+            server.serve_forever()
+    """
+
+    def __init__(self, word_embedder: WordEmbedder, socket_path: str, max_request_bytes: int = 256 * 1024 * 1024):
+        """
+        :param word_embedder: the word embedder to answer requests with
+        :param socket_path: the file system path of the Unix domain socket, a socket left over from a server which
+                            did not shut down cleanly is replaced, whereas FileExistsError is raised for any other file
+                            and OSError (EADDRINUSE) for the socket of a running server
+        :param max_request_bytes: the maximum byte size of a request, larger requests are answered with an error
+                                  without allocating memory for them
+        """
+        self.__word_embedder: WordEmbedder = word_embedder
+        self.__max_request_bytes: int = max_request_bytes
+        self.__socket_path: str = socket_path
+        self.__remove_stale_socket(socket_path)
+        server = self
+
+        class RequestHandler(socketserver.BaseRequestHandler):
+            def handle(self):
+                server.handle_connection(self.request)
+
+        self.__server = socketserver.ThreadingUnixStreamServer(socket_path, RequestHandler)
+        self.__server.daemon_threads = True
+        self.__thread: Optional[threading.Thread] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+        return False
+
+    def get_socket_path(self) -> str:
+        return self.__socket_path
+
+    def serve_forever(self):
+        """
+        serves requests until shutdown is called from another thread
+        """
+        print(f"serving word embeddings on {self.__socket_path}")
+        self.__server.serve_forever()
+
+    def start(self):
+        """
+        serves requests in a background thread until shutdown is called
+        """
+        self.__thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.__thread.start()
+
+    def shutdown(self):
+        """
+        stops serving requests and removes the socket file
+        """
+        if self.__thread is not None:
+            self.__server.shutdown()
+            self.__thread.join()
+            self.__thread = None
+        self.__server.server_close()
+        if os.path.exists(self.__socket_path):
+            os.remove(self.__socket_path)
+
+    @staticmethod
+    def __remove_stale_socket(socket_path: str):
+        """
+        removes the socket file of a server which did not shut down cleanly, i. e. nothing accepts connections on it
+        """
+        try:
+            mode: int = os.stat(socket_path).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise FileExistsError(errno.EEXIST, "not a socket, refusing to replace it", socket_path)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(socket_path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                if os.path.exists(socket_path):
+                    os.remove(socket_path)
+                return
+        raise OSError(errno.EADDRINUSE, "another server is listening on the socket", socket_path)
+
+    def handle_connection(self, sock):
+        """
+        answers the requests of a client connection until the client closes it
+        """
+        while True:
+            try:
+                message = WordEmbeddingProtocol.receive_message(sock, self.__max_request_bytes)
+            except WordEmbeddingProtocolError as e:  # report the invalid request, the client may send valid ones
+                WordEmbeddingProtocol.send_message(sock, {"error": f"{type(e).__name__}: {e}"})
+                if e.connection_usable:
+                    continue
+                return  # the start of the next request is unknown
+            if message is None:
+                return
+            header, arrays = message
+            try:
+                response_header, response_arrays = self.__answer(header, arrays)
+            except Exception as e:  # report the error to the client and keep serving
+                response_header, response_arrays = {"error": f"{type(e).__name__}: {e}"}, []
+            WordEmbeddingProtocol.send_message(sock, response_header, response_arrays)
+
+    def __answer(self, header: Dict[str, Any], arrays: List[np.ndarray]) -> Tuple[Dict[str, Any], List[np.ndarray]]:
+        operation: str = header["operation"]
+        if operation == 'info':
+            return {"embedding_dim": self.__word_embedder.embedding_dim()}, []
+        texts: List[str] = WordEmbeddingProtocol.decode_texts(arrays[0], arrays[1])
+        if operation == 'tokenize':
+            return {}, list(self.__word_embedder.tokenize_texts_flat(texts))
+        if operation == 'embed':
+            # sends the padded embedding tensor once, the client slices the views for all context offsets from it
+            context_offsets: List[int] = header["context_offsets"]
+            left_padding: int = max(0, -min(context_offsets))
+            right_padding: int = max(0, max(context_offsets))
+            token_vectors = self.__word_embedder.tokenize_texts(texts)
+            embedding_tensor = np.empty(
+                shape=(len(texts), left_padding + token_vectors.shape[1] + right_padding,
+                       self.__word_embedder.embedding_dim()),
+                dtype='float32')
+            self.__word_embedder.embed_token_vectors(token_vectors, out=embedding_tensor, context_offsets=context_offsets)
+            return {"left_padding": left_padding, "sequence_length": token_vectors.shape[1]}, [embedding_tensor]
+        if operation == 'pool':
+            idf_weights: Optional[np.ndarray] = arrays[2] if len(arrays) > 2 else None
+            return {}, [self.__word_embedder.embed_texts_pooled(texts, header["pooling"], idf_weights)]
+        raise ValueError(f"unknown operation {operation}")
@@ -0,0 +1,217 @@
+import numpy as np
+from typing import Optional, Tuple
+
+
+class WordSimilarityIndex:
+    """ finds the k most similar words of a batch of query vectors by cosine similarity,
+        e. g. for "most similar words" or for expanding queries with synonyms, see WordEmbedder.most_similar_words.
+
+        The rows 1..n of the embedding matrix are normalized to unit length once, so that the cosine similarities
+        of a batch of queries are a single matrix multiplication (BLAS), and the top k of each query are selected with
+        argpartition instead of sorting all similarities. The rows are processed in chunks of chunk_rows rows and the
+        queries in batches of query_batch_size queries, which bounds the temporary memory to
+        chunk_rows * query_batch_size similarities for the exact as well as for the approximate search, the normalized
+        rows take as much memory as a float32 embedding matrix.
+
+        The exact search compares each query with all rows. For large vocabularies, build_clusters adds an approximate
+        search (IVF, inverted file index): the rows are clustered with spherical k-means, stored grouped by cluster,
+        and a query is only compared with the rows of the number_of_probes clusters with the most similar centroids.
+    """
+
+    def __init__(self, embedding_matrix, chunk_rows: int = 16384, query_batch_size: int = 256):
+        """
+        :param embedding_matrix: the embedding matrix including the zero vector row 0, which is never returned,
+                                 a numpy.ndarray, a numpy.memmap or a QuantizedEmbeddingMatrix
+        :param chunk_rows: the number of rows to compare the queries with at once
+        :param query_batch_size: the number of queries to compare with the rows at once
+        """
+        self.__chunk_rows: int = chunk_rows
+        self.__query_batch_size: int = query_batch_size
+        number_of_rows: int = embedding_matrix.shape[0] - 1
+        self.__vectors = np.empty(shape=(number_of_rows, embedding_matrix.shape[1]), dtype='float32')
+        for start in range(0, number_of_rows, chunk_rows):
+            end: int = min(start + chunk_rows, number_of_rows)
+            self.__vectors[start:end] = self.normalize(embedding_matrix.take(np.arange(start + 1, end + 1), axis=0))
+        self.__word_indexes = np.arange(1, number_of_rows + 1, dtype=np.int32)  # the word index of each vector
+        self.__centroids: Optional[np.ndarray] = None
+        self.__cluster_offsets: Optional[np.ndarray] = None  # the first vector of each cluster plus the end
+
+    def __len__(self) -> int:
+        return self.__vectors.shape[0]
+
+    @staticmethod
+    def normalize(vectors: np.ndarray) -> np.ndarray:
+        """
+        :param vectors: the vectors to normalize, the rows of a 2 dimensional array
+        :return: float32 numpy.ndarray of the vectors scaled to unit length, zero vectors stay zero vectors
+        """
+        vectors = np.asarray(vectors, dtype='float32')
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1)
+
+    def get_number_of_clusters(self) -> int:
+        """
+        :return: the number of clusters built by build_clusters, 0 if there are none
+        """
+        return 0 if self.__centroids is None else self.__centroids.shape[0]
+
+    def build_clusters(self,
+                       number_of_clusters: Optional[int] = None,
+                       number_of_iterations: int = 10,
+                       sample_size: Optional[int] = None,
+                       seed: int = 0):
+        """
+        clusters the rows with spherical k-means for the approximate search
+
+        :param number_of_clusters: the number of clusters, None means 'the square root of the number of rows',
+                                   e. g. about 1400 clusters of about 1400 rows each for 2M words
+        :param number_of_iterations: the number of k-means iterations
+        :param sample_size: the number of randomly sampled rows to train the centroids with,
+                            None means '64 rows per cluster', all rows are assigned to their clusters afterwards
+        :param seed: the seed of the random sampling
+        """
+        number_of_rows: int = len(self)
+        if number_of_clusters is None:
+            number_of_clusters = int(np.sqrt(number_of_rows))
+        number_of_clusters = max(1, min(number_of_clusters, number_of_rows))
+        sample_size = min(number_of_rows, sample_size or 64 * number_of_clusters)
+        print(f"clustering {number_of_rows} word vectors into {number_of_clusters} clusters...")
+        rng = np.random.default_rng(seed)
+        sample = self.__vectors[np.sort(rng.choice(number_of_rows, size=sample_size, replace=False))]
+        centroids = sample[rng.choice(sample_size, size=number_of_clusters, replace=False)]
+        for _ in range(number_of_iterations):
+            assignments = self.__assign(sample, centroids)
+            order = np.argsort(assignments, kind='stable')
+            sizes = np.bincount(assignments, minlength=number_of_clusters)
+            non_empty = np.nonzero(sizes)[0]
+            starts = (np.cumsum(sizes) - sizes)[non_empty]
+            centroids[non_empty] = self.normalize(np.add.reduceat(sample[order], starts, axis=0))
+            empty = np.nonzero(sizes == 0)[0]
+            centroids[empty] = sample[rng.choice(sample_size, size=empty.shape[0], replace=False)]  # restart them
+
+        # store the vectors grouped by cluster, so that the vectors of a cluster are one contiguous slice
+        assignments = self.__assign(self.__vectors, centroids)
+        order = np.argsort(assignments, kind='stable')
+        self.__vectors = self.__vectors[order]
+        self.__word_indexes = self.__word_indexes[order]
+        self.__cluster_offsets = np.zeros(shape=number_of_clusters + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignments, minlength=number_of_clusters), out=self.__cluster_offsets[1:])
+        self.__centroids = centroids
+        print(f"clustered {number_of_rows} word vectors, the largest cluster has "
+              f"{int(np.diff(self.__cluster_offsets).max())} word vectors")
+
+    def search(self,
+               query_vectors: np.ndarray,
+               k: int = 10,
+               number_of_probes: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        finds the k rows with the highest cosine similarity to each query vector
+
+        :param query_vectors: the query vectors, the rows of a 2 dimensional array, they do not need to be normalized
+        :param k: the number of most similar rows to find per query
+        :param number_of_probes: the number of clusters to search for the approximate search (see build_clusters),
+                                 None means 'exact search', more probes find more of the exact results, but take longer
+        :return: int32 numpy.ndarray of shape (len(query_vectors), k) of the word indexes of the most similar rows,
+                 float32 numpy.ndarray of shape (len(query_vectors), k) of their cosine similarities,
+                 both ordered by descending similarity,
+                 k is reduced to the number of rows if there are fewer rows, and if the approximate search finds fewer
+                 than k rows, the missing results are padded with word index 0 and similarity -inf
+        """
+        if number_of_probes is not None and self.__centroids is None:
+            raise ValueError("number_of_probes requires the clusters of build_clusters")
+        query_vectors = self.normalize(query_vectors)
+        k = max(0, min(k, len(self)))
+        word_indexes = np.zeros(shape=(query_vectors.shape[0], k), dtype=np.int32)
+        similarities = np.full(shape=(query_vectors.shape[0], k), fill_value=-np.inf, dtype='float32')
+        for start in range(0, query_vectors.shape[0], self.__query_batch_size):
+            query_batch = query_vectors[start:start + self.__query_batch_size]
+            if number_of_probes is None:
+                positions, batch_similarities = self.__search_exact(query_batch, k)
+            else:
+                positions, batch_similarities = self.__search_clusters(query_batch, k, number_of_probes)
+            found = positions >= 0  # the probed clusters may have fewer than k rows
+            batch_slice = np.s_[start:start + query_batch.shape[0], :positions.shape[1]]
+            word_indexes[batch_slice][found] = self.__word_indexes[positions[found]]
+            similarities[batch_slice][found] = batch_similarities[found]
+        return word_indexes, similarities
+
+    def __search_exact(self, query_batch: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        best_positions = np.zeros(shape=(query_batch.shape[0], 0), dtype=np.int64)
+        best_similarities = np.zeros(shape=(query_batch.shape[0], 0), dtype='float32')
+        for start in range(0, len(self), self.__chunk_rows):
+            positions, similarities = self.__top_k(query_batch @ self.__vectors[start:start + self.__chunk_rows].T, k)
+            best_positions, best_similarities = self.__top_k(
+                np.concatenate([best_similarities, similarities], axis=1), k,
+                np.concatenate([best_positions, positions + start], axis=1))
+        return self.__sort(best_positions, best_similarities)
+
+    def __search_clusters(self, query_batch: np.ndarray, k: int, number_of_probes: int
+                          ) -> Tuple[np.ndarray, np.ndarray]:
+        probes, _ = self.__top_k(query_batch @ self.__centroids.T, number_of_probes)
+        number_of_probes = probes.shape[1]
+        offsets = self.__cluster_offsets
+
+        # the top k candidates of each probed cluster, candidate_similarities[query, probe, candidate],
+        # their memory does not depend on the cluster sizes
+        candidate_positions = np.full(shape=(query_batch.shape[0], number_of_probes, k), fill_value=-1, dtype=np.int64)
+        candidate_similarities = np.full(shape=candidate_positions.shape, fill_value=-np.inf, dtype='float32')
+
+        # compare each probed cluster with all queries probing it at once, in chunks of at most chunk_rows rows,
+        # so that large clusters do not need more temporary memory than the exact search
+        flat_probes = probes.reshape(-1)
+        order = np.argsort(flat_probes, kind='stable')
+        clusters, starts = np.unique(flat_probes[order], return_index=True)
+        for cluster, pairs in zip(clusters.tolist(), np.split(order, starts[1:])):
+            query_indexes, probe_indexes = np.divmod(pairs, number_of_probes)
+            cluster_queries = query_batch[query_indexes]
+            cluster_start, cluster_end = int(offsets[cluster]), int(offsets[cluster + 1])
+            best_positions = np.zeros(shape=(query_indexes.shape[0], 0), dtype=np.int64)
+            best_similarities = np.zeros(shape=(query_indexes.shape[0], 0), dtype='float32')
+            for start in range(cluster_start, cluster_end, self.__chunk_rows):
+                positions, similarities = self.__top_k(
+                    cluster_queries @ self.__vectors[start:min(start + self.__chunk_rows, cluster_end)].T, k)
+                if best_positions.shape[1] == 0:
+                    best_positions, best_similarities = positions + start, similarities
+                else:
+                    best_positions, best_similarities = self.__top_k(
+                        np.concatenate([best_similarities, similarities], axis=1), k,
+                        np.concatenate([best_positions, positions + start], axis=1))
+            candidate_positions[query_indexes, probe_indexes, :best_positions.shape[1]] = best_positions
+            candidate_similarities[query_indexes, probe_indexes, :best_positions.shape[1]] = best_similarities
+
+        best_positions, best_similarities = self.__top_k(
+            candidate_similarities.reshape(query_batch.shape[0], -1), k,
+            candidate_positions.reshape(query_batch.shape[0], -1))
+        return self.__sort(best_positions, best_similarities)  # -1 if fewer than k rows in the probed clusters
+
+    def __assign(self, vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """
+        :return: the index of the most similar centroid of each vector
+        """
+        assignments = np.empty(shape=vectors.shape[0], dtype=np.int64)
+        for start in range(0, vectors.shape[0], self.__chunk_rows):
+            assignments[start:start + self.__chunk_rows] = np.argmax(
+                vectors[start:start + self.__chunk_rows] @ centroids.T, axis=1)
+        return assignments
+
+    @staticmethod
+    def __top_k(similarities: np.ndarray, k: int, positions: Optional[np.ndarray] = None
+                ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :param similarities: 2 dimensional similarities
+        :param k: the number of highest similarities to select per row
+        :param positions: the positions of the similarities, None means 'the column indexes'
+        :return: the positions and the similarities of the k highest similarities of each row, in any order
+        """
+        number_of_columns: int = similarities.shape[1]
+        if number_of_columns <= k:
+            selected = np.broadcast_to(np.arange(number_of_columns), similarities.shape)
+        else:
+            selected = np.argpartition(similarities, number_of_columns - k, axis=1)[:, number_of_columns - k:]
+        return (selected if positions is None else np.take_along_axis(positions, selected, axis=1),
+                np.take_along_axis(similarities, selected, axis=1))
+
+    @staticmethod
+    def __sort(positions: np.ndarray, similarities: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        order = np.argsort(-similarities, axis=1, kind='stable')
+        return np.take_along_axis(positions, order, axis=1), np.take_along_axis(similarities, order, axis=1)
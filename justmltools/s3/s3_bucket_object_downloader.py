@@ -3,11 +3,15 @@ import errno
 import os
 import pathlib
 
-from typing import Optional
+from botocore.exceptions import ClientError
+from typing import Any, Dict, Optional, Tuple
 from justmltools.s3.aws_credentials import AwsCredentials
 
 
 class S3BucketObjectDownloader:
+    """ downloads objects from S3 buckets, get and get_metadata may be called from several threads at once,
+        as they use the thread-safe client of the (not thread-safe) boto3 resource
+    """
 
     def __init__(self, credentials: Optional[AwsCredentials] = None):
         if credentials is None:
@@ -41,13 +45,46 @@ class S3BucketObjectDownloader:
             if not os.path.isdir(target_path_and_name):
                 pathlib.Path(target_path_and_name).mkdir(parents=True, exist_ok=True)
 
-    def get(self, bucket: str, key: str):
+    def get(self,
+            bucket: str,
+            key: str,
+            byte_range: Optional[Tuple[int, int]] = None,
+            if_match: Optional[str] = None):
         """
         Gets object body from s3 bucket
 
         :param bucket: Name of the S3 bucket
         :param key: Key of the S3 object to download
+        :param byte_range: the start and end (exclusive) offset of the bytes to get (optional),
+            None means the whole object
+        :param if_match: the entity tag the object must still have (optional), e. g. from get_metadata,
+            so that all parts of an object downloaded with several ranged GETs are from the same version of it,
+            IOError is raised if the object has changed
         :return: botocore.response.StreamingBody
         """
-        body = self.__s3.Object(bucket, key).get()["Body"]
-        return body
+        arguments: Dict[str, str] = {"Bucket": bucket, "Key": key}
+        if byte_range is not None:
+            arguments["Range"] = f"bytes={byte_range[0]}-{byte_range[1] - 1}"
+        if if_match is not None:
+            arguments["IfMatch"] = if_match
+        try:
+            return self.__s3.meta.client.get_object(**arguments)["Body"]
+        except ClientError as error:
+            if error.response.get("Error", {}).get("Code") == "PreconditionFailed":
+                raise IOError(f"s3://{bucket}/{key} has changed, its entity tag is not {if_match} anymore") from error
+            raise
+
+    def get_metadata(self, bucket: str, key: str) -> Dict[str, Any]:
+        """
+        Gets the metadata of an object in s3 bucket without getting its body
+
+        :param bucket: Name of the S3 bucket
+        :param key: Key of the S3 object
+        :return: dict with the size in bytes, the entity tag and the last modification time of the object
+        """
+        response: Dict[str, Any] = self.__s3.meta.client.head_object(Bucket=bucket, Key=key)
+        return {
+            "size": response["ContentLength"],
+            "etag": response["ETag"],
+            "last_modified": response["LastModified"].isoformat()
+        }
@@ -0,0 +1,92 @@
+import io
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Optional
+from collections import deque
+
+from justmltools.s3.s3_bucket_object_downloader import S3BucketObjectDownloader
+from justmltools.s3.s3_url import S3Url
+
+
+class S3ObjectStream(io.RawIOBase):
+    """ a read-only binary stream of the body of an S3 object, downloaded with parallel ranged GETs.
+
+        The object is split into parts which a pool of threads downloads ahead of the reader in parallel,
+        bounded by the number of parts in flight, and which are read in their order,
+        so that downloading overlaps with processing the object's content, e. g. parsing it.
+        Each part is only downloaded if the object still has the entity tag it had when the stream was opened,
+        otherwise reading fails with IOError instead of mixing parts of different versions of the object.
+    """
+
+    def __init__(self,
+                 s3_url: S3Url,
+                 downloader: Optional[S3BucketObjectDownloader] = None,
+                 size: Optional[int] = None,
+                 part_size: int = 8 << 20,
+                 number_of_threads: int = 8,
+                 etag: Optional[str] = None):
+        """
+        :param s3_url: the S3 URL of the object
+        :param downloader: the downloader to get the parts with (optional)
+        :param size: the size of the object in bytes, None means 'get it from the object's metadata'
+        :param part_size: the number of bytes to get per ranged GET
+        :param number_of_threads: the number of parts downloaded in parallel,
+            at most twice as many parts are held in memory
+        :param etag: the entity tag of the object, None means 'get it from the object's metadata',
+            size and etag must be from the same metadata
+        """
+        super().__init__()
+        self.__s3_url: S3Url = s3_url
+        self.__downloader: S3BucketObjectDownloader = downloader or S3BucketObjectDownloader()
+        if size is None or etag is None:
+            metadata = self.__downloader.get_metadata(s3_url.bucket, s3_url.key)
+            size, etag = metadata["size"], metadata["etag"]
+        self.__size: int = size
+        self.__etag: str = etag
+        self.__part_size: int = part_size
+        self.__max_parts_in_flight: int = 2 * number_of_threads
+        self.__executor = ThreadPoolExecutor(max_workers=number_of_threads)
+        self.__parts_in_flight: Deque[Future] = deque()
+        self.__next_part_start: int = 0
+        self.__part: memoryview = memoryview(b'')
+        self.__submit_parts()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while len(self.__part) == 0:
+            if not self.__parts_in_flight:
+                return 0
+            self.__part = memoryview(self.__parts_in_flight.popleft().result())
+            self.__submit_parts()
+        size: int = min(len(buffer), len(self.__part))
+        buffer[:size] = self.__part[:size]
+        self.__part = self.__part[size:]
+        return size
+
+    def close(self):
+        if not self.closed:
+            for part in self.__parts_in_flight:
+                part.cancel()
+            self.__parts_in_flight.clear()
+            self.__executor.shutdown(wait=True)
+        super().close()
+
+    def __submit_parts(self):
+        while len(self.__parts_in_flight) < self.__max_parts_in_flight and self.__next_part_start < self.__size:
+            part_end: int = min(self.__next_part_start + self.__part_size, self.__size)
+            self.__parts_in_flight.append(
+                self.__executor.submit(self.__get_part, self.__next_part_start, part_end))
+            self.__next_part_start = part_end
+
+    def __get_part(self, start: int, end: int) -> bytes:
+        body = self.__downloader.get(self.__s3_url.bucket, self.__s3_url.key, byte_range=(start, end),
+                                     if_match=self.__etag)
+        try:
+            part: bytes = body.read()
+        finally:
+            body.close()
+        if len(part) != end - start:
+            raise IOError(f"got {len(part)} bytes instead of {end - start} "
+                          f"from s3://{self.__s3_url.bucket}/{self.__s3_url.key} at offset {start}")
+        return part
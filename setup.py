@@ -18,10 +18,11 @@ setuptools.setup(
     url="https://github.com/BigNerd/justmltools",
     packages=setuptools.find_packages(include=("justmltools", "justmltools.*")),
     install_requires=requirements,
+    extras_require={"zstd": ["zstandard"]},
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    python_requires='>=3.7',
+    python_requires='>=3.8',
 )
@@ -0,0 +1,87 @@
+import numpy as np
+from unittest import TestCase
+from justmltools.nlp.batch_tokenizer import BatchTokenizer
+from justmltools.nlp.compact_word_vocabulary import CompactWordVocabulary
+
+
+class TestBatchTokenizer(TestCase):
+
+    word_2_index_dict = {"the": 1, "quick": 2, "brown": 3, "fox": 4}
+
+    def test_text_to_word_list(self):
+        sut = BatchTokenizer()
+        self.assertEqual(["The", "quick", "brown", "fox"], sut.text_to_word_list("The quick,brown\tfox!"))
+        self.assertEqual([], sut.text_to_word_list(" ... "))
+
+        sut = BatchTokenizer(filters=",", lower=True)
+        self.assertEqual(["the", "quick", "brown\tfox!"], sut.text_to_word_list("The quick,brown\tfox!"))
+
+    def test_tokenize(self):
+        sut = BatchTokenizer(lower=True)
+        tokens, offsets = sut.tokenize(["The quick fox", "", "jumps", "brown, brown fox."], self.word_2_index_dict)
+        self.assertEqual(np.int32, tokens.dtype)
+        self.assertEqual(np.int64, offsets.dtype)
+        np.testing.assert_array_equal([1, 2, 4, 3, 3, 4], tokens)
+        np.testing.assert_array_equal([0, 3, 3, 3, 6], offsets)
+
+    def test_tokenize_statistics(self):
+        for word_2_index in [self.word_2_index_dict, CompactWordVocabulary.build(["the", "quick", "brown", "fox"])]:
+            statistics = {}
+            BatchTokenizer(lower=True).tokenize(["The quick fox", "", "jumps", "brown, brown fox."], word_2_index,
+                                                statistics=statistics)
+            self.assertEqual({"words": 7, "tokens": 6}, statistics)
+
+    def test_tokenize_byte_level(self):
+        words = ["the", "quick", "straße", "σοφός", "日本", "fox"]
+        texts = ["The quick, STRASSE straße!", "", "ΣΟΦΌΣ\tσοφός/日本-fox", "日本日本 \ud800 fox", "  "]
+        vocabulary = CompactWordVocabulary.build(words)
+        for lower in [False, True]:
+            expected = BatchTokenizer(lower=lower).tokenize(texts, {word: index + 1 for index, word in enumerate(words)})
+            statistics = {}
+            actual = BatchTokenizer(lower=lower, byte_level=True).tokenize(texts, vocabulary, statistics=statistics)
+            np.testing.assert_array_equal(expected[0], actual[0])
+            np.testing.assert_array_equal(expected[1], actual[1])
+            self.assertEqual(sum(len(BatchTokenizer().text_to_word_list(text)) for text in texts),
+                             statistics["words"])
+        tokens, offsets = BatchTokenizer(byte_level=True).tokenize([], vocabulary)
+        self.assertEqual(0, tokens.shape[0])
+        np.testing.assert_array_equal([0], offsets)
+        with self.assertRaises(ValueError):
+            BatchTokenizer(filters="«»", byte_level=True)
+
+    def test_tokenize_without_texts(self):
+        tokens, offsets = BatchTokenizer().tokenize([], self.word_2_index_dict)
+        self.assertEqual(0, tokens.shape[0])
+        np.testing.assert_array_equal([0], offsets)
+        self.assertEqual((0, 5), BatchTokenizer.pad(tokens, offsets, sequence_length=5).shape)
+
+    def test_pad(self):
+        tokens = np.asarray([1, 2, 4, 3, 3, 4], dtype=np.int32)
+        offsets = np.asarray([0, 3, 3, 3, 6], dtype=np.int64)
+        padded = BatchTokenizer.pad(tokens, offsets, sequence_length=4)
+        self.assertEqual(np.int32, padded.dtype)
+        np.testing.assert_array_equal([[1, 2, 4, 0], [0, 0, 0, 0], [0, 0, 0, 0], [3, 3, 4, 0]], padded)
+
+    def test_pad_with_truncation(self):
+        tokens = np.asarray([1, 2, 4, 3, 3, 4], dtype=np.int32)
+        offsets = np.asarray([0, 3, 3, 6], dtype=np.int64)
+        padded = BatchTokenizer.pad(tokens, offsets, sequence_length=2)
+        np.testing.assert_array_equal([[1, 2], [0, 0], [3, 3]], padded)
+
+    def test_truncate(self):
+        tokens = np.asarray([1, 2, 4, 3, 3, 4], dtype=np.int32)
+        offsets = np.asarray([0, 3, 3, 6], dtype=np.int64)
+        truncated_tokens, truncated_offsets = BatchTokenizer.truncate(tokens, offsets, sequence_length=2)
+        np.testing.assert_array_equal([1, 2, 3, 3], truncated_tokens)
+        np.testing.assert_array_equal([0, 2, 2, 4], truncated_offsets)
+
+        truncated_tokens, truncated_offsets = BatchTokenizer.truncate(tokens, offsets, sequence_length=3)
+        self.assertIs(tokens, truncated_tokens)
+        self.assertIs(offsets, truncated_offsets)
+
+    def test_select(self):
+        tokens = np.asarray([1, 2, 4, 3, 3, 4], dtype=np.int32)
+        offsets = np.asarray([0, 3, 3, 6], dtype=np.int64)
+        selected_tokens, selected_offsets = BatchTokenizer.select(tokens, offsets, np.asarray([2, 1, 0]))
+        np.testing.assert_array_equal([3, 3, 4, 1, 2, 4], selected_tokens)
+        np.testing.assert_array_equal([0, 3, 3, 6], selected_offsets)
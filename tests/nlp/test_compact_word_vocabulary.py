@@ -0,0 +1,58 @@
+import numpy as np
+from unittest import TestCase
+from justmltools.nlp.compact_word_vocabulary import CompactWordVocabulary
+
+
+class TestCompactWordVocabulary(TestCase):
+
+    words = ["der", "die", "das", "zürich", "„sekunde", "døttre", "der", "winterthur"]
+
+    def setUp(self) -> None:
+        self.sut = CompactWordVocabulary.build(self.words)
+        self.word_2_index_dict = {word: index + 1 for index, word in enumerate(self.words)}
+
+    def test_build(self):
+        self.assertEqual(len(self.word_2_index_dict), len(self.sut))
+        self.assertEqual(7, self.sut["der"])  # the last occurrence wins like for a dict
+        for word, index in self.word_2_index_dict.items():
+            self.assertIn(word, self.sut)
+            self.assertEqual(index, self.sut.get(word))
+        self.assertNotIn("Der", self.sut)
+        self.assertIsNone(self.sut.get("unbekannt"))
+        with self.assertRaises(KeyError):
+            _ = self.sut["unbekannt"]
+
+    def test_lookup(self):
+        words = ["das", "unbekannt", "døttre", "", "der", "winterthur", "zürich", "„sekunde", "das"]
+        expected = [self.word_2_index_dict.get(word, 0) for word in words]
+        np.testing.assert_array_equal(expected, self.sut.lookup(words))
+        self.assertEqual(np.int32, self.sut.lookup(words).dtype)
+        self.assertEqual(0, self.sut.lookup([]).shape[0])
+
+    def test_lookup_many_words(self):
+        words = [f"wort{i}" for i in range(10000)]
+        sut = CompactWordVocabulary.build(words)
+        queries = [f"wort{i}" for i in range(0, 20000, 3)]
+        expected = [i + 1 if i < 10000 else 0 for i in range(0, 20000, 3)]
+        np.testing.assert_array_equal(expected, sut.lookup(queries))
+
+    def test_word_at(self):
+        self.assertEqual("das", self.sut.word_at(3))
+        self.assertIsNone(self.sut.word_at(1))  # "der" moved to index 7
+        self.assertIsNone(self.sut.word_at(100))
+        self.assertEqual(["", "die", "das", "zürich", "„sekunde", "døttre", "der", "winterthur"],
+                         self.sut.to_word_list(len(self.words)))
+        self.assertEqual(["die", "das", "zürich", "„sekunde", "døttre", "der", "winterthur"], list(self.sut))
+
+    def test_from_arrays(self):
+        sut = CompactWordVocabulary.from_arrays(self.sut.to_arrays())
+        np.testing.assert_array_equal(self.sut.lookup(self.words), sut.lookup(self.words))
+        self.assertEqual(self.sut.nbytes, sut.nbytes)
+        with self.assertRaises(ValueError):
+            CompactWordVocabulary.from_arrays({"blob": self.sut.to_arrays()["blob"]})
+
+    def test_empty_vocabulary(self):
+        sut = CompactWordVocabulary.build([])
+        self.assertEqual(0, len(sut))
+        self.assertIsNone(sut.get("der"))
+        np.testing.assert_array_equal([0, 0], sut.lookup(["der", "die"]))
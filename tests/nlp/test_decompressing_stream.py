@@ -0,0 +1,53 @@
+import gzip
+import io
+import lzma
+from unittest import TestCase, skipUnless
+from justmltools.nlp.decompressing_stream import DecompressingStream
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class TestDecompressingStream(TestCase):
+
+    content: bytes = ''.join(f"zeile {i} mit etwas text\n" for i in range(20000)).encode('utf-8')
+
+    def test_get_compression(self):
+        self.assertEqual('gzip', DecompressingStream.get_compression("cc.de.300.vec.gz"))
+        self.assertEqual('xz', DecompressingStream.get_compression("cc.de.300.vec.xz"))
+        self.assertEqual('zstd', DecompressingStream.get_compression("cc.de.300.vec.zst"))
+        self.assertIsNone(DecompressingStream.get_compression("cc.de.300.vec"))
+
+    def test_gzip(self):
+        compressed: bytes = gzip.compress(self.content[:1000]) + gzip.compress(self.content[1000:])  # two members
+        self.assert_decompresses(compressed, 'gzip')
+
+    def test_xz(self):
+        self.assert_decompresses(lzma.compress(self.content), 'xz')
+
+    @skipUnless(zstandard, "requires zstandard")
+    def test_zstd(self):
+        self.assert_decompresses(zstandard.ZstdCompressor().compress(self.content), 'zstd')
+
+    def test_truncated(self):
+        compressed: bytes = gzip.compress(self.content)
+        with DecompressingStream(io.BytesIO(compressed[:len(compressed) // 2]), 'gzip') as sut:
+            with self.assertRaises(EOFError):
+                sut.read()
+
+    def test_close_early(self):
+        sut = DecompressingStream(io.BytesIO(gzip.compress(self.content)), 'gzip', chunk_size=100, max_queued_chunks=1)
+        self.assertEqual(self.content[:10], sut.read(10))
+        sut.close()
+        self.assertTrue(sut.closed)
+
+    def test_invalid_compression(self):
+        with self.assertRaises(ValueError):
+            DecompressingStream(io.BytesIO(b''), 'bz2')
+
+    def assert_decompresses(self, compressed: bytes, compression: str):
+        with DecompressingStream(io.BytesIO(compressed), compression, chunk_size=4096) as sut:
+            lines = list(io.TextIOWrapper(io.BufferedReader(sut), encoding='utf-8', newline='\n'))
+        self.assertEqual(self.content.decode('utf-8'), ''.join(lines))
@@ -0,0 +1,69 @@
+import os
+import pathlib
+import shutil
+import tempfile
+import numpy as np
+from unittest import TestCase
+from justmltools.nlp.hot_swap_word_embedder import HotSwapWordEmbedder
+from justmltools.nlp.word_embedder import WordEmbedder
+
+
+class TestHotSwapWordEmbedder(TestCase):
+
+    def setUp(self) -> None:
+        dir_path: str = pathlib.Path(__file__).parent.absolute()
+        self.embedding_file_path: str = os.path.join(dir_path, "embedding_wiki_de_tail_100.vec")
+        self.word_embedder = WordEmbedder(self.embedding_file_path, embedding_sequence_length=4)
+        self.sut = HotSwapWordEmbedder(self.word_embedder)
+
+    def tearDown(self) -> None:
+        self.sut.close()
+
+    def test_delegates(self):
+        texts = ["Gallersbach qorig", "Balabin"]
+        np.testing.assert_array_equal(self.word_embedder.embed_texts(texts)[1], self.sut.embed_texts(texts)[1])
+        np.testing.assert_array_equal(self.word_embedder.embed_texts_pooled(texts, pooling='max'),
+                                      self.sut.embed_texts_pooled(texts, pooling='max'))
+        np.testing.assert_array_equal(self.word_embedder.tokenize_texts_flat(texts)[0],
+                                      self.sut.tokenize_texts_flat(texts)[0])
+        self.assertEqual({"swaps": 0, "in_flight": 0, "retired": 0, "retired_in_flight": 0}, self.sut.get_statistics())
+
+    def test_swap_waits_for_calls_in_flight(self):
+        new_word_embedder = WordEmbedder(self.embedding_file_path, embedding_sequence_length=8)
+        with self.sut.acquire() as word_embedder:
+            self.assertIs(self.word_embedder, word_embedder)
+            released = self.sut.swap(new_word_embedder)
+            # new calls use the new word embedder at once, the call in flight keeps using the previous one
+            self.assertIs(new_word_embedder, self.sut.get_word_embedder())
+            self.assertEqual((1, 8, 300), self.sut.embed_texts(["Balabin"])[0].shape)
+            self.assertFalse(released.done())
+            self.assertEqual({"swaps": 1, "in_flight": 0, "retired": 1, "retired_in_flight": 1},
+                             self.sut.get_statistics())
+            self.assertEqual((1, 4, 300), word_embedder.embed_texts(["Balabin"])[0].shape)
+        self.assertTrue(released.done())
+        self.assertEqual(0, self.sut.get_statistics()["retired"])
+
+    def test_swap_without_calls_in_flight(self):
+        released = self.sut.swap(WordEmbedder(self.embedding_file_path, embedding_sequence_length=8))
+        self.assertTrue(released.done())
+
+    def test_swap_in_background(self):
+        cache_dir: str = tempfile.mkdtemp()
+        try:
+            with self.sut.acquire():
+                future = self.sut.swap_in_background(self.embedding_file_path, embedding_sequence_length=8,
+                                                     cache_dir=cache_dir)
+                new_word_embedder = future.result(timeout=60)
+            self.assertIs(new_word_embedder, self.sut.get_word_embedder())
+            self.assertEqual((1, 8, 300), self.sut.embed_texts(["Balabin"])[0].shape)
+            self.assertEqual({"swaps": 1, "in_flight": 0, "retired": 0, "retired_in_flight": 0},
+                             self.sut.get_statistics())
+            self.assertTrue(os.listdir(cache_dir))
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_swap_in_background_failure(self):
+        future = self.sut.swap_in_background("/no/such/embedding.vec")
+        with self.assertRaises(FileNotFoundError):
+            future.result(timeout=60)
+        self.assertIs(self.word_embedder, self.sut.get_word_embedder())
@@ -0,0 +1,87 @@
+import numpy as np
+import os
+import pathlib
+import pickle
+import shutil
+import tempfile
+from unittest import TestCase
+from justmltools.nlp.batch_tokenizer import DEFAULT_FILTERS
+from justmltools.nlp.lazy_embedding_matrix import LazyEmbeddingMatrix
+from justmltools.nlp.word_embedding_cache import WordEmbeddingCache
+from justmltools.nlp.word_embedder import WordEmbedder
+
+
+class TestLazyEmbeddingMatrix(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir: str = tempfile.mkdtemp()
+        self.embedding_file_path: str = os.path.join(self.temp_dir, "embedding.vec")
+        lines = ["12 3"]
+        for i, word in enumerate(["der", "Straße", "zürich/winterthur", "der", "", "(die", "das", "sie", "er", "es"]):
+            lines.append(f"{word} {i}.5 -{i} {i * 100}")
+        lines.insert(4, "malformed 1 2")
+        lines.insert(7, "")
+        lines.append("ende 1 2 3")  # no line break at the end of the file
+        pathlib.Path(self.embedding_file_path).write_text('\n'.join(lines), encoding="utf-8")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def load_sequentially(self, embedding_limit):
+        cache_dir: str = os.path.join(self.temp_dir, "cache")
+        WordEmbedder(embedding_file_path=self.embedding_file_path, embedding_limit=embedding_limit, cache_dir=cache_dir)
+        words, embedding_matrix, _ = WordEmbeddingCache(cache_dir=cache_dir).load(
+            self.embedding_file_path, embedding_limit, DEFAULT_FILTERS)
+        return words, embedding_matrix
+
+    def test_scan_same_as_sequentially(self):
+        for embedding_limit in [None, 1, 2, 5, 8, 100]:
+            expected_words, expected_embedding_matrix = self.load_sequentially(embedding_limit)
+            words, sut = LazyEmbeddingMatrix.scan(self.embedding_file_path, embedding_limit, DEFAULT_FILTERS, 4)
+            self.assertEqual(expected_words, words)
+            self.assertEqual(expected_embedding_matrix.shape, sut.shape)
+            np.testing.assert_array_equal(expected_embedding_matrix, sut.take(np.arange(sut.shape[0])))
+
+    def test_word_embedder_same_as_sequentially(self):
+        with open(self.embedding_file_path, 'a', encoding='utf-8') as embedding_file:
+            # trailing non-ASCII whitespace is stripped, non-ASCII whitespace within the line is no separator
+            embedding_file.write("\nabc 1 2 3\u00a0\nxyz 4 5\u00a06\ngrüße 7 8 9\u2003 \n")
+        expected = WordEmbedder(embedding_file_path=self.embedding_file_path)
+        word_embedder = WordEmbedder(embedding_file_path=self.embedding_file_path, lazy_cached_rows=10)
+        self.assertEqual(expected.vocabulary_size(), word_embedder.vocabulary_size())
+        texts = ["abc grüße Straße", "xyz der ende"]
+        for expected_tokens, tokens in zip(expected.tokenize_texts_flat(texts), word_embedder.tokenize_texts_flat(texts)):
+            np.testing.assert_array_equal(expected_tokens, tokens)
+        np.testing.assert_array_equal(expected.embed_texts(texts)[0], word_embedder.embed_texts(texts)[0])
+
+    def test_take(self):
+        _, embedding_matrix = self.load_sequentially(embedding_limit=None)
+        _, sut = LazyEmbeddingMatrix.scan(self.embedding_file_path, None, DEFAULT_FILTERS, 3)
+        indices = np.asarray([[0, 5, 9], [5, 0, -1]])
+        rows = sut.take(indices, axis=0)
+        self.assertEqual((2, 3, 3), rows.shape)
+        self.assertEqual(np.float32, rows.dtype)
+        np.testing.assert_array_equal(embedding_matrix[indices], rows)
+        self.assertEqual({"hits": 0, "misses": 2, "evictions": 0, "rows": 2, "max_rows": 3}, sut.get_statistics())
+
+        out = np.empty(shape=(2, 3, 3), dtype='float32')
+        self.assertIs(out, sut.take(indices, axis=0, out=out))
+        np.testing.assert_array_equal(rows, out)
+        self.assertEqual(2, sut.get_statistics()["hits"])
+
+        np.testing.assert_array_equal(embedding_matrix[[1, 2, 9]], sut.take([1, 2, 100], mode='clip'))
+        self.assertEqual({"hits": 3, "misses": 4, "evictions": 1, "rows": 3, "max_rows": 3}, sut.get_statistics())
+        with self.assertRaises(IndexError):
+            sut.take([10])
+        with self.assertRaises(ValueError):
+            sut.take(indices, axis=1)
+        sut.close()
+        np.testing.assert_array_equal(embedding_matrix[[4]], sut.take([4]))
+
+    def test_pickle(self):
+        _, embedding_matrix = self.load_sequentially(embedding_limit=None)
+        _, sut = LazyEmbeddingMatrix.scan(self.embedding_file_path, None, DEFAULT_FILTERS, 3)
+        sut.take([1, 2])
+        unpickled = pickle.loads(pickle.dumps(sut))
+        self.assertEqual(0, unpickled.get_statistics()["rows"])
+        np.testing.assert_array_equal(embedding_matrix[[2, 3]], unpickled.take([2, 3]))
@@ -0,0 +1,62 @@
+import asyncio
+import numpy as np
+import os
+import pathlib
+from unittest import TestCase
+from justmltools.nlp.micro_batching_word_embedder import MicroBatchingWordEmbedder
+from justmltools.nlp.word_embedder import WordEmbedder
+
+
+class TestMicroBatchingWordEmbedder(TestCase):
+
+    texts = ["gallersbach humboldtgesellschaft", "", "qorig pagamento qorig", "Balabin", "unbekannt"] * 4
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        dir_path: str = pathlib.Path(__file__).parent.absolute()
+        cls.word_embedder = WordEmbedder(
+            embedding_file_path=os.path.join(dir_path, "embedding_wiki_de_tail_100.vec"), embedding_sequence_length=8)
+
+    def test_embed_text(self):
+        expected = self.word_embedder.embed_texts(self.texts)
+
+        async def embed_all():
+            async with MicroBatchingWordEmbedder(self.word_embedder, max_batch_size=8, max_wait_seconds=0.01) as sut:
+                results = await asyncio.gather(*[sut.embed_text(text) for text in self.texts])
+                return results, sut.get_statistics()
+
+        results, statistics = asyncio.run(embed_all())
+        for i, result in enumerate(results):
+            for j in range(3):
+                np.testing.assert_array_equal(expected[j][i], result[j])
+                self.assertTrue(result[j].flags.owndata)  # does not keep the whole batch result alive
+        self.assertEqual(len(self.texts), statistics["requests"])
+        self.assertEqual(3, statistics["batches"])  # 8 + 8 + 4 requests
+
+    def test_mixed_requests(self):
+        expected_tokens, expected_offsets = self.word_embedder.tokenize_texts_flat(self.texts)
+        expected_pooled = self.word_embedder.embed_texts_pooled(self.texts, pooling='max')
+
+        async def request_all():
+            async with MicroBatchingWordEmbedder(self.word_embedder, max_wait_seconds=0) as sut:
+                tokens = asyncio.gather(*[sut.tokenize_text(text) for text in self.texts])
+                pooled = asyncio.gather(*[sut.embed_text_pooled(text, pooling='max') for text in self.texts])
+                return await tokens, await pooled
+
+        tokens, pooled = asyncio.run(request_all())
+        for i in range(len(self.texts)):
+            np.testing.assert_array_equal(expected_tokens[expected_offsets[i]:expected_offsets[i + 1]], tokens[i])
+            np.testing.assert_array_equal(expected_pooled[i], pooled[i])
+
+    def test_invalid_requests(self):
+        async def request_invalid():
+            sut = MicroBatchingWordEmbedder(self.word_embedder)
+            with self.assertRaises(ValueError):
+                await sut.embed_text("qorig")  # not started
+            async with sut:
+                with self.assertRaises(ValueError):
+                    await sut.embed_text_pooled("qorig", pooling='idf_mean')
+
+        asyncio.run(request_invalid())
+        with self.assertRaises(ValueError):
+            MicroBatchingWordEmbedder(self.word_embedder, max_batch_size=0)
@@ -0,0 +1,61 @@
+import numpy as np
+import os
+import pathlib
+import shutil
+import tempfile
+from unittest import TestCase
+from justmltools.nlp.batch_tokenizer import DEFAULT_FILTERS
+from justmltools.nlp.parallel_embedding_loader import ParallelEmbeddingLoader
+from justmltools.nlp.word_embedder import WordEmbedder
+from justmltools.nlp.word_embedding_cache import WordEmbeddingCache
+
+
+class TestParallelEmbeddingLoader(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir: str = tempfile.mkdtemp()
+        self.embedding_file_path: str = os.path.join(self.temp_dir, "embedding.vec")
+        lines = ["12 3"]
+        for i, word in enumerate(["der", "Straße", "zürich/winterthur", "der", "", "(die", "das", "sie", "er", "es"]):
+            lines.append(f"{word} {i}.5 -{i} {i * 100}")
+        lines.insert(4, "malformed 1 2")
+        lines.insert(7, "")
+        lines.append("ende 1 2 3")  # no line break at the end of the file
+        pathlib.Path(self.embedding_file_path).write_text('\n'.join(lines), encoding="utf-8")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def load_sequentially(self, embedding_limit):
+        cache_dir: str = os.path.join(self.temp_dir, "cache")
+        WordEmbedder(embedding_file_path=self.embedding_file_path, embedding_limit=embedding_limit, cache_dir=cache_dir)
+        words, embedding_matrix, _ = WordEmbeddingCache(cache_dir=cache_dir).load(
+            self.embedding_file_path, embedding_limit, DEFAULT_FILTERS)
+        return words, embedding_matrix
+
+    def test_load_same_as_sequentially(self):
+        for embedding_limit in [None, 1, 2, 5, 8, 100]:
+            expected_words, expected_embedding_matrix = self.load_sequentially(embedding_limit)
+            for number_of_processes, chunks_per_process in [(1, 1), (2, 1), (2, 10)]:
+                sut = ParallelEmbeddingLoader(
+                    number_of_processes=number_of_processes, chunks_per_process=chunks_per_process)
+                words, embedding_matrix = sut.load(self.embedding_file_path, embedding_limit, DEFAULT_FILTERS)
+                self.assertEqual(expected_words, words)
+                np.testing.assert_array_equal(expected_embedding_matrix, embedding_matrix)
+
+    def test_word_embedder_with_load_processes(self):
+        word_embedder = WordEmbedder(embedding_file_path=self.embedding_file_path, number_of_load_processes=2)
+        expected_words, expected_embedding_matrix = self.load_sequentially(embedding_limit=None)
+        self.assertEqual(["der", "Straße", "der", "die", "das", "sie", "er", "es", "ende"], expected_words)
+        embedded_text = word_embedder.embed_texts(["Straße der"])[0][0]
+        np.testing.assert_array_equal(expected_embedding_matrix[2], embedded_text[0])
+        np.testing.assert_array_equal(expected_embedding_matrix[3], embedded_text[1])  # the last "der" wins
+
+    def test_load_without_copy(self):
+        expected_words, expected_embedding_matrix = self.load_sequentially(embedding_limit=None)
+        sut = ParallelEmbeddingLoader(number_of_processes=2)
+        _, embedding_matrix = sut.load(self.embedding_file_path, None, DEFAULT_FILTERS)
+        self.assertFalse(embedding_matrix.flags.owndata)  # the shared memory the workers parsed the vectors into
+        row_view = embedding_matrix[2]
+        del embedding_matrix
+        np.testing.assert_array_equal(expected_embedding_matrix[2], row_view)  # still mapped while a view exists
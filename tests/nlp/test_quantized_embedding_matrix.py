@@ -0,0 +1,59 @@
+import numpy as np
+from unittest import TestCase
+from justmltools.nlp.quantized_embedding_matrix import QuantizedEmbeddingMatrix
+
+
+class TestQuantizedEmbeddingMatrix(TestCase):
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(42)
+        self.embedding_matrix = rng.standard_normal((100, 16)).astype('float32')
+        self.embedding_matrix[0] = 0
+
+    def test_quantize_float16(self):
+        sut = QuantizedEmbeddingMatrix.quantize(self.embedding_matrix, dtype='float16')
+        self.assertEqual((100, 16), sut.shape)
+        self.assertEqual(np.float16, sut.dtype)
+        self.assertEqual(100 * 16 * 2, sut.nbytes)
+        np.testing.assert_allclose(self.embedding_matrix, sut.dequantize(), rtol=1e-3, atol=1e-3)
+
+    def test_quantize_int8(self):
+        sut = QuantizedEmbeddingMatrix.quantize(self.embedding_matrix, dtype='int8')
+        self.assertEqual(np.int8, sut.dtype)
+        self.assertEqual(100 * 16 + 100 * 4, sut.nbytes)
+        max_abs_values = np.abs(self.embedding_matrix).max(axis=1, keepdims=True)
+        errors = np.abs(self.embedding_matrix - sut.dequantize())
+        self.assertTrue(np.all(errors <= max_abs_values / 127 / 2 + 1e-6))
+
+    def test_quantize_invalid_dtype(self):
+        with self.assertRaises(ValueError):
+            QuantizedEmbeddingMatrix.quantize(self.embedding_matrix, dtype='int4')
+
+    def test_take(self):
+        for dtype in QuantizedEmbeddingMatrix.DTYPES:
+            sut = QuantizedEmbeddingMatrix.quantize(self.embedding_matrix, dtype=dtype)
+            indices = np.asarray([[0, 5, 99], [1, 0, 0]])
+            rows = sut.take(indices, axis=0)
+            self.assertEqual((2, 3, 16), rows.shape)
+            self.assertEqual(np.float32, rows.dtype)
+            self.assertEqual(0, np.count_nonzero(rows[:, 0][[0]]))  # the zero row stays exactly zero
+            np.testing.assert_array_equal(sut.dequantize()[indices], rows)
+
+            out = np.empty(shape=(2, 3, 16), dtype='float32')
+            self.assertIs(out, sut.take(indices, axis=0, out=out))
+            np.testing.assert_array_equal(rows, out)
+            with self.assertRaises(ValueError):
+                sut.take(indices, axis=1)
+
+    def test_reconstruction_error(self):
+        float16_error = QuantizedEmbeddingMatrix.quantize(self.embedding_matrix, dtype='float16') \
+            .reconstruction_error(self.embedding_matrix)
+        int8_error = QuantizedEmbeddingMatrix.quantize(self.embedding_matrix, dtype='int8') \
+            .reconstruction_error(self.embedding_matrix)
+        for error in [float16_error, int8_error]:
+            self.assertGreater(error["max_abs_error"], 0)
+            self.assertGreater(error["mean_cosine_similarity"], 0.999)
+            self.assertLessEqual(error["min_cosine_similarity"], error["mean_cosine_similarity"])
+        self.assertLess(float16_error["relative_rmse"], int8_error["relative_rmse"])
+        self.assertAlmostEqual(2.0, float16_error["compression_ratio"])
+        self.assertAlmostEqual(64 / 20, int8_error["compression_ratio"])
@@ -0,0 +1,99 @@
+import multiprocessing
+import numpy as np
+import os
+import subprocess
+import sys
+from unittest import TestCase
+from justmltools.nlp.shared_word_embedding import SharedWordEmbedding
+
+
+def sum_attached_embedding_matrix(name: str) -> float:
+    shared_word_embedding = SharedWordEmbedding.attach(name=name)
+    try:
+        return float(shared_word_embedding.get_embedding_matrix().sum())
+    finally:
+        shared_word_embedding.close()
+
+
+PUBLISH_AND_ATTACH_FROM_FORKED_WORKERS = """
+import multiprocessing
+import numpy as np
+from justmltools.nlp.shared_word_embedding import SharedWordEmbedding
+from tests.nlp.test_shared_word_embedding import sum_attached_embedding_matrix
+
+published = SharedWordEmbedding.publish(["foo", "bar"], np.ones((3, 2), dtype='float32'), True, " ")
+with multiprocessing.get_context("fork").Pool(processes=2) as pool:
+    print(pool.map(sum_attached_embedding_matrix, [published.get_name()] * 4))
+published.close()
+published.unlink()
+"""
+
+ATTACH_FROM_INDEPENDENT_PROCESS = """
+import sys
+from tests.nlp.test_shared_word_embedding import sum_attached_embedding_matrix
+
+print(sum_attached_embedding_matrix(sys.argv[1]))
+"""
+
+
+class TestSharedWordEmbedding(TestCase):
+
+    def setUp(self) -> None:
+        self.words = ["foo", "bär"]
+        self.embedding_matrix = np.asarray([[0, 0, 0], [1, 2, 3], [4, 5, 6]], dtype='float32')
+
+    def test_publish_and_attach(self):
+        with SharedWordEmbedding.publish(self.words, self.embedding_matrix, True, " ,") as published:
+            attached = SharedWordEmbedding.attach(name=published.get_name())
+            try:
+                self.assertEqual(self.words, attached.get_words())
+                np.testing.assert_array_equal(self.embedding_matrix, attached.get_embedding_matrix())
+                self.assertFalse(attached.get_embedding_matrix().flags.writeable)
+                self.assertTrue(attached.is_almost_only_lower_case_words())
+                self.assertEqual(" ,", attached.get_filters())
+                with self.assertRaises(ValueError):
+                    attached.unlink()  # only the owner may unlink
+            finally:
+                attached.close()
+
+    def test_attach_from_other_process(self):
+        with SharedWordEmbedding.publish(self.words, self.embedding_matrix, True, " ") as published:
+            with multiprocessing.get_context("spawn").Pool(processes=2) as pool:
+                sums = pool.map(sum_attached_embedding_matrix, [published.get_name()] * 2)
+        self.assertEqual([21.0, 21.0], sums)
+
+    def test_unlink_after_forked_workers_attached(self):
+        if os.name != 'posix':
+            self.skipTest("fork is only available on POSIX")
+        completed = subprocess.run([sys.executable, "-c", PUBLISH_AND_ATTACH_FROM_FORKED_WORKERS],
+                                   capture_output=True, text=True, timeout=60,
+                                   cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+        self.assertEqual(0, completed.returncode, completed.stderr)
+        self.assertIn("[6.0, 6.0, 6.0, 6.0]", completed.stdout)
+        self.assertEqual("", completed.stderr)  # no resource tracker errors or warnings
+
+    def test_attach_from_independent_process(self):
+        if os.name != 'posix':
+            self.skipTest("resource trackers only track shared memory on POSIX")
+        with SharedWordEmbedding.publish(self.words, self.embedding_matrix, True, " ") as published:
+            completed = subprocess.run([sys.executable, "-c", ATTACH_FROM_INDEPENDENT_PROCESS, published.get_name()],
+                                       capture_output=True, text=True, timeout=60,
+                                       cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+            self.assertEqual(0, completed.returncode, completed.stderr)
+            self.assertIn("21.0", completed.stdout)
+            self.assertEqual("", completed.stderr)  # the resource tracker of the process did not destroy the block
+            self.assertEqual(21.0, sum_attached_embedding_matrix(published.get_name()))
+
+    def test_close_while_views_exist(self):
+        with SharedWordEmbedding.publish(self.words, self.embedding_matrix, True, " ") as published:
+            attached = SharedWordEmbedding.attach(name=published.get_name())
+            row = attached.get_embedding_matrix()[2]
+            vocabulary = attached.get_vocabulary()
+            attached.close()  # the mapping is closed once the views are garbage collected
+            np.testing.assert_array_equal(self.embedding_matrix[2], row)
+            self.assertEqual(2, len(vocabulary))
+            del row, vocabulary
+
+    def test_publish_inconsistent_shape(self):
+        with self.assertRaises(ValueError):
+            SharedWordEmbedding.publish(self.words, self.embedding_matrix[:2], True, " ")
@@ -0,0 +1,41 @@
+import numpy as np
+from unittest import TestCase
+from justmltools.nlp.text_lru_cache import TextLruCache
+
+
+class TestTextLruCache(TestCase):
+
+    def test_get_and_put(self):
+        sut = TextLruCache(max_bytes=10000)
+        self.assertIsNone(sut.get("der"))
+        sut.put("der", np.asarray([1, 2, 3], dtype=np.int32))
+        np.testing.assert_array_equal([1, 2, 3], sut.get("der"))
+        self.assertFalse(sut.get("der").flags.writeable)
+        self.assertIsNone(sut.get("der", namespace="mean"))
+        self.assertEqual(
+            {"hits": 2, "misses": 2, "evictions": 0, "entries": 1, "bytes": 12 + 200, "max_bytes": 10000},
+            sut.get_statistics())
+
+    def test_eviction(self):
+        sut = TextLruCache(max_bytes=3 * (400 + 200))
+        for text in ["a", "b", "c"]:
+            sut.put(text, np.zeros(shape=100, dtype=np.float32))
+        self.assertIsNotNone(sut.get("a"))  # "b" is now the least recently used entry
+        sut.put("d", np.zeros(shape=100, dtype=np.float32))
+        self.assertIsNone(sut.get("b"))
+        for text in ["a", "c", "d"]:
+            self.assertIsNotNone(sut.get(text))
+        self.assertEqual(1, sut.get_statistics()["evictions"])
+        self.assertEqual(3, len(sut))
+
+        sut.put("e", np.zeros(shape=1000, dtype=np.float32))  # larger than max_bytes, not cached
+        self.assertIsNone(sut.get("e"))
+        self.assertEqual(3, len(sut))
+
+        sut.clear()
+        self.assertEqual(0, len(sut))
+        self.assertEqual(0, sut.get_statistics()["bytes"])
+
+    def test_invalid_max_bytes(self):
+        with self.assertRaises(ValueError):
+            TextLruCache(max_bytes=0)
@@ -0,0 +1,66 @@
+import numpy as np
+import os
+import pathlib
+import shutil
+import tempfile
+from unittest import TestCase
+from justmltools.nlp.vocabulary_pruner import VocabularyPruner
+from justmltools.nlp.word_embedder import WordEmbedder
+
+
+class TestVocabularyPruner(TestCase):
+
+    texts = ["gallersbach humboldtgesellschaft gallersbach", "", "qorig pagamento qorig qorig", "Balabin unbekannt"]
+
+    def setUp(self) -> None:
+        dir_path: str = pathlib.Path(__file__).parent.absolute()
+        self.word_embedder = WordEmbedder(
+            embedding_file_path=os.path.join(dir_path, "embedding_wiki_de_tail_100.vec"), embedding_sequence_length=8)
+        self.sut = VocabularyPruner(self.word_embedder)
+        self.sut.count(self.texts, batch_size=3)
+
+    def test_count(self):
+        token_counts = self.sut.get_token_counts()
+        self.assertEqual(98, token_counts.shape[0])
+        self.assertEqual(8, token_counts.sum())  # unbekannt is unknown
+        tokens, _ = self.word_embedder.tokenize_texts_flat(["qorig"])
+        self.assertEqual(3, token_counts[tokens[0]])
+
+    def test_prune(self):
+        pruned_word_embedder, report = self.sut.prune(number_of_fallback_words=3)
+        self.assertEqual(6, pruned_word_embedder.vocabulary_size())  # the words 1, 2 and 3 are fallback words
+        self.assertEqual({"words": 97, "kept_words": 6, "observed_words": 5, "kept_observed_words": 5, "tokens": 8,
+                          "kept_tokens": 8, "token_coverage_lost": 0.0}, report)
+        expected = self.word_embedder.embed_texts(self.texts)
+        actual = pruned_word_embedder.embed_texts(self.texts)
+        for j in range(3):
+            np.testing.assert_array_equal(expected[j], actual[j])
+        # the tokens are remapped to 1..6 in the original order
+        tokens, _ = pruned_word_embedder.tokenize_texts_flat(self.texts)
+        self.assertEqual(6, tokens.max())
+        original_tokens, _ = self.word_embedder.tokenize_texts_flat(self.texts)
+        np.testing.assert_array_equal(np.argsort(original_tokens, kind='stable'), np.argsort(tokens, kind='stable'))
+
+    def test_prune_with_limits(self):
+        pruned_word_embedder, report = self.sut.prune(min_count=2)
+        self.assertEqual(2, report["kept_words"])  # gallersbach and qorig
+        self.assertEqual(5, report["kept_tokens"])
+        self.assertAlmostEqual(3 / 8, report["token_coverage_lost"])
+        _, report = self.sut.prune(max_observed_words=1)
+        self.assertEqual(3, report["kept_tokens"])  # qorig
+
+    def test_export(self):
+        pruned_word_embedder, _ = self.sut.prune(number_of_fallback_words=10)
+        temp_dir: str = tempfile.mkdtemp()
+        try:
+            embedding_file_path: str = os.path.join(temp_dir, "pruned.vec")
+            cache_dir: str = os.path.join(temp_dir, "cache")
+            pruned_word_embedder.export(embedding_file_path, cache_dir=cache_dir)
+            expected = pruned_word_embedder.embed_texts(self.texts)[0]
+            for word_embedder in [WordEmbedder(embedding_file_path, embedding_sequence_length=8),
+                                  WordEmbedder(embedding_file_path, embedding_sequence_length=8, cache_dir=cache_dir)]:
+                self.assertEqual(pruned_word_embedder.vocabulary_size(), word_embedder.vocabulary_size())
+                np.testing.assert_array_equal(expected, word_embedder.embed_texts(self.texts)[0])
+                del word_embedder
+        finally:
+            shutil.rmtree(temp_dir)
@@ -1,8 +1,23 @@
+import gzip
+import io
+import lzma
+import multiprocessing
 import numpy as np
 import os
 import pathlib
+import pickle
+import shutil
+import tempfile
 from unittest import TestCase
+from unittest.mock import patch
+from justmltools.nlp.compact_word_vocabulary import CompactWordVocabulary
 from justmltools.nlp.word_embedder import WordEmbedder
+from justmltools.nlp.word_embedder_metrics import WordEmbedderMetrics
+from justmltools.s3.s3_url import S3Url
+
+
+def embed_texts_in_worker(word_embedder: WordEmbedder, texts) -> np.ndarray:
+    return word_embedder.embed_texts(texts)[0]
 
 
 class TestWordEmbedder(TestCase):
@@ -28,8 +43,8 @@ class TestWordEmbedder(TestCase):
 
     def setUp(self) -> None:
         dir_path: str = pathlib.Path(__file__).parent.absolute()
-        embedding_file_path: str = os.path.join(dir_path, "embedding_wiki_de_tail_100.vec")
-        self.word_embedder: WordEmbedder = WordEmbedder(embedding_file_path=embedding_file_path)
+        self.embedding_file_path: str = os.path.join(dir_path, "embedding_wiki_de_tail_100.vec")
+        self.word_embedder: WordEmbedder = WordEmbedder(embedding_file_path=self.embedding_file_path)
 
     def test_embedding_dim(self):
         self.assertEqual(300, self.word_embedder.embedding_dim())
@@ -47,6 +62,14 @@ class TestWordEmbedder(TestCase):
         number_of_unique_tokens = np.unique(tokenized_text).shape[0]
         self.assertEqual(97 + 1, number_of_unique_tokens)  # one unique token for each unique word plus one for 0
 
+    def test_tokenize_texts_flat(self):
+        texts = [self.sample_text, "", "Gallersbach humboldtgesellschaft"]
+        tokens, offsets = self.word_embedder.tokenize_texts_flat(texts)
+        np.testing.assert_array_equal([0, 97, 97, 99], offsets)
+        token_matrix = self.word_embedder.tokenize_texts(texts)
+        np.testing.assert_array_equal(tokens[:97], token_matrix[0, :97])
+        np.testing.assert_array_equal(tokens[97:], token_matrix[2, :2])
+
     def test_embed_texts(self):
         embedded_texts: np.nd_array = self.word_embedder.embed_texts([self.sample_text])
         self.assertEqual(3, len(embedded_texts))  # 3 embeddings, for text, left context and right context
@@ -59,3 +82,441 @@ class TestWordEmbedder(TestCase):
 
         embedded_right_context = embedded_texts[2]
         self.assertEqual(3000, embedded_right_context.shape[1])
+
+    def test_embed_token_vectors(self):
+        token_vectors = self.word_embedder.tokenize_texts([self.sample_text, "", "gallersbach memmingen"])
+        embedded_texts = self.word_embedder.embed_token_vectors(token_vectors)
+        self.assertEqual(3, len(embedded_texts))
+        for embedded in embedded_texts:
+            self.assertEqual((3, 3000, 300), embedded.shape)
+
+        # compare with embedding each token vector on its own
+        for i, token_vector in enumerate(token_vectors):
+            embedded_text = self.word_embedder.embed_token_vector(token_vector)
+            for j in range(3):
+                np.testing.assert_array_equal(embedded_text[j][0], embedded_texts[j][i])
+
+        self.assertEqual(0, np.count_nonzero(embedded_texts[0][1]))  # empty text
+        np.testing.assert_array_equal(embedded_texts[0][2, 0], embedded_texts[1][2, 1])  # left context
+        np.testing.assert_array_equal(embedded_texts[0][2, 1], embedded_texts[2][2, 0])  # right context
+        self.assertEqual(0, np.count_nonzero(embedded_texts[1][:, 0]))
+        self.assertEqual(0, np.count_nonzero(embedded_texts[2][:, -1]))
+
+    def test_embed_token_vectors_with_out(self):
+        token_vectors = self.word_embedder.tokenize_texts([self.sample_text, "gallersbach memmingen"])
+        expected = self.word_embedder.embed_token_vectors(token_vectors)
+        out = np.full(shape=(2, 3002, 300), fill_value=np.nan, dtype='float32')
+        for _ in range(2):  # reuse the same buffer
+            actual = self.word_embedder.embed_token_vectors(token_vectors, out=out)
+            for j in range(3):
+                self.assertTrue(np.shares_memory(out, actual[j]))
+                np.testing.assert_array_equal(expected[j], actual[j])
+
+        with self.assertRaises(ValueError):
+            self.word_embedder.embed_token_vectors(token_vectors, out=np.empty((2, 3000, 300), dtype='float32'))
+        with self.assertRaises(ValueError):
+            self.word_embedder.embed_token_vectors(token_vectors, out=np.empty((2, 3002, 300), dtype='float64'))
+
+    def test_embed_token_vectors_out_of_range(self):
+        vocabulary_size: int = self.word_embedder.vocabulary_size()
+        self.word_embedder.embed_token_vectors(np.asarray([[0, vocabulary_size]]))
+        for token_vectors in [[[5, 10 ** 6, 1]], [[5, -3, 1]], [[vocabulary_size + 1]]]:
+            with self.assertRaises(IndexError):
+                self.word_embedder.embed_token_vectors(np.asarray(token_vectors))
+
+    def test_embed_token_vectors_with_context_offsets(self):
+        token_vectors = self.word_embedder.tokenize_texts([self.sample_text, "gallersbach memmingen"])
+        default = self.word_embedder.embed_token_vectors(token_vectors)
+        context_offsets = list(range(-3, 4))
+        out = np.empty(shape=(2, 3006, 300), dtype='float32')
+        embedded_texts = self.word_embedder.embed_token_vectors(token_vectors, out=out, context_offsets=context_offsets)
+        self.assertEqual(7, len(embedded_texts))
+        for offset, embedded in zip(context_offsets, embedded_texts):
+            self.assertEqual((2, 3000, 300), embedded.shape)
+            self.assertTrue(np.shares_memory(out, embedded))
+            expected = np.zeros_like(default[0])
+            if offset >= 0:
+                expected[:, :3000 - offset] = default[0][:, offset:]
+            else:
+                expected[:, -offset:] = default[0][:, :offset]
+            np.testing.assert_array_equal(expected, embedded)
+        np.testing.assert_array_equal(default[1], embedded_texts[2])
+        np.testing.assert_array_equal(default[2], embedded_texts[4])
+
+        only_right = self.word_embedder.embed_token_vectors(token_vectors, context_offsets=[2])
+        np.testing.assert_array_equal(embedded_texts[5], only_right[0])
+        with self.assertRaises(ValueError):
+            self.word_embedder.embed_token_vectors(token_vectors, context_offsets=[])
+
+    def test_embed_texts_in_batches(self):
+        texts = [self.sample_text, "", "gallersbach humboldtgesellschaft", "qorig", "pagamento"]
+        expected = self.word_embedder.embed_texts(texts)
+        for reuse_buffer in [False, True]:
+            batches = self.word_embedder.embed_texts_in_batches(
+                (text for text in texts), batch_size=2, reuse_buffer=reuse_buffer)
+            first_batch_index: int = 0
+            buffers = []
+            for embedded_batch in batches:
+                batch_length: int = embedded_batch[0].shape[0]
+                self.assertLessEqual(batch_length, 2)
+                for j in range(3):
+                    np.testing.assert_array_equal(
+                        expected[j][first_batch_index:first_batch_index + batch_length], embedded_batch[j])
+                buffers.append(embedded_batch[0])
+                first_batch_index += batch_length
+            self.assertEqual(len(texts), first_batch_index)
+            self.assertEqual(3, len(buffers))
+            self.assertEqual(reuse_buffer, np.shares_memory(buffers[0], buffers[-1]))
+
+        with self.assertRaises(ValueError):
+            next(self.word_embedder.embed_texts_in_batches(texts, batch_size=0))
+
+    def test_embed_texts_by_length(self):
+        texts = [self.sample_text, "", "gallersbach humboldtgesellschaft", "qorig", "pagamento qorig"]
+        expected = self.word_embedder.embed_texts(texts)
+        for bucket_width, number_of_buckets in [(None, 1), (1, 4), (2, 3), (100, 1)]:
+            embedded_text_buckets = self.word_embedder.embed_texts_by_length(texts, bucket_width=bucket_width)
+            self.assertEqual(len(texts), len(embedded_text_buckets))
+            np.testing.assert_array_equal([97, 0, 2, 1, 2], embedded_text_buckets.get_lengths())
+            buckets = embedded_text_buckets.get_buckets()
+            self.assertEqual(number_of_buckets, len(buckets))
+            self.assertEqual(list(range(len(texts))), sorted(np.concatenate([indexes for indexes, _ in buckets])))
+            for text_indexes, embedded_views in buckets:
+                lengths = embedded_text_buckets.get_lengths()[text_indexes]
+                self.assertEqual((len(text_indexes), lengths.max(), 300), embedded_views[0].shape)
+            for i in range(len(texts)):
+                length: int = embedded_text_buckets.get_lengths()[i]
+                for j in range(3):
+                    np.testing.assert_array_equal(expected[j][i, :length], embedded_text_buckets[i][j])
+
+        self.assertEqual(0, len(self.word_embedder.embed_texts_by_length([]).get_buckets()))
+        with self.assertRaises(ValueError):
+            self.word_embedder.embed_texts_by_length(texts, bucket_width=0)
+
+    def test_embed_texts_pooled(self):
+        texts = [self.sample_text, "", "gallersbach humboldtgesellschaft gallersbach", "unknown words only"]
+        token_vectors = self.word_embedder.tokenize_texts(texts)
+        embedded_texts = self.word_embedder.embed_token_vectors(token_vectors)[0]
+        mask = (token_vectors > 0)[:, :, np.newaxis]
+        lengths = np.maximum(mask.sum(axis=1), 1)
+        masked_max = np.where(mask, embedded_texts, -np.inf).max(axis=1)
+        expected = {
+            'sum': embedded_texts.sum(axis=1),
+            'mean': embedded_texts.sum(axis=1) / lengths,
+            'max': np.where(np.isfinite(masked_max), masked_max, 0)
+        }
+        for pooling, expected_pooled in expected.items():
+            pooled = self.word_embedder.embed_texts_pooled(texts, pooling=pooling)
+            self.assertEqual((4, 300), pooled.shape)
+            self.assertEqual(np.float32, pooled.dtype)
+            np.testing.assert_allclose(expected_pooled, pooled, rtol=1e-5, atol=1e-6)
+
+        with self.assertRaises(ValueError):
+            self.word_embedder.embed_texts_pooled(texts, pooling='median')
+        with self.assertRaises(ValueError):
+            self.word_embedder.embed_texts_pooled(texts, pooling='idf_mean')
+
+    def test_embed_texts_pooled_idf_mean(self):
+        corpus = ["gallersbach qorig", "gallersbach pagamento", "gallersbach"]
+        idf_weights = self.word_embedder.compute_idf_weights(corpus)
+        token_vectors = self.word_embedder.tokenize_texts(corpus)
+        gallersbach, qorig = token_vectors[0, 0], token_vectors[0, 1]
+        self.assertAlmostEqual(1.0, idf_weights[gallersbach])
+        self.assertAlmostEqual(np.log(4 / 2) + 1, idf_weights[qorig], places=6)
+
+        pooled = self.word_embedder.embed_texts_pooled(corpus + [""], pooling='idf_mean', idf_weights=idf_weights)
+        embedded_texts = self.word_embedder.embed_token_vectors(token_vectors)[0]
+        expected = (embedded_texts[0, 0] * idf_weights[gallersbach] + embedded_texts[0, 1] * idf_weights[qorig]) \
+            / (idf_weights[gallersbach] + idf_weights[qorig])
+        np.testing.assert_allclose(expected, pooled[0], rtol=1e-5, atol=1e-6)
+        np.testing.assert_allclose(embedded_texts[2, 0], pooled[2], rtol=1e-5, atol=1e-6)
+        self.assertEqual(0, np.count_nonzero(pooled[3]))
+
+    def test_text_caches(self):
+        texts = [self.sample_text, "", "gallersbach humboldtgesellschaft", self.sample_text, "qorig"]
+        word_embedder = WordEmbedder(
+            embedding_file_path=self.embedding_file_path, token_cache_bytes=100000, pooled_cache_bytes=100000)
+        self.assertEqual({"token": None, "pooled": None}, self.word_embedder.text_cache_statistics())
+        for _ in range(2):
+            for expected, actual in zip(self.word_embedder.tokenize_texts_flat(texts),
+                                        word_embedder.tokenize_texts_flat(texts)):
+                np.testing.assert_array_equal(expected, actual)
+            for pooling in ['mean', 'max']:
+                np.testing.assert_array_equal(
+                    self.word_embedder.embed_texts_pooled(texts, pooling=pooling),
+                    word_embedder.embed_texts_pooled(texts, pooling=pooling))
+        np.testing.assert_array_equal(
+            self.word_embedder.embed_texts(texts)[0], word_embedder.embed_texts(texts)[0])
+
+        statistics = word_embedder.text_cache_statistics()
+        self.assertEqual(4, statistics["token"]["entries"])
+        self.assertEqual(5, statistics["token"]["misses"])  # only the first call misses, all later calls hit
+        self.assertEqual(8, statistics["pooled"]["entries"])
+        self.assertEqual(2 * 5, statistics["pooled"]["hits"])  # only the second round hits
+
+    def test_embedding_dtype(self):
+        self.assertIsNone(self.word_embedder.quantization_error())
+        texts = [self.sample_text, "gallersbach"]
+        expected = self.word_embedder.embed_texts(texts)
+        expected_pooled = self.word_embedder.embed_texts_pooled(texts, pooling='max')
+        for embedding_dtype, tolerance in [('float16', 1e-3), ('int8', 2e-2)]:
+            word_embedder = WordEmbedder(embedding_file_path=self.embedding_file_path, embedding_dtype=embedding_dtype)
+            self.assertGreater(word_embedder.quantization_error()["mean_cosine_similarity"], 0.99)
+            actual = word_embedder.embed_texts(texts)
+            for j in range(3):
+                self.assertEqual(np.float32, actual[j].dtype)
+                np.testing.assert_allclose(expected[j], actual[j], atol=tolerance)
+            self.assertEqual(0, np.count_nonzero(actual[0][1, 1:]))  # padding stays exactly zero
+            np.testing.assert_allclose(
+                expected_pooled, word_embedder.embed_texts_pooled(texts, pooling='max'), atol=tolerance)
+
+        with self.assertRaises(ValueError):
+            WordEmbedder(embedding_file_path=self.embedding_file_path, embedding_dtype='int4')
+
+    def test_cache_dir(self):
+        cache_dir: str = tempfile.mkdtemp()
+        try:
+            # the first word embedder creates the cache entry, the second one opens it
+            word_embedders = [
+                WordEmbedder(embedding_file_path=self.embedding_file_path, cache_dir=cache_dir) for _ in range(2)]
+            self.assertEqual(3, len(os.listdir(cache_dir)))
+            for word_embedder in word_embedders:
+                self.assertEqual(300, word_embedder.embedding_dim())
+                np.testing.assert_array_equal(
+                    self.word_embedder.tokenize_texts([self.sample_text]),
+                    word_embedder.tokenize_texts([self.sample_text]))
+                np.testing.assert_array_equal(
+                    self.word_embedder.embed_texts([self.sample_text])[0],
+                    word_embedder.embed_texts([self.sample_text])[0])
+
+            # a different embedding limit needs a separate cache entry
+            WordEmbedder(embedding_file_path=self.embedding_file_path, embedding_limit=50, cache_dir=cache_dir)
+            self.assertEqual(6, len(os.listdir(cache_dir)))
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_compressed_embedding_file(self):
+        temp_dir: str = tempfile.mkdtemp()
+        try:
+            with open(self.embedding_file_path, 'rb') as embedding_file:
+                content: bytes = embedding_file.read()
+            for suffix, compress in [(".gz", gzip.compress), (".xz", lzma.compress)]:
+                compressed_file_path: str = os.path.join(temp_dir, "embedding.vec" + suffix)
+                with open(compressed_file_path, 'wb') as compressed_file:
+                    compressed_file.write(compress(content))
+                for embedding_limit in [None, 50]:
+                    expected = WordEmbedder(embedding_file_path=self.embedding_file_path, embedding_limit=embedding_limit)
+                    word_embedder = WordEmbedder(embedding_file_path=compressed_file_path, embedding_limit=embedding_limit)
+                    np.testing.assert_array_equal(
+                        expected.embed_texts([self.sample_text])[0], word_embedder.embed_texts([self.sample_text])[0])
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_s3_embedding_file(self):
+        with open(self.embedding_file_path, 'rb') as embedding_file:
+            content: bytes = gzip.compress(embedding_file.read())
+        cache_dir: str = tempfile.mkdtemp()
+        try:
+            with patch('justmltools.nlp.word_embedder.S3BucketObjectDownloader', autospec=True) as downloader_class:
+                downloader = downloader_class.return_value
+                downloader.get.side_effect = \
+                    lambda bucket, key, byte_range, if_match: io.BytesIO(content[byte_range[0]:byte_range[1]])
+                downloader.get_metadata.return_value = {"size": len(content), "etag": "1", "last_modified": "x"}
+                s3_url = S3Url("test_bucket", "embeddings/embedding.vec.gz")
+                for downloads in [True, False]:  # the second word embedder opens the cache entry
+                    word_embedder = WordEmbedder(embedding_file_path=s3_url, cache_dir=cache_dir)
+                    np.testing.assert_array_equal(
+                        self.word_embedder.embed_texts([self.sample_text])[0],
+                        word_embedder.embed_texts([self.sample_text])[0])
+                    self.assertEqual(downloads, downloader.get.called)
+                    if downloads:
+                        self.assertEqual("1", downloader.get.call_args.kwargs["if_match"])
+                    downloader.get.reset_mock()
+                    del word_embedder
+                downloader.get_metadata.return_value = {"size": len(content), "etag": "2", "last_modified": "y"}
+                word_embedder = WordEmbedder(embedding_file_path=s3_url, cache_dir=cache_dir)
+                self.assertTrue(downloader.get.called)  # the changed object invalidates the cache entry
+                self.assertEqual(3, len(os.listdir(cache_dir)))
+                del word_embedder
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_publish_and_attach_to_shared_memory(self):
+        with self.word_embedder.publish_to_shared_memory() as shared_word_embedding:
+            word_embedder: WordEmbedder = WordEmbedder.attach_to_shared_memory(name=shared_word_embedding.get_name())
+            self.assertEqual(300, word_embedder.embedding_dim())
+            np.testing.assert_array_equal(
+                self.word_embedder.tokenize_texts([self.sample_text]),
+                word_embedder.tokenize_texts([self.sample_text]))
+            np.testing.assert_array_equal(
+                self.word_embedder.embed_texts([self.sample_text])[0],
+                word_embedder.embed_texts([self.sample_text])[0])
+            del word_embedder
+
+    def test_compact_vocabulary(self):
+        texts = [self.sample_text, "", "Gallersbach humboldtgesellschaft unbekanntes"]
+        cache_dir: str = tempfile.mkdtemp()
+        try:
+            word_embedders = [
+                WordEmbedder(embedding_file_path=self.embedding_file_path, compact_vocabulary=True),
+                WordEmbedder(embedding_file_path=self.embedding_file_path, cache_dir=cache_dir, compact_vocabulary=True)
+            ]
+            self.assertEqual(3 + len(CompactWordVocabulary.ARRAY_NAMES), len(os.listdir(cache_dir)))
+            for word_embedder in word_embedders:
+                for expected, actual in zip(self.word_embedder.tokenize_texts_flat(texts),
+                                            word_embedder.tokenize_texts_flat(texts)):
+                    np.testing.assert_array_equal(expected, actual)
+            with word_embedders[1].publish_to_shared_memory() as shared_word_embedding:
+                word_embedder = WordEmbedder.attach_to_shared_memory(
+                    name=shared_word_embedding.get_name(), compact_vocabulary=True)
+                np.testing.assert_array_equal(
+                    self.word_embedder.embed_texts(texts)[0], word_embedder.embed_texts(texts)[0])
+                del word_embedder
+            del word_embedders
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_select_words(self):
+        word_embedder = self.word_embedder.select_words([15, 2, 0, 2])
+        self.assertEqual(2, word_embedder.vocabulary_size())
+        np.testing.assert_array_equal([[1, 2]], word_embedder.tokenize_texts_flat(["Gallersbach Balabin"])[0][None])
+        np.testing.assert_array_equal(
+            self.word_embedder.embed_texts(["Gallersbach Balabin"])[0],
+            word_embedder.embed_texts(["Gallersbach Balabin"])[0])
+        with self.assertRaises(ValueError):
+            self.word_embedder.select_words([self.word_embedder.vocabulary_size() + 1])
+
+    def test_most_similar_words(self):
+        similar_words = self.word_embedder.most_similar_words(["Gallersbach", "unbekannt"], k=3)
+        self.assertEqual(3, len(similar_words[0]))
+        self.assertEqual([], similar_words[1])
+        self.assertNotIn("gallersbach", [word for word, _ in similar_words[0]])
+        similarities = [similarity for _, similarity in similar_words[0]]
+        self.assertEqual(sorted(similarities, reverse=True), similarities)
+        self.word_embedder.build_similarity_index(approximate=True, number_of_clusters=4)
+        approximate_similar_words = self.word_embedder.most_similar_words(
+            ["Gallersbach", "unbekannt"], k=3, number_of_probes=4)
+        self.assertEqual([word for word, _ in similar_words[0]], [word for word, _ in approximate_similar_words[0]])
+        self.assertEqual([], approximate_similar_words[1])
+
+    def test_pickle_cache_entry_reference(self):
+        cache_dir: str = tempfile.mkdtemp()
+        try:
+            word_embedder = WordEmbedder(embedding_file_path=self.embedding_file_path, embedding_sequence_length=50,
+                                         cache_dir=cache_dir, compact_vocabulary=True, token_cache_bytes=1 << 20)
+            pickled: bytes = pickle.dumps(word_embedder)
+            self.assertLess(len(pickled), 1000)  # instead of about 120 KB for the matrix
+            unpickled: WordEmbedder = pickle.loads(pickled)
+            self.assertIsNotNone(unpickled.text_cache_statistics()["token"])
+            np.testing.assert_array_equal(
+                word_embedder.embed_texts([self.sample_text])[0], unpickled.embed_texts([self.sample_text])[0])
+            with multiprocessing.get_context("spawn").Pool(processes=1) as pool:
+                embedded = pool.apply(embed_texts_in_worker, (word_embedder, [self.sample_text]))
+            np.testing.assert_array_equal(word_embedder.embed_texts([self.sample_text])[0], embedded)
+            del word_embedder, unpickled
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_pickle_shared_memory_reference(self):
+        with self.word_embedder.publish_to_shared_memory() as shared_word_embedding:
+            word_embedder = WordEmbedder.attach_to_shared_memory(
+                name=shared_word_embedding.get_name(), embedding_sequence_length=50)
+            pickled: bytes = pickle.dumps(word_embedder)
+            self.assertLess(len(pickled), 1000)
+            with multiprocessing.get_context("spawn").Pool(processes=1) as pool:
+                embedded = pool.apply(embed_texts_in_worker, (word_embedder, [self.sample_text]))
+            np.testing.assert_array_equal(word_embedder.embed_texts([self.sample_text])[0], embedded)
+            del word_embedder
+
+    def test_pickle_without_reference(self):
+        unpickled: WordEmbedder = pickle.loads(pickle.dumps(self.word_embedder))
+        np.testing.assert_array_equal(
+            self.word_embedder.embed_texts([self.sample_text])[0], unpickled.embed_texts([self.sample_text])[0])
+
+    def test_pickle_without_reference_with_text_caches_and_metrics(self):
+        word_embedder = WordEmbedder(embedding_file_path=self.embedding_file_path, embedding_sequence_length=50,
+                                     token_cache_bytes=1 << 20, pooled_cache_bytes=1 << 20,
+                                     metrics=WordEmbedderMetrics())
+        expected = word_embedder.embed_texts_pooled([self.sample_text])
+        unpickled: WordEmbedder = pickle.loads(pickle.dumps(word_embedder))
+        for statistics in unpickled.text_cache_statistics().values():
+            self.assertEqual(0, statistics["entries"])
+            self.assertEqual(1 << 20, statistics["max_bytes"])
+        np.testing.assert_array_equal(expected, unpickled.embed_texts_pooled([self.sample_text]))
+        self.assertEqual(1, unpickled.text_cache_statistics()["pooled"]["entries"])
+        self.assertEqual(1, word_embedder.text_cache_statistics()["pooled"]["entries"])
+
+    def test_metrics(self):
+        events = []
+        metrics = WordEmbedderMetrics(callback=lambda event, values: events.append((event, values)))
+        word_embedder = WordEmbedder(embedding_file_path=self.embedding_file_path, embedding_sequence_length=2,
+                                     embedding_dtype='float16', metrics=metrics)
+        self.assertEqual("load", events[0][0])
+        self.assertEqual(97, events[0][1]["words"])
+        for phase in ["header_seconds", "parse_seconds", "fill_seconds", "quantize_seconds"]:
+            self.assertGreaterEqual(events[0][1][phase], 0)
+        self.assertLessEqual(events[0][1]["fill_seconds"], events[0][1]["seconds"])
+
+        word_embedder.embed_texts(["Gallersbach unbekannt qorig pagamento", "", "Balabin"])
+        self.assertEqual(["load", "tokenize", "embed"], [event for event, _ in events])
+        tokenize_values = events[1][1]
+        self.assertEqual(3, tokenize_values["texts"])
+        self.assertEqual(4, tokenize_values["tokens"])
+        self.assertEqual(5, tokenize_values["words"])
+        self.assertEqual(1, tokenize_values["oov_words"])
+        self.assertEqual(0.2, tokenize_values["oov_rate"])
+        self.assertEqual(1, tokenize_values["truncated_texts"])  # only the first text has more than 2 tokens
+        self.assertEqual(6, events[2][1]["positions"])
+
+        word_embedder.embed_texts_pooled(["Balabin"])
+        self.assertEqual(["tokenize", "embed_pooled"], [event for event, _ in events[3:]])
+        statistics = metrics.get_statistics()
+        self.assertEqual(2, statistics["tokenize"]["count"])
+        self.assertEqual(1 / 6, statistics["tokenize"]["oov_rate"])
+
+        word_embedder.set_metrics(None)
+        word_embedder.embed_texts(["Balabin"])
+        self.assertEqual(5, len(events))
+
+    def test_metrics_with_compact_vocabulary_and_token_cache(self):
+        metrics = WordEmbedderMetrics()
+        word_embedder = WordEmbedder(embedding_file_path=self.embedding_file_path, compact_vocabulary=True,
+                                     token_cache_bytes=1 << 20, metrics=metrics)
+        word_embedder.tokenize_texts_flat(["Gallersbach unbekannt", "Gallersbach unbekannt", "Balabin"])
+        word_embedder.tokenize_texts_flat(["Balabin"])  # from the token cache, no words to count
+        statistics = metrics.get_statistics()["tokenize"]
+        self.assertEqual(4, statistics["texts"])
+        self.assertEqual(4, statistics["tokens"])
+        self.assertEqual(3, statistics["words"])  # the repeated text is only tokenized once
+        self.assertEqual(1, statistics["oov_words"])
+
+    def test_memory_bytes(self):
+        memory_bytes: int = self.word_embedder.memory_bytes()
+        self.assertGreater(memory_bytes, 98 * 300 * 4)
+        word_embedder = WordEmbedder(embedding_file_path=self.embedding_file_path, compact_vocabulary=True,
+                                     embedding_dtype='int8', token_cache_bytes=1000)
+        self.assertLess(word_embedder.memory_bytes(), memory_bytes)
+        self.assertGreater(word_embedder.memory_bytes(), 98 * 300 + 1000)
+
+    def test_byte_level_tokenization(self):
+        texts = [self.sample_text, "", "Gallersbach, humboldtgesellschaft/unbekanntes!"]
+        word_embedder = WordEmbedder(embedding_file_path=self.embedding_file_path, compact_vocabulary=True,
+                                     byte_level_tokenization=True)
+        for expected, actual in zip(self.word_embedder.tokenize_texts_flat(texts), word_embedder.tokenize_texts_flat(texts)):
+            np.testing.assert_array_equal(expected, actual)
+        with self.assertRaises(ValueError):
+            WordEmbedder(embedding_file_path=self.embedding_file_path, byte_level_tokenization=True)
+
+    def test_lazy_loading(self):
+        word_embedder = WordEmbedder(embedding_file_path=self.embedding_file_path, lazy_cached_rows=10)
+        self.assertIsNone(self.word_embedder.row_cache_statistics())
+        self.assertEqual(self.word_embedder.vocabulary_size(), word_embedder.vocabulary_size())
+        self.assertEqual(0, word_embedder.row_cache_statistics()["rows"])
+        np.testing.assert_array_equal(self.word_embedder.embed_texts([self.sample_text])[0],
+                                      word_embedder.embed_texts([self.sample_text])[0])
+        self.assertEqual(10, word_embedder.row_cache_statistics()["rows"])
+        np.testing.assert_array_equal(self.word_embedder.embed_texts_pooled(["gallersbach pagamento"]),
+                                      word_embedder.embed_texts_pooled(["gallersbach pagamento"]))
+        self.assertLess(word_embedder.memory_bytes(), self.word_embedder.memory_bytes())
+        with self.assertRaises(ValueError):
+            WordEmbedder(embedding_file_path=self.embedding_file_path, lazy_cached_rows=10, embedding_dtype='int8')
@@ -0,0 +1,27 @@
+from unittest import TestCase
+from justmltools.nlp.word_embedder_metrics import WordEmbedderMetrics
+
+
+class TestWordEmbedderMetrics(TestCase):
+
+    def test_record(self):
+        events = []
+        sut = WordEmbedderMetrics(callback=lambda event, values: events.append((event, values)))
+        sut.record("tokenize", {"seconds": 0.5, "texts": 2, "words": 10, "oov_words": 1, "oov_rate": 0.1,
+                                "truncated_texts": 1, "truncation_rate": 0.5})
+        sut.record("tokenize", {"seconds": 0.25, "texts": 2, "words": 10, "oov_words": 4, "oov_rate": 0.4,
+                                "truncated_texts": 0, "truncation_rate": 0.0})
+        sut.record("embed", {"seconds": 1.0, "texts": 2})
+        self.assertEqual(["tokenize", "tokenize", "embed"], [event for event, _ in events])
+        self.assertEqual(0.4, events[1][1]["oov_rate"])
+        self.assertEqual({
+            "tokenize": {"count": 2, "seconds": 0.75, "texts": 4, "words": 20, "oov_words": 5, "oov_rate": 0.25,
+                         "truncated_texts": 1, "truncation_rate": 0.25},
+            "embed": {"count": 1, "seconds": 1.0, "texts": 2}
+        }, sut.get_statistics())
+
+    def test_reset(self):
+        sut = WordEmbedderMetrics()
+        sut.record("embed", {"seconds": 1.0, "texts": 2})
+        sut.reset()
+        self.assertEqual({}, sut.get_statistics())
@@ -0,0 +1,68 @@
+import os
+import pathlib
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from justmltools.nlp.word_embedder import WordEmbedder
+from justmltools.nlp.word_embedder_registry import WordEmbedderRegistry
+
+
+class TestWordEmbedderRegistry(TestCase):
+
+    def setUp(self) -> None:
+        dir_path: str = pathlib.Path(__file__).parent.absolute()
+        self.temp_dir: str = tempfile.mkdtemp()
+        self.embedding_file_paths = []
+        for language in ["de", "en"]:
+            embedding_file_path: str = os.path.join(self.temp_dir, f"embedding_{language}.vec")
+            shutil.copyfile(os.path.join(dir_path, "embedding_wiki_de_tail_100.vec"), embedding_file_path)
+            self.embedding_file_paths.append(embedding_file_path)
+        self.cache_dir: str = os.path.join(self.temp_dir, "cache")
+        self.memory_bytes: int = WordEmbedder(self.embedding_file_paths[0], compact_vocabulary=True).memory_bytes()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def test_get(self):
+        sut = WordEmbedderRegistry(max_bytes=10 * self.memory_bytes, cache_dir=self.cache_dir)
+        word_embedder = sut.get(self.embedding_file_paths[0], compact_vocabulary=True)
+        self.assertIs(word_embedder, sut.get(self.embedding_file_paths[0], compact_vocabulary=True))
+        self.assertIsNot(word_embedder, sut.get(self.embedding_file_paths[0], embedding_sequence_length=10,
+                                                compact_vocabulary=True))
+        self.assertIsNot(word_embedder, sut.get(self.embedding_file_paths[0], embedding_limit=50,
+                                                compact_vocabulary=True))
+        self.assertEqual(3, len(sut))
+        self.assertEqual({"hits": 1, "loads": 3, "evictions": 0, "entries": 3,
+                          "bytes": sut.get_statistics()["bytes"], "max_bytes": 10 * self.memory_bytes},
+                         sut.get_statistics())
+        self.assertEqual(2, len([name for name in os.listdir(self.cache_dir) if name.endswith(".json")]))
+
+    def test_evict_least_recently_used(self):
+        sut = WordEmbedderRegistry(max_bytes=2 * self.memory_bytes, cache_dir=self.cache_dir)
+        de_word_embedder = sut.get(self.embedding_file_paths[0], compact_vocabulary=True)
+        sut.get(self.embedding_file_paths[1], compact_vocabulary=True)
+        self.assertIs(de_word_embedder, sut.get(self.embedding_file_paths[0], compact_vocabulary=True))
+        sut.get(self.embedding_file_paths[1], embedding_sequence_length=10, compact_vocabulary=True)
+        statistics = sut.get_statistics()
+        self.assertEqual(1, statistics["evictions"])  # the 'en' word embedder was used least recently
+        self.assertEqual(2, statistics["entries"])
+        self.assertLessEqual(statistics["bytes"], 2 * self.memory_bytes)
+        self.assertIs(de_word_embedder, sut.get(self.embedding_file_paths[0], compact_vocabulary=True))
+        sut.get(self.embedding_file_paths[1], compact_vocabulary=True)  # reloaded from the cache
+        self.assertEqual(4, sut.get_statistics()["loads"])
+
+    def test_get_concurrently(self):
+        sut = WordEmbedderRegistry(max_bytes=10 * self.memory_bytes)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            word_embedders = list(executor.map(lambda _: sut.get(self.embedding_file_paths[0]), range(8)))
+        self.assertTrue(all(word_embedder is word_embedders[0] for word_embedder in word_embedders))
+        self.assertEqual(1, sut.get_statistics()["loads"])
+
+    def test_get_missing_file(self):
+        sut = WordEmbedderRegistry(max_bytes=10 * self.memory_bytes)
+        with self.assertRaises(FileNotFoundError):
+            sut.get(os.path.join(self.temp_dir, "missing.vec"))
+        with self.assertRaises(FileNotFoundError):
+            sut.get(os.path.join(self.temp_dir, "missing.vec"))  # failed loads are not registered
+        self.assertEqual(0, len(sut))
@@ -0,0 +1,82 @@
+import multiprocessing
+import numpy as np
+import os
+import pathlib
+import shutil
+import tempfile
+from unittest import TestCase
+from justmltools.nlp.word_embedding_cache import WordEmbeddingCache
+
+
+def save_and_load_in_worker(cache_dir: str, embedding_file_path: str, words, embedding_matrix):
+    cache = WordEmbeddingCache(cache_dir=cache_dir)
+    for _ in range(20):
+        cache.save(embedding_file_path, None, " ", words, embedding_matrix, True)
+        loaded_words, loaded_embedding_matrix, _ = cache.load(embedding_file_path, None, " ", compact_vocabulary=True)
+        np.testing.assert_array_equal(embedding_matrix, loaded_embedding_matrix)
+    return loaded_words.to_word_list(len(words))
+
+
+class TestWordEmbeddingCache(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir: str = tempfile.mkdtemp()
+        self.embedding_file_path: str = os.path.join(self.temp_dir, "embedding.vec")
+        pathlib.Path(self.embedding_file_path).write_text("2 3\nfoo 1 2 3\nbar 4 5 6\n", encoding="utf-8")
+        self.cache_dir: str = os.path.join(self.temp_dir, "cache")
+        self.sut: WordEmbeddingCache = WordEmbeddingCache(cache_dir=self.cache_dir)
+        self.words = ["foo", "bar"]
+        self.embedding_matrix = np.asarray([[0, 0, 0], [1, 2, 3], [4, 5, 6]], dtype='float32')
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def test_load_without_entry(self):
+        self.assertIsNone(self.sut.load(self.embedding_file_path, embedding_limit=None, filters=" "))
+
+    def test_save_and_load(self):
+        self.sut.save(self.embedding_file_path, None, " ", self.words, self.embedding_matrix, True)
+        words, embedding_matrix, almost_only_lower_case_words = \
+            self.sut.load(self.embedding_file_path, embedding_limit=None, filters=" ")
+        self.assertEqual(self.words, words)
+        self.assertIsInstance(embedding_matrix, np.memmap)
+        self.assertFalse(embedding_matrix.flags.writeable)
+        np.testing.assert_array_equal(self.embedding_matrix, embedding_matrix)
+        self.assertTrue(almost_only_lower_case_words)
+
+    def test_open_entry(self):
+        entry_path: str = self.sut.get_entry_path(self.embedding_file_path, embedding_limit=None, filters=" ")
+        self.assertIsNone(WordEmbeddingCache.open_entry(entry_path))
+        self.sut.save(self.embedding_file_path, None, " ", self.words, self.embedding_matrix, True)
+        words, embedding_matrix, almost_only_lower_case_words, filters = WordEmbeddingCache.open_entry(entry_path)
+        self.assertEqual(self.words, words)
+        np.testing.assert_array_equal(self.embedding_matrix, embedding_matrix)
+        self.assertEqual(" ", filters)
+        # opening an entry by its path does not check the embedding file
+        os.remove(self.embedding_file_path)
+        self.assertIsNotNone(WordEmbeddingCache.open_entry(entry_path))
+
+    def test_load_with_changed_parameters(self):
+        self.sut.save(self.embedding_file_path, None, " ", self.words, self.embedding_matrix, True)
+        self.assertIsNone(self.sut.load(self.embedding_file_path, embedding_limit=2, filters=" "))
+        self.assertIsNone(self.sut.load(self.embedding_file_path, embedding_limit=None, filters=" ,"))
+
+    def test_load_with_changed_embedding_file(self):
+        self.sut.save(self.embedding_file_path, None, " ", self.words, self.embedding_matrix, True)
+        pathlib.Path(self.embedding_file_path).write_text("1 3\nfoo 1 2 3\n", encoding="utf-8")
+        self.assertIsNone(self.sut.load(self.embedding_file_path, embedding_limit=None, filters=" "))
+
+        # saving the entry for the changed embedding file removes the outdated entry
+        self.sut.save(self.embedding_file_path, None, " ", self.words[:1], self.embedding_matrix[:2], True)
+        self.assertEqual(3, len(os.listdir(self.cache_dir)))
+
+    def test_save_and_load_concurrently(self):
+        with multiprocessing.get_context().Pool(processes=8) as pool:
+            results = pool.starmap(save_and_load_in_worker, [
+                (self.cache_dir, self.embedding_file_path, self.words, self.embedding_matrix)] * 8)
+        self.assertEqual([self.words] * 8, results)
+        self.assertEqual([], [name for name in os.listdir(self.cache_dir) if name.endswith('.tmp')])
+
+    def test_save_inconsistent_shape(self):
+        with self.assertRaises(ValueError):
+            self.sut.save(self.embedding_file_path, None, " ", self.words, self.embedding_matrix[:2], True)
@@ -0,0 +1,100 @@
+import json
+import numpy as np
+import os
+import pathlib
+import shutil
+import socket
+import struct
+import tempfile
+from unittest import TestCase
+from justmltools.nlp.word_embedder import WordEmbedder
+from justmltools.nlp.word_embedding_client import WordEmbeddingClient
+from justmltools.nlp.word_embedding_protocol import WordEmbeddingProtocol
+from justmltools.nlp.word_embedding_server import WordEmbeddingServer
+
+
+class TestWordEmbeddingServer(TestCase):
+
+    texts = ["gallersbach humboldtgesellschaft", "", "qorig pagamento qorig", "Balabin", "unbekannt ‚ecke‘"]
+
+    def setUp(self) -> None:
+        dir_path: str = pathlib.Path(__file__).parent.absolute()
+        self.word_embedder = WordEmbedder(
+            embedding_file_path=os.path.join(dir_path, "embedding_wiki_de_tail_100.vec"), embedding_sequence_length=8)
+        self.socket_dir: str = tempfile.mkdtemp()
+        self.server = WordEmbeddingServer(self.word_embedder, socket_path=os.path.join(self.socket_dir, "test.sock"))
+        self.server.start()
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.assertFalse(os.path.exists(self.server.get_socket_path()))
+        shutil.rmtree(self.socket_dir)
+
+    def test_requests(self):
+        with WordEmbeddingClient(self.server.get_socket_path()) as client:
+            self.assertEqual(300, client.embedding_dim())
+            for expected, actual in zip(self.word_embedder.tokenize_texts_flat(self.texts),
+                                        client.tokenize_texts_flat(self.texts)):
+                np.testing.assert_array_equal(expected, actual)
+            for context_offsets in [WordEmbedder.CONTEXT_OFFSETS, [-2, 0, 3]]:
+                expected = self.word_embedder.embed_texts(self.texts, context_offsets=context_offsets)
+                actual = client.embed_texts(self.texts, context_offsets=context_offsets)
+                self.assertEqual(len(context_offsets), len(actual))
+                for j in range(len(context_offsets)):
+                    np.testing.assert_array_equal(expected[j], actual[j])
+            np.testing.assert_array_equal(
+                self.word_embedder.embed_texts_pooled(self.texts, pooling='max'),
+                client.embed_texts_pooled(self.texts, pooling='max'))
+            idf_weights = self.word_embedder.compute_idf_weights(self.texts)
+            np.testing.assert_array_equal(
+                self.word_embedder.embed_texts_pooled(self.texts, pooling='idf_mean', idf_weights=idf_weights),
+                client.embed_texts_pooled(self.texts, pooling='idf_mean', idf_weights=idf_weights))
+            self.assertEqual((0, 300), client.embed_texts_pooled([]).shape)
+
+    def test_socket_path_in_use(self):
+        with self.assertRaises(OSError):
+            WordEmbeddingServer(self.word_embedder, socket_path=self.server.get_socket_path())
+        with WordEmbeddingClient(self.server.get_socket_path()) as client:
+            self.assertEqual(300, client.embedding_dim())  # the running server keeps its socket
+
+        file_path: str = os.path.join(self.socket_dir, "file.txt")
+        pathlib.Path(file_path).write_text("not a socket", encoding="utf-8")
+        with self.assertRaises(FileExistsError):
+            WordEmbeddingServer(self.word_embedder, socket_path=file_path)
+        self.assertTrue(os.path.isfile(file_path))
+
+    def test_replace_stale_socket(self):
+        stale_socket_path: str = os.path.join(self.socket_dir, "stale.sock")
+        stale_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale_socket.bind(stale_socket_path)
+        stale_socket.close()  # leaves the socket file behind without anything listening on it
+        with WordEmbeddingServer(self.word_embedder, socket_path=stale_socket_path) as server:
+            server.start()
+            with WordEmbeddingClient(stale_socket_path) as client:
+                self.assertEqual(300, client.embedding_dim())
+
+    def test_error(self):
+        with WordEmbeddingClient(self.server.get_socket_path()) as client:
+            with self.assertRaises(ValueError):
+                client.embed_texts_pooled(self.texts, pooling='median')
+            self.assertEqual(300, client.embedding_dim())  # the connection is still usable
+
+    def test_invalid_array_header(self):
+        for arrays in [[["|O", [1]]], [["<f4", [1] * 40]], [["<f4", [-1]]], [["<f4", "1"]], "x"]:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(self.server.get_socket_path())
+                header_bytes: bytes = json.dumps({"operation": 'info', "arrays": arrays}).encode('utf-8')
+                sock.sendall(struct.pack('<I', len(header_bytes)) + header_bytes)
+                header, _ = WordEmbeddingProtocol.receive_message(sock)
+                self.assertIn("WordEmbeddingProtocolError", header["error"])
+                self.assertIsNone(WordEmbeddingProtocol.receive_message(sock))  # the server closed the connection
+
+    def test_request_too_large(self):
+        socket_path: str = os.path.join(self.socket_dir, "small.sock")
+        with WordEmbeddingServer(self.word_embedder, socket_path=socket_path, max_request_bytes=1000) as server:
+            server.start()
+            with WordEmbeddingClient(socket_path) as client:
+                with self.assertRaisesRegex(ValueError, "exceeds 1000 bytes"):
+                    client.tokenize_texts_flat(["qorig " * 1000])
+                self.assertEqual(300, client.embedding_dim())  # the connection is still usable
+                self.assertEqual(2, len(client.tokenize_texts_flat(["qorig"])[0]) + 1)
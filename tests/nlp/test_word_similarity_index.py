@@ -0,0 +1,69 @@
+import numpy as np
+from unittest import TestCase
+from justmltools.nlp.word_similarity_index import WordSimilarityIndex
+
+
+class TestWordSimilarityIndex(TestCase):
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(42)
+        # 20 well separated groups of similar vectors
+        centers = rng.standard_normal((20, 16))
+        self.embedding_matrix = (np.repeat(centers, 50, axis=0) + 0.1 * rng.standard_normal((1000, 16))).astype('float32')
+        self.embedding_matrix[0] = 0
+        self.query_vectors = rng.standard_normal((30, 16)).astype('float32')
+        self.sut = WordSimilarityIndex(self.embedding_matrix, chunk_rows=64, query_batch_size=7)
+
+    def expected_search(self, query_vectors: np.ndarray, k: int):
+        similarities = WordSimilarityIndex.normalize(query_vectors) @ \
+            WordSimilarityIndex.normalize(self.embedding_matrix[1:]).T
+        word_indexes = np.argsort(-similarities, axis=1, kind='stable')[:, :k] + 1
+        return word_indexes, np.take_along_axis(similarities, word_indexes - 1, axis=1)
+
+    def test_normalize(self):
+        normalized = WordSimilarityIndex.normalize(np.asarray([[3, 4], [0, 0]]))
+        np.testing.assert_allclose([[0.6, 0.8], [0, 0]], normalized)
+
+    def test_search(self):
+        expected_word_indexes, expected_similarities = self.expected_search(self.query_vectors, k=5)
+        word_indexes, similarities = self.sut.search(self.query_vectors, k=5)
+        self.assertEqual((30, 5), word_indexes.shape)
+        np.testing.assert_array_equal(expected_word_indexes, word_indexes)
+        np.testing.assert_allclose(expected_similarities, similarities, rtol=1e-5)
+
+    def test_search_more_than_all_rows(self):
+        sut = WordSimilarityIndex(self.embedding_matrix[:4])
+        word_indexes, similarities = sut.search(self.query_vectors[:2], k=10)
+        self.assertEqual((2, 3), word_indexes.shape)
+        self.assertEqual([1, 2, 3], sorted(word_indexes[0].tolist()))
+
+    def test_search_clusters(self):
+        with self.assertRaises(ValueError):
+            self.sut.search(self.query_vectors, number_of_probes=1)
+        self.sut.build_clusters(number_of_clusters=20)
+        self.assertEqual(20, self.sut.get_number_of_clusters())
+        expected_word_indexes, expected_similarities = self.expected_search(self.query_vectors, k=5)
+        # searching all clusters is exact
+        word_indexes, similarities = self.sut.search(self.query_vectors, k=5, number_of_probes=20)
+        np.testing.assert_array_equal(expected_word_indexes, word_indexes)
+        np.testing.assert_allclose(expected_similarities, similarities, rtol=1e-5)
+        # the exact search still works on the vectors grouped by cluster
+        word_indexes, _ = self.sut.search(self.query_vectors, k=5)
+        np.testing.assert_array_equal(expected_word_indexes, word_indexes)
+        # a query close to a group finds its neighbours in the most similar cluster
+        word_indexes, _ = self.sut.search(self.embedding_matrix[101:102], k=5, number_of_probes=1)
+        np.testing.assert_array_equal(self.expected_search(self.embedding_matrix[101:102], k=5)[0], word_indexes)
+
+    def test_search_clusters_larger_than_chunk_rows(self):
+        sut = WordSimilarityIndex(self.embedding_matrix, chunk_rows=16, query_batch_size=7)
+        sut.build_clusters(number_of_clusters=2)
+        expected_word_indexes, expected_similarities = self.expected_search(self.query_vectors, k=5)
+        word_indexes, similarities = sut.search(self.query_vectors, k=5, number_of_probes=2)
+        np.testing.assert_array_equal(expected_word_indexes, word_indexes)
+        np.testing.assert_allclose(expected_similarities, similarities, rtol=1e-5)
+
+    def test_search_clusters_padding(self):
+        self.sut.build_clusters(number_of_clusters=200, number_of_iterations=2)
+        word_indexes, similarities = self.sut.search(self.embedding_matrix[1:2], k=100, number_of_probes=1)
+        self.assertTrue(np.all(word_indexes[similarities == -np.inf] == 0))
+        self.assertEqual(1, word_indexes[0, 0])
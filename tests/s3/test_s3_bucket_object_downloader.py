@@ -1,6 +1,9 @@
+from datetime import datetime, timezone
 from unittest import TestCase
 from unittest.mock import MagicMock, patch
 
+from botocore.exceptions import ClientError
+
 from justmltools.s3.s3_bucket_object_downloader import S3BucketObjectDownloader
 from justmltools.s3.aws_credentials import AwsCredentials
 
@@ -79,3 +82,41 @@ class TestS3BucketObjectDownloader(TestCase):
         self.assertEqual(1, boto3_resource.call_count)
         self.assertEqual(0, os_path_is_file.call_count)
         self.assertEqual(1, os_path_is_dir.call_count)
+
+    def test_get_byte_range(
+            self,
+            boto3_resource: MagicMock,
+            os_path_is_file: MagicMock,
+            os_path_is_dir: MagicMock
+    ):
+        sut = S3BucketObjectDownloader()
+        sut.get(bucket="test_bucket", key="test_key", byte_range=(100, 200))
+        get_object = boto3_resource.return_value.meta.client.get_object
+        get_object.assert_called_once_with(Bucket="test_bucket", Key="test_key", Range="bytes=100-199")
+        sut.get(bucket="test_bucket", key="test_key", byte_range=(100, 200), if_match="\"1\"")
+        get_object.assert_called_with(Bucket="test_bucket", Key="test_key", Range="bytes=100-199", IfMatch="\"1\"")
+
+    def test_get_changed_object(
+            self,
+            boto3_resource: MagicMock,
+            os_path_is_file: MagicMock,
+            os_path_is_dir: MagicMock
+    ):
+        boto3_resource.return_value.meta.client.get_object.side_effect = ClientError(
+            {"Error": {"Code": "PreconditionFailed"}}, "GetObject")
+        sut = S3BucketObjectDownloader()
+        with self.assertRaises(IOError):
+            sut.get(bucket="test_bucket", key="test_key", byte_range=(100, 200), if_match="\"1\"")
+
+    def test_get_metadata(
+            self,
+            boto3_resource: MagicMock,
+            os_path_is_file: MagicMock,
+            os_path_is_dir: MagicMock
+    ):
+        boto3_resource.return_value.meta.client.head_object.return_value = {
+            "ContentLength": 1000, "ETag": "\"1\"", "LastModified": datetime(2020, 1, 2, tzinfo=timezone.utc)}
+        sut = S3BucketObjectDownloader()
+        self.assertEqual({"size": 1000, "etag": "\"1\"", "last_modified": "2020-01-02T00:00:00+00:00"},
+                         sut.get_metadata(bucket="test_bucket", key="test_key"))
+        boto3_resource.return_value.meta.client.head_object.assert_called_once_with(Bucket="test_bucket", Key="test_key")
@@ -0,0 +1,46 @@
+import io
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from justmltools.s3.s3_bucket_object_downloader import S3BucketObjectDownloader
+from justmltools.s3.s3_object_stream import S3ObjectStream
+from justmltools.s3.s3_url import S3Url
+
+
+class TestS3ObjectStream(TestCase):
+
+    content: bytes = bytes(range(256)) * 1000
+
+    def setUp(self) -> None:
+        self.downloader = MagicMock(spec=S3BucketObjectDownloader)
+        self.downloader.get.side_effect = \
+            lambda bucket, key, byte_range, if_match: io.BytesIO(self.content[byte_range[0]:byte_range[1]])
+        self.downloader.get_metadata.return_value = {"size": len(self.content), "etag": "\"1\""}
+
+    def test_read(self):
+        with S3ObjectStream(S3Url("test_bucket", "test_key"), downloader=self.downloader,
+                            part_size=10000, number_of_threads=3) as sut:
+            self.assertEqual(self.content[:5], sut.read(5))
+            self.assertEqual(self.content[5:], sut.read())
+            self.assertEqual(b'', sut.read())
+        self.assertEqual(26, self.downloader.get.call_count)
+        self.downloader.get.assert_any_call("test_bucket", "test_key", byte_range=(250000, 256000), if_match="\"1\"")
+        self.downloader.get_metadata.assert_called_once_with("test_bucket", "test_key")
+
+    def test_read_with_size_and_etag(self):
+        with S3ObjectStream(S3Url("test_bucket", "test_key"), downloader=self.downloader, size=1000, etag="2") as sut:
+            self.assertEqual(self.content[:1000], sut.read())
+        self.downloader.get_metadata.assert_not_called()
+        self.downloader.get.assert_called_once_with("test_bucket", "test_key", byte_range=(0, 1000), if_match="2")
+
+    def test_changed_object(self):
+        self.downloader.get.side_effect = IOError("s3://test_bucket/test_key has changed")
+        with S3ObjectStream(S3Url("test_bucket", "test_key"), downloader=self.downloader, part_size=100000) as sut:
+            with self.assertRaises(IOError):
+                sut.read()
+
+    def test_short_part(self):
+        with S3ObjectStream(S3Url("test_bucket", "test_key"), downloader=self.downloader,
+                            size=len(self.content) + 1, part_size=100000, etag="1") as sut:
+            with self.assertRaises(IOError):
+                sut.read()